@@ -0,0 +1,78 @@
+# benchmarks/bench_american_pde.py
+"""
+Crank-Nicolson American pricer against the binomial lattice: the notebook's
+parameters, convergence at a realistic vol, a strike ladder in one solve versus
+one lattice per strike, and a repeated query served from the solution cache.
+
+    python -m benchmarks.bench_american_pde
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import best_of
+from quantfin.american_pde import AmericanPDE, PDEGrid
+from quantfin.lattice import binomial_tree, binomial_tree_slow
+
+# BinomialTreePricing(American) notebook
+NB = dict(S0=517.0, K=600.0, T=0.25, r=0.045, sig=0.0006, N=1000, opttype="P")
+
+
+def notebook_case():
+    p = NB
+    t0 = time.perf_counter()
+    slow = binomial_tree_slow(p["K"], p["T"], p["S0"], p["r"], p["N"], p["sig"], p["opttype"])
+    t_slow = time.perf_counter() - t0
+    fast = binomial_tree(p["K"], p["T"], p["S0"], p["r"], p["N"], p["sig"], p["opttype"])
+    t_fast = best_of(lambda: binomial_tree(p["K"], p["T"], p["S0"], p["r"], p["N"], p["sig"], p["opttype"]), 5)
+    pde = AmericanPDE()
+    res = pde.price(p["S0"], p["K"], p["T"], p["r"], p["sig"], p["opttype"])
+    t_pde = best_of(lambda: AmericanPDE().price(p["S0"], p["K"], p["T"], p["r"], p["sig"], p["opttype"]), 5)
+    return {"lattice_slow": slow, "lattice_slow_s": t_slow, "lattice": fast, "lattice_s": t_fast,
+            "pde": float(res.price), "pde_s": t_pde}
+
+
+def convergence(S=517.0, K=550.0, T=0.25, r=0.045, sig=0.3):
+    ref = float(AmericanPDE(PDEGrid(n_x=3201, n_t=1600)).price(S, K, T, r, sig).price)
+    out = {"reference_pde_3201x1600": ref, "reference_lattice_20000": binomial_tree(K, T, S, r, 20000, sig),
+           "lattice": [], "pde": []}
+    for N in (250, 1000, 4000):
+        v = binomial_tree(K, T, S, r, N, sig)
+        out["lattice"].append({"N": N, "err": abs(v - ref), "s": best_of(lambda: binomial_tree(K, T, S, r, N, sig), 3)})
+    for nx, nt in ((201, 100), (401, 200), (801, 400)):
+        g = PDEGrid(n_x=nx, n_t=nt)
+        v = float(AmericanPDE(g).price(S, K, T, r, sig).price)
+        out["pde"].append({"n_x": nx, "n_t": nt, "err": abs(v - ref),
+                           "s": best_of(lambda: AmericanPDE(g).price(S, K, T, r, sig), 3)})
+    return out
+
+
+def ladder(S=517.0, T=0.25, r=0.045, sig=0.3, n_strikes=50, N=1000):
+    strikes = S * np.exp(np.linspace(-0.4, 0.4, n_strikes))
+    t0 = time.perf_counter()
+    lat = np.array([binomial_tree(k, T, S, r, N, sig) for k in strikes])
+    t_lat = time.perf_counter() - t0
+    pde = AmericanPDE()
+    t0 = time.perf_counter()
+    res = pde.strike_ladder(S, strikes, T, r, sig)
+    t_pde = time.perf_counter() - t0
+    # same question again, e.g. the next refresh with an unchanged vol
+    t_cached = best_of(lambda: pde.strike_ladder(S, strikes, T, r, sig), 5)
+    return {"strikes": n_strikes, "lattice_N": N, "lattice_s": t_lat, "pde_solve_s": t_pde,
+            "pde_cached_s": t_cached, "solves": pde.solves,
+            "max_abs_diff": float(np.abs(res.price - lat).max())}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--strikes", type=int, default=50)
+    args = ap.parse_args()
+    AmericanPDE().price(100.0, 100.0, 0.5, 0.05, 0.2)   # numba compile outside the timings
+    print(json.dumps({"notebook": notebook_case(), "convergence": convergence(),
+                      "ladder": ladder(n_strikes=args.strikes)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
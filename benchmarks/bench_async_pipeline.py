@@ -0,0 +1,232 @@
+# benchmarks/bench_async_pipeline.py
+"""
+Tick ingestion latency of the momentum loop under heavy minute-close load, with the
+same work run two ways:
+
+* sync:  app.py's shape. One consumer thread folds each tick into the minute bar. On a
+  minute change it runs GARCH, features and the state machine, then render and the
+  CSV write, inline before the next tick.
+* async: momentum.pipeline_async. Ingest runs on the event loop. A timer closes the
+  minute. Minute work runs on an executor thread, and render/persist are separate
+  consumers.
+
+Both use MultiTimeframeBars for the bar itself, so the difference is only where the minute
+work runs. The bar's own per-tick cost is covered by the suite's multi_bars cases. The load is a
+big feature window (window_minutes bars, atr_median_len) plus a slow disk: each
+persist sleeps disk_ms before writing to a temp dir. A producer thread sends ticks at
+`rate`/s on a warped exchange clock, so a minute closes every 60/warp seconds.
+
+Reported per mode:
+* ingest latency (enqueue -> folded into the bar), overall;
+* the same split into ticks finished within `near_ms` after a minute close, and the rest;
+* minute-work time, bars closed, and (async) bars closed by the timer.
+
+    python -m benchmarks.bench_async_pipeline --rate 2000 --seconds 20 --warp 30
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import yaml
+
+from benchmarks.common import ROOT, summarize_ns
+from benchmarks.generators import minute_bars
+from momentum.core_contracts import Tick
+from momentum.features_engine import PolarsFeatureEngine
+from momentum.garch_filter import OnlineGarchFilter
+from momentum.iv_context import IVcontextNumba
+from momentum.persistence import append_bar_csv, append_state_csv
+from momentum.multi_bars import MultiTimeframeBars
+from momentum.pipeline_async import AsyncMomentumPipeline, MinuteWork, WarpClock
+from momentum.session_clock import SessionClock
+from momentum.state_machine import SimpleStateMachine
+from momentum.ui_panel import render
+
+START = datetime(2025, 6, 11, 4, 0, 50, tzinfo=timezone.utc)   # 09:30:50 IST, past the open embargo
+
+
+class _Timed:
+    """MinuteWork wrapper recording when each call starts and how long it takes."""
+
+    def __init__(self, work):
+        self.work = work
+        self.starts, self.ns = [], []
+
+    def __call__(self, bar, window, hb):
+        t0 = time.perf_counter_ns()
+        self.starts.append(t0)
+        try:
+            return self.work(bar, window, hb)
+        finally:
+            self.ns.append(time.perf_counter_ns() - t0)
+
+
+def _work(window_minutes, atr_median_len):
+    cfg = yaml.safe_load((ROOT / "momentum-testing" / "config.yaml").read_text())
+    s = cfg["session"]
+    clock = SessionClock(s["tz"], s["open"], s["close"], s["open_embargo_min"], s["close_embargo_min"],
+                         s["expiry_afternoon_strict_after"])
+    feats = PolarsFeatureEngine(donch_window=cfg["features"]["donch_window"], atr_median_len=atr_median_len)
+    feats.compute(pl.from_pandas(minute_bars(window_minutes)))   # warm polars / numba
+    ivctx = IVcontextNumba(lookback_minutes=60)
+    return _Timed(MinuteWork(feats, OnlineGarchFilter(min_fit_bars=120), SimpleStateMachine(cfg, clock), ivctx.empty))
+
+
+def _bars(n):
+    bars = MultiTimeframeBars(("1m",), capacity=2 * n, window=n)
+    for r in minute_bars(n, start=(START - timedelta(minutes=n)).replace(tzinfo=None)).itertuples(index=False):
+        bars.push_bar(r.ts_close.to_pydatetime().replace(tzinfo=timezone.utc), r.open, r.high, r.low, r.close,
+                      r.volume)   # history ends just before START
+    bars.finalize_bar()
+    return bars
+
+
+def _persist_fn(root: Path, disk_ms: float):
+    def persist(r):
+        time.sleep(disk_ms / 1e3)
+        append_bar_csv(str(root / "bars.csv"), r.bar)
+        append_state_csv(str(root / "state.csv"), r.now, r.bar, r.feats, r.iv, r.snap,
+                         r.hb_age_s, r.cdn_up_left, r.cdn_dn_left)
+    return persist
+
+
+def _producer(sink, clock: WarpClock, rate, stop: threading.Event, seed=0):
+    """rate ticks/s in 1 ms batches, stamped with the warped exchange clock."""
+    rng = np.random.default_rng(seed)
+    px = 22_000.0
+    per_ms = rate / 1e3
+    due = 0.0
+    t0 = time.perf_counter()
+    while not stop.is_set():
+        elapsed_ms = (time.perf_counter() - t0) * 1e3
+        k = int(elapsed_ms * per_ms - due)
+        for _ in range(k):
+            px *= 1.0 + 2e-5 * rng.standard_normal()
+            sink(Tick(ts=clock.now(), last=px, volume=1.0))
+        due += k
+        time.sleep(0.001)
+
+
+def _split(lat, done_ns, starts, near_ms):
+    lat, done_ns = np.asarray(lat), np.asarray(done_ns)
+    near = np.zeros(lat.size, dtype=bool)
+    for s in starts:
+        near |= (done_ns >= s) & (done_ns < s + near_ms * 1e6)
+    out = {"all": summarize_ns(lat)}
+    if near.any():
+        out["near_close"] = summarize_ns(lat[near])
+    if (~near).any():
+        out["elsewhere"] = summarize_ns(lat[~near])
+    return out
+
+
+# ---------- modes ----------
+
+def run_sync(rate, seconds, warp, window_minutes, atr_median_len, disk_ms, near_ms, root):
+    work = _work(window_minutes, atr_median_len)
+    bars = _bars(window_minutes)
+    persist = _persist_fn(root, disk_ms)
+    clock = WarpClock(START, warp)
+    q: deque = deque()
+    stop = threading.Event()
+    lat, done = [], []
+    n_bars = [0]
+
+    def consume():
+        pop, now = q.popleft, time.perf_counter_ns
+        while True:
+            try:
+                t_in, tick = pop()
+            except IndexError:
+                if stop.is_set():
+                    return
+                time.sleep(0.0002)
+                continue
+            bars.update(tick.ts, tick.last, tick.volume)
+            t = now()
+            lat.append(t - t_in)
+            done.append(t)
+            if not bars.minute_ready():
+                continue
+            n_bars[0] += 1
+            bar, window = bars.finalize_bar()
+            r = work(bar, window, 0.0)
+            if r is not None:
+                render(r.now, r.bar, r.feats, r.iv, r.snap, r.hb_age_s, r.cdn_up_left, r.cdn_dn_left)
+                persist(r)
+
+    worker = threading.Thread(target=consume, daemon=True)
+    worker.start()
+    prod = threading.Thread(target=_producer,
+                            args=(lambda t: q.append((time.perf_counter_ns(), t)), clock, rate, stop), daemon=True)
+    prod.start()
+    time.sleep(seconds)
+    stop.set()
+    prod.join()
+    worker.join(60)
+    return {"ticks": len(lat), "bars": n_bars[0], "minute_work": summarize_ns(work.ns) if work.ns else None,
+            "ingest_latency": _split(lat, done, work.starts, near_ms)}
+
+
+def run_async(rate, seconds, warp, window_minutes, atr_median_len, disk_ms, near_ms, root):
+    work = _work(window_minutes, atr_median_len)
+    clock = WarpClock(START, warp)
+    pipe = AsyncMomentumPipeline(work, window_minutes=window_minutes, bars=_bars(window_minutes), render_fn=render,
+                                 persist_fn=_persist_fn(root, disk_ms), clock=clock, close_grace_s=0.25 * warp / 60,
+                                 latency_samples=int(rate * seconds * 1.2))
+    stop = threading.Event()
+
+    async def main():
+        prod = threading.Thread(target=_producer, args=(pipe.put_tick, clock, rate, stop), daemon=True)
+        prod.start()
+        try:
+            return await pipe.run(duration_s=seconds)
+        finally:
+            stop.set()
+
+    st = asyncio.run(main())
+    lat, done = pipe.ingest_latency()
+    return {"ticks": st["ticks_done"], "bars": st["bars_closed"], "bars_by_timer": st["bars_by_timer"],
+            "dropped": st["ticks_dropped"] + st["renders_dropped"], "bar_waits": st["bar_waits"],
+            "minute_work": summarize_ns(work.ns) if work.ns else None,
+            "persist": summarize_ns(pipe.persist_ns) if pipe.persist_ns else None,
+            "ingest_latency": _split(lat, done, work.starts, near_ms)}
+
+
+def run(rate=2_000, seconds=20.0, warp=30.0, window_minutes=3_000, atr_median_len=1_000, disk_ms=200.0,
+        near_ms=500.0):
+    out = {"rate": rate, "seconds": seconds, "warp": warp, "window_minutes": window_minutes,
+           "atr_median_len": atr_median_len, "disk_ms": disk_ms}
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        for name, fn in (("sync", run_sync), ("async", run_async)):
+            d = Path(tmp) / name
+            d.mkdir()
+            out[name] = fn(rate, seconds, warp, window_minutes, atr_median_len, disk_ms, near_ms, d)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=2_000)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--warp", type=float, default=30.0)
+    ap.add_argument("--window", type=int, default=3_000)
+    ap.add_argument("--atr-median-len", type=int, default=1_000)
+    ap.add_argument("--disk-ms", type=float, default=200.0)
+    args = ap.parse_args()
+    print(json.dumps(run(args.rate, args.seconds, args.warp, args.window, args.atr_median_len, args.disk_ms),
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
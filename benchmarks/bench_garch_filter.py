@@ -0,0 +1,68 @@
+# benchmarks/bench_garch_filter.py
+"""
+Per-bar latency of OnlineGarchFilter.update() and wall time of a background refit.
+
+    python -m benchmarks.bench_garch_filter
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize_ns, time_per_call
+from momentum.garch_filter import GarchParams, OnlineGarchFilter, fit_garch11, garch11_filter
+
+
+def simulate_closes(n, seed=7, p=GarchParams(mu=0.0, omega=2e-9, alpha=0.08, beta=0.90)):
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal(n)
+    r = np.empty(n)
+    v = p.long_run_var
+    for i in range(n):
+        r[i] = p.mu + np.sqrt(v) * z[i]
+        v = p.omega + p.alpha * (r[i] - p.mu) ** 2 + p.beta * v
+    return 22000.0 * np.exp(np.cumsum(r)), p
+
+
+def run(n_bars=20000, refit_every=60, fit_window=1500):
+    closes, true_p = simulate_closes(n_bars + 1)
+
+    # steady-state update latency with refits happening in the background
+    filt = OnlineGarchFilter(refit_every=refit_every, fit_window=fit_window, min_fit_bars=250)
+    lat = time_per_call(lambda i: filt.update(closes[i]), n_bars, warmup=0)
+    filt.wait_for_refit()
+    filt.update(closes[-1])  # adopt whatever the last refit published
+
+    # refit cost (what the bar loop no longer pays)
+    rets = np.diff(np.log(closes))[-fit_window:]
+    garch11_filter(rets, 0.0, 1e-9, 0.05, 0.9, 1e-8)  # jit warmup
+    fit_garch11(rets[:100])
+    t0 = time.perf_counter()
+    cold = fit_garch11(rets)
+    t_cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fit_garch11(rets, x0=cold)
+    t_warm = time.perf_counter() - t0
+
+    return {
+        "update": summarize_ns(lat[300:]),
+        "refits_done": filt.fits_done,
+        "fit_cold_ms": t_cold * 1e3,
+        "fit_warm_ms": t_warm * 1e3,
+        "true_params": true_p.__dict__,
+        "fitted_params": filt.params.__dict__ if filt.params else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--bars", type=int, default=20000)
+    ap.add_argument("--refit-every", type=int, default=60)
+    ap.add_argument("--fit-window", type=int, default=1500)
+    args = ap.parse_args()
+    print(json.dumps(run(args.bars, args.refit_every, args.fit_window), indent=2))
+
+
+if __name__ == "__main__":
+    main()
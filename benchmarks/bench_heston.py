@@ -0,0 +1,68 @@
+# benchmarks/bench_heston.py
+"""
+Heston COS pricing against the reference integral (accuracy and speed per strike
+grid), and full-chain calibration time, cold and warm-started.
+
+    python -m benchmarks.bench_heston
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import best_of
+from benchmarks.generators import heston_chain
+from quantfin.heston import HestonCalibrator, HestonParams, cos_prices, heston_price_quad
+from quantfin.vol_surface import prepare_quotes
+
+PARAM_SETS = {
+    "spy_like": HestonParams(v0=0.03, kappa=2.0, theta=0.045, sigma=0.6, rho=-0.7),
+    "fat_left_tail": HestonParams(v0=0.02, kappa=0.5, theta=0.08, sigma=1.5, rho=-0.9),
+    "calm": HestonParams(v0=0.01, kappa=3.0, theta=0.02, sigma=0.4, rho=-0.8),
+}
+
+
+def accuracy(S=400.0, r=0.05, maturities=(7 / 365, 0.1, 0.5, 2.0), n_strikes=41):
+    rows = []
+    for name, p in PARAM_SETS.items():
+        for T in maturities:
+            K = S * np.exp(np.linspace(-3, 2, n_strikes) * np.sqrt(p.theta * T))
+            t0 = time.perf_counter()
+            ref = np.array([heston_price_quad(k, T, S, r, p, "c") for k in K])
+            t_quad = time.perf_counter() - t0
+            cos = cos_prices(K, T, S, r, p, "c")
+            t_cos = best_of(lambda: cos_prices(K, T, S, r, p, "c"), 5)
+            rows.append({"params": name, "T": round(T, 4), "max_abs_err": float(np.abs(cos - ref).max()),
+                         "max_rel_err": float(np.max(np.abs(cos - ref) / np.maximum(ref, 1e-3))),
+                         "quad_ms": t_quad * 1e3, "cos_ms": t_cos * 1e3})
+    return rows
+
+
+def calibration(n_expiries=30, strikes=200, noise_bp=10.0):
+    true = PARAM_SETS["spy_like"]
+    chain = heston_chain(true, n_expiries, strikes, noise_bp=noise_bp, seed=1)
+    moved = heston_chain(true, n_expiries, strikes, noise_bp=noise_bp, seed=2, spot=401.0)
+    t0 = time.perf_counter()
+    q = prepare_quotes(chain)
+    t_prep = time.perf_counter() - t0
+    q_moved = prepare_quotes(moved)
+    cal = HestonCalibrator()
+    cold = cal.fit(q)
+    warm = cal.fit(q_moved)
+    err = np.abs(cold.params.as_array() - true.as_array()) / np.abs(true.as_array())
+    return {"quotes": int(q.k.size), "expiries": int(q.n_slices), "prepare_quotes_s": t_prep,
+            "cold_s": cold.seconds, "cold_nfev": cold.nfev, "warm_s": warm.seconds, "warm_nfev": warm.nfev,
+            "rmse_vol": cold.rmse_vol, "max_rel_param_err": float(err.max())}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--expiries", type=int, default=30)
+    ap.add_argument("--strikes", type=int, default=200)
+    args = ap.parse_args()
+    print(json.dumps({"accuracy": accuracy(), "calibration": calibration(args.expiries, args.strikes)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# benchmarks/bench_kite_sim.py
+"""
+End-to-end load test against momentum.kite_sim, with the simulator in its own process.
+
+* momentum pipeline: SimTicker in FULL mode on the NIFTY index token. on_ticks
+  appends to a deque as KiteFeed does (bounded here, so overflow counts as drops),
+  and the consumer runs app.py's loop: bar aggregator, GARCH filter, features and
+  state machine. The exchange clock is warped so a minute bar closes every second.
+* greeks dashboard (own process): REST /quote for the strike window around ATM every
+  refresh, then implied vol and greeks per row. This is greeks/app.py's loop without
+  Streamlit.
+
+For each tick rate it reports:
+* the ticks generated, sent and dropped by the server;
+* the ticks received, dropped at the client deque and processed;
+* processed ticks per second and receive-to-processed latency;
+* dashboard cycle times and missed refreshes.
+
+    python -m benchmarks.bench_kite_sim --rates 1000 5000 20000 50000 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import threading
+import time
+import urllib.request
+from collections import deque
+
+import numpy as np
+import polars as pl
+import yaml
+
+from benchmarks.common import ROOT, summarize_ns
+from benchmarks.generators import minute_bars
+from momentum.core_contracts import IVcontext, Tick
+from momentum.features_engine import PolarsFeatureEngine
+from momentum.garch_filter import OnlineGarchFilter
+from momentum.kite_sim import NIFTY_TOKEN, SimConfig, SimTicker, start_process
+from momentum.multi_bars import MultiTimeframeBars
+from momentum.pipeline_async import MinuteWork
+from momentum.session_clock import SessionClock
+from momentum.state_machine import SimpleStateMachine
+
+AUTH = {"Authorization": "token sim:sim"}
+
+
+def _get(url):
+    with urllib.request.urlopen(urllib.request.Request(url, headers=AUTH), timeout=10) as r:
+        return r.read()
+
+
+# ---------- momentum pipeline ----------
+
+class _Pipeline:
+    """app.py's per-tick work, built (and JIT-warmed) before the feed starts."""
+
+    def __init__(self):
+        cfg = yaml.safe_load((ROOT / "momentum-testing" / "config.yaml").read_text())
+        s = cfg["session"]
+        clock = SessionClock(s["tz"], s["open"], s["close"], s["open_embargo_min"], s["close_embargo_min"],
+                             s["expiry_afternoon_strict_after"])
+        self.bars = MultiTimeframeBars(cfg["bars"]["specs"], capacity=cfg["bars"]["capacity"],
+                                       window=cfg["features"]["donch_window"])
+        feats = PolarsFeatureEngine(donch_window=cfg["features"]["donch_window"])
+        iv = IVcontext(None, None, None, "NA")
+        self.work = MinuteWork(feats, OnlineGarchFilter(min_fit_bars=120), SimpleStateMachine(cfg, clock),
+                               lambda: iv)
+        self.n_bars = 0
+        # polars plans / numba kernels compile here, not inside the timed window
+        feats.compute(pl.from_pandas(minute_bars(30)))
+        OnlineGarchFilter(min_fit_bars=120).update(1.0)
+        MultiTimeframeBars(window=20).frame()
+
+    def on_tick(self, tick) -> None:
+        bars = self.bars
+        bars.push_tick(tick)
+        if not bars.minute_ready():
+            return
+        bar, window = bars.finalize_bar()
+        self.n_bars += 1
+        self.work(bar, window, 0.0)
+
+    def run(self, q: deque, stop: threading.Event, out: dict) -> None:
+        lat = []
+        processed = 0
+        pop = q.popleft
+        while True:
+            try:
+                recv_ns, tick = pop()
+            except IndexError:
+                if stop.is_set():
+                    break
+                time.sleep(0.0005)
+                continue
+            self.on_tick(tick)
+            processed += 1
+            if processed % 16 == 0:
+                lat.append(time.perf_counter_ns() - recv_ns)
+        out.update(processed=processed, bars=self.n_bars, latency=lat)
+
+
+def run_pipeline(root: str, seconds: float, max_backlog: int) -> dict:
+    q: deque = deque(maxlen=max_backlog)
+    received = [0]
+    clock = time.perf_counter_ns
+
+    def on_ticks(ws, ticks):
+        now = clock()
+        received[0] += len(ticks)
+        q.extend((now, Tick(ts=t["exchange_timestamp"], last=t["last_price"])) for t in ticks
+                 if "exchange_timestamp" in t)
+
+    def on_connect(ws, _):
+        ws.subscribe([NIFTY_TOKEN])
+        ws.set_mode(ws.MODE_FULL, [NIFTY_TOKEN])
+
+    stop = threading.Event()
+    out: dict = {}
+    worker = threading.Thread(target=_Pipeline().run, args=(q, stop, out), daemon=True)
+    worker.start()
+    tk = SimTicker("sim", "sim", root.replace("http", "ws"))
+    tk.on_ticks, tk.on_connect = on_ticks, on_connect
+    t0 = time.perf_counter()
+    tk.connect()
+    time.sleep(seconds)
+    tk.close()
+    backlog = len(q)
+    q.clear()
+    stop.set()
+    worker.join(30)
+    wall = time.perf_counter() - t0
+    processed = out.get("processed", 0)
+    return {
+        "received": received[0], "processed": processed, "bars": out.get("bars", 0),
+        "client_dropped": received[0] - processed,
+        "backlog_at_stop": backlog, "reconnects": tk.reconnects,
+        "processed_per_s": processed / wall,
+        "latency": summarize_ns(out["latency"]) if out.get("latency") else None,
+    }
+
+
+# ---------- greeks dashboard ----------
+
+def _dashboard(root: str, seconds: float, refresh_s: float, window: int, out_q):
+    from quantfin.greeks import bs_greeks, implied_vol_from_price
+
+    ins = [ln.split(",") for ln in _get(root + "/instruments").decode().splitlines()[1:]]
+    opts = [r for r in ins if r[10] == "NFO-OPT"]
+    expiry = min(r[5] for r in opts)
+    spot = json.loads(_get(root + "/quote/ltp?i=NSE:NIFTY%2050"))["data"]["NSE:NIFTY 50"]["last_price"]
+    view = [r for r in opts if r[5] == expiry and abs(float(r[6]) - spot) <= window * 50]
+    url = root + "/quote?" + "&".join("i=NFO:" + r[2] for r in view)
+    T = max((np.datetime64(expiry) - np.datetime64("2025-06-11")).astype(int), 1) / 365.0
+    cycles, quotes, missed = [], 0, 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        t0 = time.perf_counter_ns()
+        data = json.loads(_get(url))["data"]
+        for r in view:
+            qd = data.get("NFO:" + r[2])
+            if not qd:
+                continue
+            bid, ask = qd["depth"]["buy"][0]["price"], qd["depth"]["sell"][0]["price"]
+            px = (bid + ask) / 2.0 if bid > 0 and ask >= bid else qd["last_price"]
+            right = "C" if r[9] == "CE" else "P"
+            iv = implied_vol_from_price(px, spot, float(r[6]), 0.07, 0.0, T, right)
+            bs_greeks(spot, float(r[6]), 0.07, 0.0, iv if iv == iv else 0.0, T, right)
+            quotes += 1
+        dt = time.perf_counter_ns() - t0
+        cycles.append(dt)
+        if dt > refresh_s * 1e9:
+            missed += 1
+        time.sleep(max(0.0, refresh_s - dt / 1e9))
+    out_q.put({"symbols": len(view), "cycles": len(cycles), "missed_refresh": missed,
+               "quotes_per_s": quotes / seconds, "cycle": summarize_ns(cycles)})
+
+
+# ---------- driver ----------
+
+def run(rates=(1_000, 5_000, 20_000, 50_000), seconds=5.0, time_warp=60.0, max_backlog=None, refresh_s=1.0,
+        window=15, **sim_kw):
+    out = []
+    ctx = mp.get_context("spawn")
+    for rate in rates:
+        proc, port = start_process(SimConfig(port=0, rate=rate, time_warp=time_warp, **sim_kw))
+        root = f"http://127.0.0.1:{port}"
+        try:
+            dq = ctx.Queue()
+            dash = ctx.Process(target=_dashboard, args=(root, seconds, refresh_s, window, dq), daemon=True)
+            dash.start()
+            pipe = run_pipeline(root, seconds, max_backlog or int(rate))   # ~1 s of ticks
+            board = dq.get(timeout=seconds + 60)
+            dash.join(10)
+            st = json.loads(_get(root + "/_sim/stats"))
+        finally:
+            proc.terminate()
+            proc.join(5)
+        gen = st["generated"]
+        out.append({
+            "rate": rate, "seconds": seconds,
+            "server": {k: st[k] for k in ("generated", "sent", "dropped", "messages", "bytes", "disconnects")},
+            "pipeline": pipe,
+            "drop_rate": 1.0 - pipe["processed"] / gen if gen else None,
+            "dashboard": board,
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rates", nargs="+", type=float, default=[1_000, 5_000, 20_000, 50_000])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--disconnect-every-s", type=float, default=0.0)
+    ap.add_argument("--burst-every-s", type=float, default=0.0)
+    args = ap.parse_args()
+    print(json.dumps(run(args.rates, args.seconds, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         disconnect_every_s=args.disconnect_every_s, burst_every_s=args.burst_every_s), indent=2))
+
+
+if __name__ == "__main__":
+    main()
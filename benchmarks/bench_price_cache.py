@@ -0,0 +1,72 @@
+# benchmarks/bench_price_cache.py
+"""
+Local price cache: a cold load through a slow provider (LocalCsvProvider with fake
+per-request latency standing in for yfinance), a warm memory-mapped load of the
+same wide close matrix, a load from a fresh cache object on the same directory
+(a new notebook kernel), and an incremental extension that should fetch only
+the missing tail.
+
+    python -m benchmarks.bench_price_cache
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import best_of
+from quantfin.price_cache import LocalCsvProvider, PriceCache
+
+
+def _write_source(root, symbols, start="2000-01-03", end="2024-12-31", seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(start, end)
+    for s in symbols:
+        px = 100 * np.exp(np.cumsum(0.015 * rng.standard_normal(idx.size)))
+        pd.DataFrame({"date": idx, "Open": px, "High": px * 1.01, "Low": px * 0.99, "Close": px,
+                      "Adj Close": px, "Volume": 1e6}).to_csv(os.path.join(root, f"{s}.csv"), index=False)
+
+
+def run(n_symbols=50, latency_s=0.05, workers=8):
+    syms = [f"SYM{i:03d}" for i in range(n_symbols)]
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "src")
+        os.makedirs(src)
+        _write_source(src, syms)
+        prov = LocalCsvProvider(src, latency_s=latency_s)
+        cache = PriceCache(os.path.join(d, "cache"), prov, max_workers=workers)
+
+        t0 = time.perf_counter()
+        m = cache.close(syms, "2015-01-01", "2023-12-31")
+        cold = time.perf_counter() - t0
+        calls_cold = prov.calls
+
+        warm = best_of(lambda: cache.close(syms, "2015-01-01", "2023-12-31"), 5)
+        fresh = best_of(lambda: PriceCache(cache.root, prov).close(syms, "2015-01-01", "2023-12-31"), 3)
+        calls_warm = prov.calls - calls_cold
+
+        t0 = time.perf_counter()
+        cache.close(syms, "2015-01-01", "2024-12-31")
+        extend = time.perf_counter() - t0
+        return {
+            "symbols": n_symbols, "rows": int(m.shape[0]), "provider_latency_s": latency_s, "workers": workers,
+            "cold_s": cold, "cold_provider_calls": calls_cold,
+            "warm_ms": warm * 1e3, "fresh_process_ms": fresh * 1e3,
+            "warm_provider_calls": calls_warm,
+            "extend_s": extend, "extend_provider_calls": prov.calls - calls_cold - calls_warm,
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.05)
+    args = ap.parse_args()
+    print(json.dumps(run(args.symbols, args.latency), indent=2))
+
+
+if __name__ == "__main__":
+    main()
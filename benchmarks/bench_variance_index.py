@@ -0,0 +1,64 @@
+# benchmarks/bench_variance_index.py
+"""
+LiveVarianceIndex cycle cost on the simulated NIFTY chain: the incremental update
+against a full recompute every cycle, at several tick rates, plus the gap between
+the incremental level and a from-scratch level.
+
+    python -m benchmarks.bench_variance_index
+"""
+import argparse
+import json
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks.common import summarize_ns
+from momentum.option_feed_sim import SimulatedOptionQuotes
+from momentum.variance_index import LiveVarianceIndex
+
+
+def run_case(tick_fraction, cycles, strikes_each_side, full_every_cycle=False, seed=3):
+    src = SimulatedOptionQuotes(strikes_each_side=strikes_each_side, tick_fraction=tick_fraction, seed=seed)
+    idx = LiveVarianceIndex(src, r=src.r, resync_every=1 if full_every_cycle else 300)
+    step = timedelta(seconds=src.poll_dt_s)
+    # pre-generate the quote batches so the simulator's pricing isn't in the timings
+    batches = [src.poll() for _ in range(cycles)]
+    times = [src.now - step * (cycles - 1 - i) for i in range(cycles)]
+    feed = iter(batches)
+    idx.source = type("Replay", (), {"poll": staticmethod(lambda: next(feed))})()
+
+    lat = np.empty(cycles)
+    gap = 0.0
+    for i in range(cycles):
+        t0 = time.perf_counter_ns()
+        idx.step(now=times[i])
+        lat[i] = time.perf_counter_ns() - t0
+        if i % 100 == 99 and idx.value is not None:
+            inc = idx.value.vol
+            gap = max(gap, abs(inc - idx.full_recompute(now=times[i])))
+    return {"tick_fraction": tick_fraction, "full_every_cycle": full_every_cycle,
+            "instruments": idx.stats()["instruments"],
+            "quotes_per_cycle": idx.quotes_applied / cycles, "cycle": summarize_ns(lat[1:]),
+            "index": idx.value.vol if idx.value else None, "max_abs_gap_vs_full": gap,
+            "max_resync_drift": idx.max_drift}
+
+
+def run(cycles=1200, strikes_each_side=40):
+    out = []
+    for frac in (0.02, 0.2, 1.0):
+        out.append(run_case(frac, cycles, strikes_each_side))
+        out.append(run_case(frac, cycles, strikes_each_side, full_every_cycle=True))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--cycles", type=int, default=1200)
+    ap.add_argument("--strikes-each-side", type=int, default=40)
+    args = ap.parse_args()
+    print(json.dumps(run(args.cycles, args.strikes_each_side), indent=2))
+
+
+if __name__ == "__main__":
+    main()
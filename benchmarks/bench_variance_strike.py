@@ -0,0 +1,51 @@
+# benchmarks/bench_variance_strike.py
+"""
+Batch variance-strike term structure vs the per-expiry groupby loop.
+
+    python -m benchmarks.bench_variance_strike
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.common import best_of
+from benchmarks.generators import option_chains
+from quantfin.variance_strike import build_term_structure, calculate_variance_strike
+
+
+def _loop_one_day(day_df, r):
+    d = day_df.copy()
+    d["time_to_expiry"] = (d["expiration"] - d["quote_date"]).dt.days / 365.25
+    d["mid_price"] = (d["bid"] + d["ask"]) / 2.0
+    d = d[(d["time_to_expiry"] > 0.001) & (d["mid_price"] > 0)]
+    return [calculate_variance_strike(c, r) for _, c in d.groupby("expiration")]
+
+
+def run(start="2023-01-03", end="2024-12-31", sample_days=20, r=0.05):
+    chain = option_chains(start, end)
+    t_batch = best_of(lambda: build_term_structure(chain, r).at_tenors(), repeat=3)
+
+    # the old path, timed on a sample of days and scaled to the full history
+    days = chain["quote_date"].unique()
+    pick = days[np.linspace(0, len(days) - 1, sample_days).astype(int)]
+    t0 = time.perf_counter()
+    for d in pick:
+        _loop_one_day(chain[chain["quote_date"] == d], r)
+    t_loop = (time.perf_counter() - t0) / sample_days * len(days)
+
+    return {"rows": int(len(chain)), "quote_dates": int(len(days)),
+            "batch_s": t_batch, "loop_s_estimated": t_loop, "speedup": t_loop / t_batch}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--start", default="2023-01-03")
+    ap.add_argument("--end", default="2024-12-31")
+    args = ap.parse_args()
+    print(json.dumps(run(args.start, args.end), indent=2))
+
+
+if __name__ == "__main__":
+    main()
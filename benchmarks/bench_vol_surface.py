@@ -0,0 +1,63 @@
+# benchmarks/bench_vol_surface.py
+"""
+SVI/SSVI calibration time against chain size, cold vs warm-started, plus bulk
+query cost of the exact surface vs its cached grid.
+
+    python -m benchmarks.bench_vol_surface
+"""
+import argparse
+import itertools
+import json
+
+import numpy as np
+
+from benchmarks.common import best_of
+from benchmarks.generators import ssvi_chain
+from quantfin.vol_surface import SurfaceCalibrator, prepare_quotes
+
+
+def run(sizes=((4, 20), (12, 60), (12, 200), (24, 200), (24, 600)), noise_bp=15.0, repeat=5):
+    rows = []
+    for n_exp, n_strikes in sizes:
+        base = ssvi_chain(n_exp, n_strikes, noise_bp=noise_bp, seed=1)
+        moved = ssvi_chain(n_exp, n_strikes, noise_bp=noise_bp, seed=2, spot=401.0)   # the "next" snapshot
+        q0, q1 = prepare_quotes(base), prepare_quotes(moved)
+        t_prep = best_of(lambda: prepare_quotes(moved), repeat)
+
+        t_cold = best_of(lambda: SurfaceCalibrator().fit(q1), repeat)
+        cold = SurfaceCalibrator().fit(q1).fit_info
+
+        # warm: one calibrator alternating between two nearby snapshots, as an intraday loop does
+        cal = SurfaceCalibrator()
+        cal.fit(q0)
+        snaps = itertools.cycle((q1, q0))
+        t_warm = best_of(lambda: cal.fit(next(snaps)), repeat)
+        info = cal.last.fit_info
+
+        rows.append({"expiries": n_exp, "strikes": n_strikes, "quotes": info["quotes"],
+                     "prepare_ms": t_prep * 1e3, "cold_fit_ms": t_cold * 1e3, "warm_fit_ms": t_warm * 1e3,
+                     "cold_iters": [cold["svi_iters"], cold["ssvi_iters"]],
+                     "warm_iters": [info["svi_iters"], info["ssvi_iters"]],
+                     "ssvi_rmse_w": info["ssvi_rmse_w"]})
+
+    surf = SurfaceCalibrator().fit(ssvi_chain(12, 60))
+    rng = np.random.default_rng(0)
+    K = rng.uniform(320, 480, 1_000_000)
+    T = rng.uniform(surf.T[0], surf.T[-1], K.size)
+    grid = surf.grid()
+    query = {"points": int(K.size),
+             "exact_ms": best_of(lambda: surf.iv(K, T), 3) * 1e3,
+             "grid_ms": best_of(lambda: grid.iv(K, T), 3) * 1e3,
+             "grid_max_abs_err": float(np.abs(grid.iv(K, T) - surf.iv(K, T)).max())}
+    return {"calibration": rows, "query": query}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    print(json.dumps(run(repeat=args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
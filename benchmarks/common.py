@@ -0,0 +1,48 @@
+# benchmarks/common.py
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# project folders aren't installed packages; make them importable from here
+for sub in ("", "momentum-testing"):
+    p = str(ROOT / sub) if sub else str(ROOT)
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+
+def time_per_call(fn, n, warmup=100):
+    """Call fn(i) n times; return per-call latencies in nanoseconds."""
+    for i in range(min(warmup, n)):
+        fn(i)
+    out = np.empty(n)
+    clock = time.perf_counter_ns
+    for i in range(n):
+        t0 = clock()
+        fn(i)
+        out[i] = clock() - t0
+    return out
+
+
+def summarize_ns(lat_ns) -> dict:
+    lat = np.asarray(lat_ns, dtype=float)
+    return {
+        "n": int(lat.size),
+        "mean_us": float(lat.mean() / 1e3),
+        "p50_us": float(np.percentile(lat, 50) / 1e3),
+        "p99_us": float(np.percentile(lat, 99) / 1e3),
+        "max_us": float(lat.max() / 1e3),
+    }
+
+
+def best_of(fn, repeat=5) -> float:
+    """Best wall time in seconds over `repeat` runs of fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
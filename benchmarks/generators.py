@@ -0,0 +1,153 @@
+# benchmarks/generators.py
+"""Deterministic synthetic data for benchmarks (same seed -> same data)."""
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+
+def option_chains(start="2023-01-03", end="2024-12-31", n_expiries=12, strikes_per_expiry=60,
+                  spot=400.0, r=0.05, seed=0) -> pd.DataFrame:
+    """
+    Daily SPY-like chains (quote_date, expiration, strike, option_type, bid, ask,
+    underlying_price) priced off a smile-shaped Black-76 vol, weekly expiries.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    frames = []
+    S = spot
+    for d in days:
+        S *= np.exp(0.01 * rng.standard_normal())
+        for k in range(n_expiries):
+            n_days = 7 * (k + 1) + (4 - d.weekday())
+            T = n_days / 365.25
+            K = np.unique(np.round(S * np.linspace(0.7, 1.3, strikes_per_expiry)))
+            sig = 0.18 + (np.log(K / S)) ** 2
+            F = S * np.exp(r * T)
+            d1 = (np.log(F / K) + 0.5 * sig ** 2 * T) / (sig * np.sqrt(T))
+            d2 = d1 - sig * np.sqrt(T)
+            call = np.exp(-r * T) * (F * norm.cdf(d1) - K * norm.cdf(d2))
+            put = call - np.exp(-r * T) * (F - K)
+            for typ, px in (("C", call), ("P", put)):
+                m = px > 0.01
+                frames.append(pd.DataFrame({
+                    "quote_date": d, "expiration": d + pd.Timedelta(days=n_days),
+                    "strike": K[m], "option_type": typ,
+                    "bid": np.round(px[m] * 0.99, 2), "ask": np.round(px[m] * 1.01 + 0.01, 2),
+                    "underlying_price": S,
+                }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def ssvi_chain(n_expiries=12, strikes_per_expiry=60, spot=400.0, r=0.05, quote_date="2025-06-11",
+               rho=-0.6, eta=1.2, gamma=0.35, atm_vol=0.18, noise_bp=0.0, seed=0) -> pd.DataFrame:
+    """One quote date's chain priced off a known SSVI surface (weekly, then monthly expiries)."""
+    rng = np.random.default_rng(seed)
+    qd = pd.Timestamp(quote_date)
+    days = np.array([7 * (i + 1) if i < 8 else 56 + 28 * (i - 7) for i in range(n_expiries)])
+    frames = []
+    for n_days in days:
+        T = n_days / 365.0
+        F = spot * np.exp(r * T)
+        theta = atm_vol ** 2 * T * (1 + 0.5 * T)
+        phi = eta / (theta ** gamma * (1 + theta) ** (1 - gamma))
+        width = 4 * atm_vol * np.sqrt(T)
+        K = np.unique(np.round(F * np.exp(np.linspace(-1.5 * width, width, strikes_per_expiry)), 1))
+        k = np.log(K / F)
+        w = 0.5 * theta * (1 + rho * phi * k + np.sqrt((phi * k + rho) ** 2 + 1 - rho ** 2))
+        sig = np.sqrt(w / T) + noise_bp * 1e-4 * rng.standard_normal(K.size)
+        d1 = (np.log(F / K) + 0.5 * sig ** 2 * T) / (sig * np.sqrt(T))
+        d2 = d1 - sig * np.sqrt(T)
+        call = np.exp(-r * T) * (F * norm.cdf(d1) - K * norm.cdf(d2))
+        put = call - np.exp(-r * T) * (F - K)
+        for typ, px in (("C", call), ("P", put)):
+            frames.append(pd.DataFrame({
+                "quote_date": qd, "expiration": qd + pd.Timedelta(days=int(n_days)),
+                "strike": K, "option_type": typ, "bid": px, "ask": px, "underlying_price": spot,
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def heston_chain(params, n_expiries=30, strikes_per_expiry=200, spot=400.0, r=0.05,
+                 quote_date="2025-06-11", noise_bp=0.0, seed=0) -> pd.DataFrame:
+    """
+    A full SPY-sized single-day chain priced off Heston `params` (quantfin.heston.HestonParams);
+    weeklies out to 2 months, then monthlies, strikes over +-4 ATM standard deviations.
+    """
+    from quantfin.heston import cos_prices
+    from quantfin.vol_surface import bs_price, implied_vol
+
+    rng = np.random.default_rng(seed)
+    qd = pd.Timestamp(quote_date)
+    days = np.array([7 * (i + 1) if i < 8 else 56 + 28 * (i - 7) for i in range(n_expiries)])
+    frames = []
+    for n_days in days:
+        T = n_days / 365.0
+        F = spot * np.exp(r * T)
+        sd = np.sqrt(params.theta * T)
+        K = np.unique(np.round(F * np.exp(np.linspace(-4 * sd, 2.5 * sd, strikes_per_expiry)), 1))
+        call = cos_prices(K, T, spot, r, params, "c")
+        if noise_bp:
+            iv = implied_vol(call, spot, K, T, r, "c") + noise_bp * 1e-4 * rng.standard_normal(K.size)
+            call = bs_price(spot, K, T, r, iv, "c")
+        put = call - np.exp(-r * T) * (F - K)
+        for typ, px in (("C", call), ("P", put)):
+            frames.append(pd.DataFrame({
+                "quote_date": qd, "expiration": qd + pd.Timedelta(days=int(n_days)),
+                "strike": K, "option_type": typ, "bid": px, "ask": px, "underlying_price": spot,
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def garch_factor_returns(n_assets=500, n_days=1250, n_factors=5, start="2020-01-02", seed=0) -> pd.DataFrame:
+    """
+    Daily log returns (dates x assets) from a factor model whose factor and idiosyncratic
+    shocks each follow their own GARCH(1,1), with Student-t(5) innovations.
+    """
+    rng = np.random.default_rng(seed)
+    load = rng.normal(0.0, 0.3, (n_factors, n_assets))
+    load[0] += 1.0                                        # market factor
+    alpha = rng.uniform(0.04, 0.12, n_factors + n_assets)
+    beta = rng.uniform(0.80, 0.94, n_factors + n_assets) * (0.99 - alpha) / 0.99
+    lr = np.r_[np.full(n_factors, 1.0), rng.uniform(0.5, 2.0, n_assets)] * 1e-4
+    omega = lr * (1 - alpha - beta)
+    h = lr.copy()
+    out = np.empty((n_days, n_assets))
+    t = rng.standard_t(5, (n_days, n_factors + n_assets)) / np.sqrt(5 / 3)
+    for d in range(n_days):
+        e = np.sqrt(h) * t[d]
+        out[d] = e[:n_factors] @ load + e[n_factors:] + 2e-4
+        h = omega + alpha * e * e + beta * h
+    cols = [f"A{i:03d}" for i in range(n_assets)]
+    return pd.DataFrame(out, index=pd.bdate_range(start, periods=n_days), columns=cols)
+
+
+def ticks(n_ticks=10_000, ticks_per_minute=60, start="2025-06-11 09:15", spot=22000.0, vol=0.15,
+          seed=0) -> pd.DataFrame:
+    """
+    Index-like ticks (ts, last, volume): exponential inter-arrival times averaging
+    `ticks_per_minute`, GBM prices at annual `vol` over a 375-minute day.
+    """
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(60.0 / ticks_per_minute, n_ticks)
+    secs = np.cumsum(gaps)
+    dt = np.diff(secs, prepend=0.0) / (375 * 60 * 252)
+    last = spot * np.exp(np.cumsum(vol * np.sqrt(dt) * rng.standard_normal(n_ticks)))
+    return pd.DataFrame({
+        "ts": pd.Timestamp(start) + pd.to_timedelta(secs, unit="s"),
+        "last": np.round(last, 2),
+        "volume": rng.integers(1, 200, n_ticks).astype(np.float64) * 25,
+    })
+
+
+def minute_bars(n_bars=375, start="2025-06-11 09:16", spot=22000.0, vol=0.15, seed=0) -> pd.DataFrame:
+    """1-minute OHLCV bars (ts_close, open, high, low, close, volume) of a GBM path."""
+    rng = np.random.default_rng(seed)
+    step = vol / np.sqrt(375 * 252)
+    close = spot * np.exp(np.cumsum(step * rng.standard_normal(n_bars)))
+    open_ = np.r_[spot, close[:-1]]
+    wick = spot * step * np.abs(rng.standard_normal((2, n_bars)))
+    return pd.DataFrame({
+        "ts_close": pd.date_range(start, periods=n_bars, freq="1min"),
+        "open": open_, "high": np.maximum(open_, close) + wick[0], "low": np.minimum(open_, close) - wick[1],
+        "close": close, "volume": rng.integers(1_000, 50_000, n_bars).astype(np.float64),
+    })
@@ -0,0 +1,283 @@
+# benchmarks/parity.py
+"""
+Deterministic parity checks: each rewritten engine against the loop implementation
+it replaced, on generated data with the awkward cases built in. Each check raises
+AssertionError on a mismatch and returns its max abs differences; main() runs them
+all, prints JSON and exits non-zero if any fails.
+
+    python -m benchmarks.parity
+    python -m benchmarks.parity --only variance_strike varswap options_store
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import interp1d
+
+from benchmarks.common import ROOT  # noqa: F401  (puts the repo root on sys.path)
+from benchmarks.generators import option_chains
+
+TOL = 1e-8
+
+
+# ---------- variance strikes ----------
+
+def _awkward_chain(start="2023-03-01", end="2023-04-28", seed=0) -> pd.DataFrame:
+    """option_chains with rows knocked out, one-sided groups, dead quotes and thin days."""
+    rng = np.random.default_rng(seed)
+    c = option_chains(start, end, n_expiries=6, strikes_per_expiry=30, seed=seed)
+    c = c[rng.random(len(c)) > 0.15]                                   # random missing strikes
+    days = np.sort(c["quote_date"].unique())
+    exp0 = c[c["quote_date"] == days[3]]["expiration"].min()
+    c = c[~((c["quote_date"] == days[3]) & (c["expiration"] == exp0) & (c["option_type"] == "P"))]  # no puts
+    exp1 = c[c["quote_date"] == days[5]]["expiration"].max()
+    c = c[~((c["quote_date"] == days[5]) & (c["expiration"] == exp1) & (c["option_type"] == "C"))]  # no calls
+    c = c[~((c["quote_date"] == days[7]) & (c["expiration"] != c["expiration"].where(
+        c["quote_date"] == days[7]).min()))]                           # a day with one expiry -> no curve
+    c = c[c["quote_date"] != days[9]]                                  # a missing day
+    c = c.copy()
+    dead = rng.random(len(c)) < 0.02
+    c.loc[dead, ["bid", "ask"]] = 0.0                                  # dead quotes, filtered out
+    return c.reset_index(drop=True)
+
+
+def _reference_groups(chain, r):
+    """The notebook path: per quote date, per expiry, calculate_variance_strike."""
+    from quantfin.variance_strike import calculate_variance_strike
+    d = chain.copy()
+    d["time_to_expiry"] = (d["expiration"] - d["quote_date"]).dt.days / 365.25
+    d["mid_price"] = (d["bid"] + d["ask"]) / 2.0
+    d = d[(d["time_to_expiry"] > 0.001) & (d["mid_price"] > 0)]
+    rows = []
+    for (qd, ex), g in d.groupby(["quote_date", "expiration"]):
+        rows.append({"quote_date": qd, "expiration": ex, "days": int(g["time_to_expiry"].iloc[0] * 365.25),
+                     "var_strike_vol": float(calculate_variance_strike(g, r))})
+    return pd.DataFrame(rows)
+
+
+def _reference_curve(groups_one_day):
+    """get_variance_curve_for_date's curve from one day's reference rows (None if < 2 points)."""
+    res = groups_one_day[groups_one_day["var_strike_vol"] > 0]
+    if len(res) < 2:
+        return None
+    res = res.drop_duplicates(subset="days").sort_values("days")
+    if len(res) < 2:
+        return None
+    return interp1d(res["days"], res["var_strike_vol"], kind="linear", fill_value="extrapolate")
+
+
+def check_variance_strike(r=0.05) -> dict:
+    from quantfin.variance_strike import STANDARD_TENORS, build_term_structure
+    chain = _awkward_chain()
+    ref = _reference_groups(chain, r)
+    term = build_term_structure(chain, r)
+
+    got = term.table.merge(ref, on=["quote_date", "expiration"], how="outer", suffixes=("", "_ref"),
+                           indicator=True)
+    assert (got["_merge"] == "both").all(), "batch and reference disagree on the (quote_date, expiry) groups"
+    assert (got["days"] == got["days_ref"]).all(), "days mismatch"
+    vol_diff = float(np.abs(got["var_strike_vol"] - got["var_strike_vol_ref"]).max())
+    assert vol_diff < TOL, f"variance strike vol max abs diff {vol_diff:.3e}"
+
+    ref_curves = {qd: c for qd, g in ref.groupby("quote_date") if (c := _reference_curve(g)) is not None}
+    assert set(term.dates) == set(ref_curves), "quote dates with a usable curve differ"
+    wide = term.at_tenors()
+    x = np.array([1.0, 3.0, 30.0, 45.5, 200.0, 400.0])      # inside and outside the quoted tenors
+    tenor_diff = curve_diff = 0.0
+    for qd, f in ref_curves.items():
+        tenor_diff = max(tenor_diff, float(np.abs(wide.loc[qd].to_numpy() - f(np.array(STANDARD_TENORS))).max()))
+        curve_diff = max(curve_diff, float(np.abs(term.curve(qd)(x) - f(x)).max()))
+    assert tenor_diff < TOL, f"at_tenors max abs diff {tenor_diff:.3e}"
+    assert curve_diff < TOL, f"curve max abs diff {curve_diff:.3e}"
+    return {"groups": int(len(ref)), "curves": len(ref_curves), "vol_max_abs_diff": vol_diff,
+            "at_tenors_max_abs_diff": tenor_diff, "curve_max_abs_diff": curve_diff}
+
+
+# ---------- variance swap backtest ----------
+
+class _ReferenceBacktester:
+    """varianceswapstrat.ipynb's loop backtester, with spy_hist passed in and the roll print dropped."""
+
+    def __init__(self, start_date, end_date, curves, initial_capital, base_notional, spy_hist):
+        self.start_date = pd.to_datetime(start_date)
+        self.end_date = pd.to_datetime(end_date)
+        self.curves = curves
+        self.capital = initial_capital
+        self.base_notional = base_notional
+        self.portfolio = []
+        self.equity_curve = []
+        self.dates = pd.bdate_range(self.start_date, self.end_date)
+        self.latest_var_curve = None
+        self.latest_curve_date = None
+        self.spy_hist = spy_hist
+
+    def get_variance_curve(self, date):
+        if date == self.latest_curve_date:
+            return self.latest_var_curve
+        curve = self.curves.get(date)
+        if curve is not None:
+            self.latest_var_curve = curve
+            self.latest_curve_date = date
+        return self.latest_var_curve
+
+    def mark_to_market(self, today):
+        if not self.portfolio:
+            return
+        total_pnl = 0
+        var_curve_today = self.get_variance_curve(today)
+        if var_curve_today is None:
+            return
+        for swap in self.portfolio:
+            prev_mtm = swap.get("current_mtm", 0)
+            hist_subset = self.spy_hist.loc[swap["inception_date"]:today]
+            if len(hist_subset) < 2:
+                realized_var_total = 0
+            else:
+                log_returns = np.log(hist_subset / hist_subset.shift(1)).dropna()
+                realized_var_total = float((log_returns ** 2).sum())
+            t_elapsed_days = (today - swap["inception_date"]).days
+            T_total_days = swap["tenor_T"]
+            annualized_realized_var = (realized_var_total / t_elapsed_days) * 252 if t_elapsed_days > 0 else 0
+            t_remaining_days = T_total_days - t_elapsed_days
+            if t_remaining_days <= 0:
+                current_var = annualized_realized_var
+            else:
+                implied_var_remaining = (var_curve_today(t_remaining_days) / 100) ** 2
+                current_var = (t_elapsed_days / T_total_days) * annualized_realized_var + \
+                              (t_remaining_days / T_total_days) * implied_var_remaining
+            strike_var = (swap["strike_vol"] / 100) ** 2
+            mtm_value = swap["notional"] * (strike_var - current_var)
+            swap["current_mtm"] = mtm_value
+            total_pnl += mtm_value - prev_mtm
+        self.capital += total_pnl
+
+    def execute_rolls(self, today):
+        self.portfolio = [s for s in self.portfolio if s["expiry_date"] > today]
+        if today.weekday() != 4:
+            return
+        if len(self.portfolio) >= 4:
+            self.portfolio.sort(key=lambda x: x["expiry_date"])
+            self.portfolio.pop(0)
+        var_curve_today = self.get_variance_curve(today)
+        if var_curve_today is None:
+            return
+        new_strike_vol = var_curve_today(30)
+        if new_strike_vol <= 0:
+            return
+        new_notional = self.base_notional * (1 / new_strike_vol)
+        self.portfolio.append({"inception_date": today, "expiry_date": today + pd.Timedelta(days=30), "tenor_T": 30,
+                               "strike_vol": new_strike_vol, "notional": new_notional, "current_mtm": 0})
+
+    def run_backtest(self):
+        for today in self.dates:
+            curve = self.get_variance_curve(today)
+            if curve is None:
+                if self.equity_curve:
+                    self.equity_curve.append({"date": today, "capital": self.equity_curve[-1]["capital"]})
+                continue
+            self.mark_to_market(today)
+            self.execute_rolls(today)
+            self.equity_curve.append({"date": today, "capital": self.capital})
+        if not self.equity_curve:
+            return pd.DataFrame()
+        return pd.DataFrame(self.equity_curve).set_index("date")
+
+
+def _gappy_close(start, end, seed=0) -> pd.Series:
+    """Daily closes with dropped rows (holidays, bad prints) and one NaN."""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(start, end)
+    px = pd.Series(400.0 * np.exp(np.cumsum(0.012 * rng.standard_normal(idx.size))), index=idx, name="Close")
+    px = px[rng.random(idx.size) > 0.08]
+    px.iloc[px.size // 2] = np.nan
+    return px
+
+
+def check_varswap(start="2023-01-02", end="2023-06-30", r=0.05) -> dict:
+    from quantfin.variance_strike import build_term_structure
+    from quantfin.varswap import VarSwapBacktester
+    chain = option_chains(start, end, n_expiries=6, strikes_per_expiry=30, seed=1)
+    days = np.sort(chain["quote_date"].unique())
+    gone = set(days[:3]) | set(days[20:23]) | set(days[40::11])        # late start, a gap week, odd Fridays
+    chain = chain[~chain["quote_date"].isin(gone)].reset_index(drop=True)
+    close = _gappy_close(pd.Timestamp(start) - pd.Timedelta(days=60), end, seed=1)
+
+    ref_curves = {pd.Timestamp(qd): c for qd, g in _reference_groups(chain, r).groupby("quote_date")
+                  if (c := _reference_curve(g)) is not None}
+    ref = _ReferenceBacktester(start, end, ref_curves, 100_000.0, 100_000.0, close).run_backtest()
+    got = VarSwapBacktester(start, end, build_term_structure(chain, r), 100_000.0, 100_000.0,
+                            spy_hist=close, verbose=False).run_backtest()
+
+    assert got.index.equals(ref.index), "equity curve dates differ"
+    diff = float(np.abs(got["capital"].to_numpy() - ref["capital"].to_numpy()).max())
+    assert diff < TOL, f"equity curve max abs diff {diff:.3e}"
+    return {"days": int(len(ref)), "missing_quote_days": len(gone), "missing_prices": int(
+        pd.bdate_range(close.index[0], end).size - close.notna().sum()), "capital_max_abs_diff": diff}
+
+
+# ---------- options store ----------
+
+def check_options_store(start="2023-01-02", end="2023-04-28", r=0.05) -> dict:
+    """CSV -> OptionsStore -> term structure and backtest, against the same CSV read directly."""
+    from quantfin.options_store import OptionsStore
+    from quantfin.variance_strike import build_term_structure, term_structure_from_store
+    from quantfin.varswap import VarSwapBacktester
+    chain = option_chains(start, end, n_expiries=6, strikes_per_expiry=30, seed=2)
+    chain["quote_date"] = chain["quote_date"].dt.strftime("%Y-%m-%d")
+    chain["expiration"] = chain["expiration"].dt.strftime("%Y-%m-%d")
+    tail = chain.groupby("quote_date").cumcount() % 3 == 2
+    shuffled = pd.concat([chain[~tail], chain[tail]])     # every date's rows split across the file
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp) / "chain.csv"
+        shuffled.to_csv(csv, index=False)
+        store = OptionsStore(Path(tmp) / "store")
+        n = store.ingest_csv(csv, "SPY", chunksize=997)
+        store.ingest_csv(csv, "SPY", chunksize=997)        # a rerun replaces, not appends
+        stored = store.load("SPY")
+        from_store = term_structure_from_store(store, "SPY", None, r)
+        from_csv = build_term_structure(pd.read_csv(csv), r)
+    assert n == len(chain) == len(stored), "ingest lost or duplicated rows"
+    keys = ["quote_date", "expiration"]
+    a = from_csv.table.sort_values(keys).reset_index(drop=True)
+    b = from_store.table.sort_values(keys).reset_index(drop=True)
+    assert a[keys].equals(b[keys]) and (a["days"] == b["days"]).all(), "store and CSV disagree on the groups"
+    vol_diff = float(np.abs(a["var_strike_vol"] - b["var_strike_vol"]).max())
+    assert vol_diff == 0.0, f"variance strike vol through the store differs by {vol_diff:.3e}"
+
+    close = _gappy_close(pd.Timestamp(start) - pd.Timedelta(days=60), end, seed=2)
+    eq = [VarSwapBacktester(start, end, ts, 100_000.0, 100_000.0, spy_hist=close, verbose=False).run_backtest()
+          for ts in (from_csv, from_store)]
+    assert eq[0].index.equals(eq[1].index), "equity curve dates differ"
+    cap_diff = float(np.abs(eq[0]["capital"].to_numpy() - eq[1]["capital"].to_numpy()).max())
+    assert cap_diff == 0.0, f"equity curve through the store differs by {cap_diff:.3e}"
+    return {"rows": n, "vol_max_abs_diff": vol_diff, "capital_max_abs_diff": cap_diff}
+
+
+CHECKS = {
+    "variance_strike": check_variance_strike,
+    "varswap": check_varswap,
+    "options_store": check_options_store,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", nargs="+", choices=sorted(CHECKS))
+    args = ap.parse_args()
+    out, failed = {}, False
+    for name in args.only or CHECKS:
+        try:
+            out[name] = {"ok": True, **CHECKS[name]()}
+        except AssertionError as e:
+            out[name] = {"ok": False, "error": str(e)}
+            failed = True
+    print(json.dumps(out, indent=2, default=str))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+# benchmarks/suite.py
+"""
+Hot-path benchmark suite across quantfin and momentum-testing. Cases time the
+code that actually runs: the notebooks import these quantfin functions instead
+of keeping their own copies, and the multi_bars.app_* cases use app.py's bar
+configuration.
+
+Every case builds its inputs from benchmarks.generators at one of three scales,
+runs once as a warmup (numba JIT, polars plan caches), then is timed `repeat`
+times. One run under tracemalloc records peak Python/numpy allocation (polars'
+Rust-side buffers aren't visible to it). Results go to a JSON-lines history, one
+record per suite run tagged with git revision and host. With --fail-over, the suite exits non-zero when a case's median time is
+more than that fraction above its baseline, the median of the last
+--baseline-runs records for the same scale and host.
+
+    python -m benchmarks.suite --scale small
+    python -m benchmarks.suite --scale medium --only greeks lattice --fail-over 0.25
+    python -m benchmarks.suite --list
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import generators as gen
+from benchmarks.common import ROOT
+
+SCALES = ("small", "medium", "large")
+DEFAULT_HISTORY = ROOT / "benchmarks" / "results" / "history.jsonl"
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[..., Tuple[Callable[[], object], int]]   # **params -> (fn, ops per fn call)
+    scales: Dict[str, dict]
+    repeat: int = 5
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name, repeat=5, **scales):
+    def deco(setup):
+        CASES[name] = Case(name, setup, scales, repeat)
+        return setup
+    return deco
+
+
+# ---------- momentum-testing ----------
+
+def _tick_objects(n, tpm=60):
+    from momentum.core_contracts import Tick
+    df = gen.ticks(n, tpm)
+    return [Tick(ts=ts, last=p, volume=v) for ts, p, v in
+            zip(df["ts"].dt.to_pydatetime(), df["last"].to_numpy(), df["volume"].to_numpy())]
+
+
+# app.py's bar path: MultiTimeframeBars with the config's default "1m" spec and 2048 capacity
+@case("multi_bars.app_push_tick", repeat=3, small=dict(n=5_000), medium=dict(n=50_000), large=dict(n=200_000))
+def _app_push_tick(n):
+    from momentum.multi_bars import MultiTimeframeBars
+    ticks = _tick_objects(n)
+
+    def fn():
+        agg = MultiTimeframeBars(("1m",), capacity=2048, window=20)
+        for t in ticks:
+            agg.push_tick(t)
+    return fn, n
+
+
+@case("multi_bars.app_finalize_bar", small=dict(window=20, n=375), medium=dict(window=375, n=375),
+      large=dict(window=2_000, n=375))
+def _app_finalize_bar(window, n):
+    from momentum.multi_bars import MultiTimeframeBars
+    rows = [(r.ts_close.to_pydatetime(), r.open, r.high, r.low, r.close, r.volume)
+            for r in gen.minute_bars(n).itertuples(index=False)]
+
+    def fn():
+        agg = MultiTimeframeBars(("1m",), capacity=2048, window=window)
+        for r in rows:
+            agg.push_bar(*r)
+            if agg.minute_ready():
+                agg.finalize_bar()
+    return fn, n
+
+
+@case("multi_bars.push_tick", small=dict(n=5_000), medium=dict(n=50_000), large=dict(n=200_000))
+def _multi_push_tick(n):
+    from momentum.multi_bars import MultiTimeframeBars
+    ticks = _tick_objects(n)
+
+    def fn():
+        agg = MultiTimeframeBars(("1m", "3m", "5m", "15m", "500t", "25000v"), capacity=1024)
+        for t in ticks:
+            agg.push_tick(t)
+    return fn, n
+
+
+@case("multi_bars.frame", small=dict(bars=20, n=1_000), medium=dict(bars=375, n=1_000),
+      large=dict(bars=2_000, n=1_000))
+def _multi_frame(bars, n):
+    from momentum.multi_bars import MultiTimeframeBars
+    agg = MultiTimeframeBars(("1m", "5m"), capacity=2 * bars)
+    for r in gen.minute_bars(bars).itertuples(index=False):
+        agg.push_bar(r.ts_close.to_pydatetime(), r.open, r.high, r.low, r.close, r.volume)
+
+    def fn():
+        for _ in range(n):
+            agg.frame("1m", bars)
+    return fn, n
+
+
+@case("features.compute",small=dict(bars=20, n=50), medium=dict(bars=375, n=50), large=dict(bars=2_000, n=20))
+def _features(bars, n):
+    import polars as pl
+    from momentum.features_engine import PolarsFeatureEngine
+    window = pl.from_pandas(gen.minute_bars(bars))
+    eng = PolarsFeatureEngine()
+
+    def fn():
+        for _ in range(n):
+            eng.compute(window)
+    return fn, n
+
+
+@case("features.rolling_median_numba", small=dict(n=2_000), medium=dict(n=20_000), large=dict(n=200_000))
+def _rolling_median(n, win=100):
+    from momentum.features_engine import rolling_median_numba
+    x = np.abs(np.random.default_rng(0).standard_normal(n))
+    return (lambda: rolling_median_numba(x, win)), n
+
+
+@case("iv_context.update", small=dict(n=5_000), medium=dict(n=50_000), large=dict(n=200_000))
+def _iv_update(n):
+    from momentum.iv_context import IVcontextNumba
+    ts = pd.date_range("2025-06-11 09:15", periods=n, freq="1s", tz="Asia/Kolkata").to_pydatetime()
+    iv = 12.0 + np.cumsum(0.01 * np.random.default_rng(0).standard_normal(n))
+
+    def fn():
+        ctx = IVcontextNumba(lookback_minutes=60)
+        for i in range(n):
+            ctx.update(iv[i], ts[i], ts[i])
+    return fn, n
+
+
+@case("state_machine.step", small=dict(n=2_000), medium=dict(n=20_000), large=dict(n=100_000))
+def _state_step(n):
+    import yaml
+    from momentum.core_contracts import Bar, Features, IVcontext
+    from momentum.session_clock import SessionClock
+    from momentum.state_machine import SimpleStateMachine
+
+    cfg = yaml.safe_load((ROOT / "momentum-testing" / "config.yaml").read_text())
+    s = cfg["session"]
+    clock = SessionClock(s["tz"], s["open"], s["close"], s["open_embargo_min"], s["close_embargo_min"],
+                         s["expiry_afternoon_strict_after"])
+    rng = np.random.default_rng(0)
+    b = gen.minute_bars(n)
+    b["ts_close"] = b["ts_close"].dt.tz_localize("Asia/Kolkata")
+    c = b["close"].to_numpy()
+    roll = pd.Series(c)
+    bars = [Bar(ts_close=t, open=o, high=h, low=lo, close=cl, volume=v, tr=h - lo, atr20=a, hh20=hh, ll20=ll)
+            for t, o, h, lo, cl, v, a, hh, ll in zip(
+                b["ts_close"].dt.to_pydatetime(), b["open"], b["high"], b["low"], c, b["volume"],
+                (b["high"] - b["low"]).rolling(20, min_periods=1).mean(),
+                roll.shift(1).rolling(20, min_periods=1).max().fillna(c[0]),
+                roll.shift(1).rolling(20, min_periods=1).min().fillna(c[0]))]
+    feats = [Features(donch_width=w, atr_ratio=a, slope=sl, pressure=p)
+             for w, a, sl, p in zip(rng.uniform(0.001, 0.006, n), rng.uniform(0.4, 1.4, n),
+                                    rng.normal(0, 1e-4, n), rng.normal(0, 1e-3, n))]
+    ivs = [IVcontext(12.0, pct, None, "OK") for pct in rng.uniform(0, 100, n)]
+
+    def fn():
+        sm = SimpleStateMachine(cfg, clock)
+        for i in range(n):
+            sm.step(bars[i], feats[i], ivs[i], bars[i].ts_close, 1.0)
+    return fn, n
+
+
+# ---------- quantfin ----------
+
+def _chain_quotes(n, seed=0):
+    """(price, S, K, T, right) for n options of a 30-day chain (mids off an SSVI smile)."""
+    ch = gen.ssvi_chain(n_expiries=5, strikes_per_expiry=max(n // 2, 5), seed=seed)
+    ch = ch[ch["expiration"] == ch["expiration"].unique()[3]].head(n)
+    T = (ch["expiration"] - ch["quote_date"]).dt.days.to_numpy() / 365.0
+    return list(zip(ch["bid"].to_numpy(), ch["underlying_price"].to_numpy(), ch["strike"].to_numpy(), T,
+                    ch["option_type"].to_numpy()))
+
+
+@case("greeks.implied_vol_from_price", small=dict(n=50), medium=dict(n=200), large=dict(n=1_000))
+def _implied_vol(n):
+    from quantfin.greeks import implied_vol_from_price
+    q = _chain_quotes(n)
+    return (lambda: [implied_vol_from_price(p, S, K, 0.05, 0.0, T, r) for p, S, K, T, r in q]), len(q)
+
+
+@case("greeks.bs_greeks", small=dict(n=50), medium=dict(n=200), large=dict(n=1_000))
+def _bs_greeks(n):
+    from quantfin.greeks import bs_greeks
+    q = _chain_quotes(n)
+    return (lambda: [bs_greeks(S, K, 0.05, 0.0, 0.2, T, r) for _, S, K, T, r in q]), len(q)
+
+
+@case("lattice.binomial_tree_slow", repeat=3, small=dict(N=100), medium=dict(N=300), large=dict(N=1_000))
+def _lattice(N):
+    from quantfin.lattice import binomial_tree_slow
+    return (lambda: binomial_tree_slow(100.0, 1.0, 100.0, 0.06, N, 0.2, "P")), 1
+
+
+@case("montecarlo.generate_gmb_mc", small=dict(n_mc=1_000), medium=dict(n_mc=10_000), large=dict(n_mc=50_000))
+def _gbm_mc(n_mc):
+    from quantfin.montecarlo import generate_gmb_mc
+    actual = gen.minute_bars(502).set_index("ts_close").rename(columns={"close": "Close"})
+    return (lambda: generate_gmb_mc(actual, n_mc, 0.0439, 0.1462, seed=0)), 1
+
+
+@case("portfolio.get_portfolio_stats", small=dict(assets=6, n=100), medium=dict(assets=50, n=100),
+      large=dict(assets=500, n=10))
+def _portfolio_stats(assets, n):
+    from quantfin.portfolio import get_portfolio_stats
+    R = gen.garch_factor_returns(assets, 1250)
+    w = np.full(assets, 1.0 / assets)
+
+    def fn():
+        for _ in range(n):
+            get_portfolio_stats(w, R)
+    return fn, n
+
+
+@case("variance_strike.calculate_variance_strike", small=dict(k=60), medium=dict(k=200), large=dict(k=1_000))
+def _variance_strike(k, n=20):
+    from quantfin.variance_strike import calculate_variance_strike
+    ch = gen.ssvi_chain(n_expiries=5, strikes_per_expiry=k)
+    ch = ch[ch["expiration"] == ch["expiration"].unique()[3]].copy()
+    ch["time_to_expiry"] = (ch["expiration"] - ch["quote_date"]).dt.days / 365.25
+    ch["mid_price"] = (ch["bid"] + ch["ask"]) / 2.0
+
+    def fn():
+        for _ in range(n):
+            calculate_variance_strike(ch, 0.05)
+    return fn, n
+
+
+# ---------- runner ----------
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                             timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_case(c: Case, scale: str, memory: bool = True) -> dict:
+    params = c.scales[scale]
+    t0 = time.perf_counter()
+    fn, ops = c.setup(**params)
+    setup_s = time.perf_counter() - t0
+    fn()  # warmup
+    times = []
+    for _ in range(c.repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    rec = {
+        "params": params, "ops": ops, "repeat": c.repeat, "setup_s": setup_s,
+        "min_s": float(np.min(times)), "median_s": float(np.median(times)),
+        "per_op_us": float(np.median(times)) / ops * 1e6,
+    }
+    if memory:
+        tracemalloc.start()
+        fn()
+        rec["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return rec
+
+
+def run(scale: str = "small", only: Optional[List[str]] = None, memory: bool = True, verbose: bool = True) -> dict:
+    picked = [c for n, c in CASES.items() if not only or any(n.startswith(o) for o in only)]
+    results = {}
+    for c in picked:
+        results[c.name] = run_case(c, scale, memory)
+        if verbose:
+            r = results[c.name]
+            print(f"{c.name:45s} {r['median_s'] * 1e3:10.2f} ms  {r['per_op_us']:10.2f} us/op"
+                  + (f"  {r['peak_mem_mb']:8.2f} MB" if memory else ""), file=sys.stderr)
+    return {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"), "git_rev": _git_rev(),
+        "host": platform.node(), "python": platform.python_version(), "scale": scale, "results": results,
+    }
+
+
+def load_history(path) -> List[dict]:
+    p = Path(path)
+    if not p.exists():
+        return []
+    return [json.loads(line) for line in p.read_text().splitlines() if line.strip()]
+
+
+def append_history(path, record: dict) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def regressions(record: dict, history: List[dict], fail_over: float, baseline_runs: int = 5,
+                min_delta_us: float = 50.0) -> List[dict]:
+    """
+    Cases whose median is more than `fail_over` above the median of the same case over
+    the last `baseline_runs` comparable runs (same scale, host and case params).
+    Differences under `min_delta_us` per fn call are treated as noise.
+    """
+    prior = [h for h in history if h["scale"] == record["scale"] and h["host"] == record["host"]][-baseline_runs:]
+    out = []
+    for name, r in record["results"].items():
+        base = [h["results"][name]["median_s"] for h in prior
+                if h["results"].get(name, {}).get("params") == r["params"]]
+        if not base:
+            continue
+        b = float(np.median(base))
+        if r["median_s"] > b * (1 + fail_over) and (r["median_s"] - b) * 1e6 > min_delta_us:
+            out.append({"case": name, "median_s": r["median_s"], "baseline_s": b, "ratio": r["median_s"] / b,
+                        "baseline_runs": len(base)})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=SCALES, default="small")
+    ap.add_argument("--only", nargs="+", default=None, help="case name prefixes")
+    ap.add_argument("--history", default=str(DEFAULT_HISTORY))
+    ap.add_argument("--no-save", action="store_true", help="don't append this run to the history")
+    ap.add_argument("--no-memory", action="store_true")
+    ap.add_argument("--fail-over", type=float, default=None, help="e.g. 0.25 fails on a >25%% slowdown")
+    ap.add_argument("--baseline-runs", type=int, default=5)
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args()
+
+    if args.list:
+        for n, c in CASES.items():
+            print(n, json.dumps(c.scales))
+        return 0
+
+    history = load_history(args.history)
+    record = run(args.scale, args.only, memory=not args.no_memory)
+    bad = regressions(record, history, args.fail_over, args.baseline_runs) if args.fail_over is not None else []
+    record["regressions"] = bad
+    if not args.no_save:
+        append_history(args.history, record)
+    print(json.dumps(record, indent=2))
+    if bad:
+        for b in bad:
+            print(f"REGRESSION {b['case']}: {b['median_s'] * 1e3:.2f} ms vs baseline {b['baseline_s'] * 1e3:.2f} ms "
+                  f"({b['ratio']:.2f}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,17 @@
+import os
+import sys
 import time
-import math
+from pathlib import Path
 import pandas as pd
 import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta  # noqa: F401
 from zoneinfo import ZoneInfo
-from scipy.optimize import brentq
-from scipy.stats import norm
 from kiteconnect import KiteConnect
 
-# -----------------------------
-# Simple Black–Scholes helpers
-# -----------------------------
-def _d1(S, K, r, q, sigma, T):
-    return (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
-
-def _d2(d1, sigma, T):
-    return d1 - sigma * np.sqrt(T)
-
-def bs_price(S, K, r, q, sigma, T, right="C"):
-    if sigma <= 0 or T <= 0 or S <= 0 or K <= 0:
-        return max(0.0, (S - K) if right == "C" else (K - S))
-    d1 = _d1(S, K, r, q, sigma, T)
-    d2 = _d2(d1, sigma, T)
-    if right == "C":
-        return S * math.exp(-q * T) * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
-    else:
-        return K * math.exp(-r * T) * norm.cdf(-d2) - S * math.exp(-q * T) * norm.cdf(-d1)
-
-def implied_vol_from_price(price, S, K, r, q, T, right="C"):
-    # No heroics: clamp to intrinsic first
-    intrinsic = max(0.0, (S - K) if right == "C" else (K - S))
-    if price <= intrinsic + 1e-8:
-        return 0.0
-    # Root find between [1e-6, 5.0] vol
-    def f(s):
-        return bs_price(S, K, r, q, s, T, right) - price
-    try:
-        return brentq(f, 1e-6, 5.0, maxiter=100, xtol=1e-6)
-    except Exception:
-        return np.nan
-
-def bs_greeks(S, K, r, q, sigma, T, right="C"):
-    if sigma <= 0 or T <= 0 or S <= 0 or K <= 0:
-        return np.nan, np.nan, np.nan, np.nan
-    d1 = _d1(S, K, r, q, sigma, T)
-    d2 = _d2(d1, sigma, T)
-    pdf = norm.pdf(d1)
-    if right == "C":
-        delta = math.exp(-q * T) * norm.cdf(d1)
-        theta = (
-            -S * math.exp(-q * T) * pdf * sigma / (2 * math.sqrt(T))
-            - r * K * math.exp(-r * T) * norm.cdf(d2)
-            + q * S * math.exp(-q * T) * norm.cdf(d1)
-        ) / 365.0
-    else:
-        delta = -math.exp(-q * T) * norm.cdf(-d1)
-        theta = (
-            -S * math.exp(-q * T) * pdf * sigma / (2 * math.sqrt(T))
-            + r * K * math.exp(-r * T) * norm.cdf(-d2)
-            - q * S * math.exp(-q * T) * norm.cdf(-d1)
-        ) / 365.0
-    gamma = math.exp(-q * T) * pdf / (S * sigma * math.sqrt(T))
-    vega = S * math.exp(-q * T) * pdf * math.sqrt(T) / 100.0  # per 1% vol
-    return delta, gamma, vega, theta
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for quantfin
+from quantfin.greeks import bs_greeks, implied_vol_from_price
+from quantfin.vol_surface import SurfaceCalibrator
 
 # -----------------------------
 # Streamlit UI
@@ -88,7 +36,8 @@ if not api_key or not access_token:
     st.info("Enter API key and Access Token to start.")
     st.stop()
 
-kite = KiteConnect(api_key=api_key)
+# KITE_REST_ROOT points the app at a local simulator (momentum-testing/momentum/kite_sim.py)
+kite = KiteConnect(api_key=api_key, root=os.environ.get("KITE_REST_ROOT") or None)
 kite.set_access_token(access_token)
 
 # -----------------------------
@@ -167,6 +116,9 @@ r = risk_free_pct / 100.0
 qdiv = div_yield_pct / 100.0
 T_years = time_to_expiry_yrs(pd.Timestamp(expiry))
 
+# smile fit, warm-started from the previous refresh so each refit is a few ms
+calibrator = SurfaceCalibrator(r, qdiv)
+
 # polite warning
 st.caption("Tip: this uses REST quotes on a timer. Keep strike range sane to avoid rate limits.")
 
@@ -182,6 +134,7 @@ for i in range(cycles):
         continue
 
     rows = []
+    quotes_for_fit = []
     for inst_token, row in symbol_map.items():
         tsym = row["tradingsymbol"]
         key = f"NFO:{tsym}"
@@ -211,6 +164,8 @@ for i in range(cycles):
 
         iv = implied_vol_from_price(price, spot, K, r, qdiv, T_years, right)
         dlt, gmm, vga, tht = bs_greeks(spot, K, r, qdiv, iv if iv == iv else 0.0, T_years, right)
+        quotes_for_fit.append({"strike": K, "option_type": right, "mid_price": price, "iv": iv,
+                               "underlying_price": spot, "time_to_expiry": T_years, "expiration": expiry})
 
         rows.append({
             "Strike": int(K),
@@ -226,9 +181,14 @@ for i in range(cycles):
 
     df = pd.DataFrame(rows)
     if not df.empty:
+        try:
+            surface = calibrator.fit(pd.DataFrame(quotes_for_fit), iv_col="iv")
+            df["Fit IV (%)"] = np.round(surface.iv(df["Strike"].to_numpy(float), T_years) * 100, 2)
+        except ValueError:
+            df["Fit IV (%)"] = np.nan   # nothing usable to fit yet
         # pretty grid: CE left, PE right
         pivot = df.pivot_table(index="Strike", columns="Type",
-                               values=["LTP", "Mid", "IV (%)", "Delta", "Gamma", "Vega", "Theta (per day)"])
+                               values=["LTP", "Mid", "IV (%)", "Fit IV (%)", "Delta", "Gamma", "Vega", "Theta (per day)"])
         pivot = pivot.sort_index().fillna("")
         with grid_placeholder.container():
             st.subheader(f"{underlying.upper()}  |  Spot: ₹{spot:.2f}  |  Expiry: {pd.Timestamp(expiry).strftime('%d %b %Y')}")
@@ -1,16 +1,24 @@
 # app.py
 import argparse
+import asyncio
+import os
+import sys
 import yaml
 from datetime import datetime
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # repo root, for quantfin (used by momentum.garch_filter)
 from momentum.session_clock import SessionClock
-from momentum.bar_aggregator import PolarsBarAggregator
+from momentum.multi_bars import MultiTimeframeBars
 from momentum.features_engine import PolarsFeatureEngine
 from momentum.iv_context import IVcontextNumba     # your custom name is fine
+from momentum.variance_index import LiveVarianceIndex
+from momentum.garch_filter import OnlineGarchFilter
 from momentum.state_machine import SimpleStateMachine
 from momentum.ui_panel import render
 from momentum.persistence import append_bar_csv, append_state_csv
-from momentum.feed_broker_kite import KiteFeed
+from momentum.feed_broker_kite import KiteFeed, KiteOptionQuotes
+from momentum.pipeline_async import AsyncMomentumPipeline, MinuteWork
 
 
 # ---------------- config helpers ----------------
@@ -42,6 +50,11 @@ def main():
     ap.add_argument("--kite-api-key", required=True)
     ap.add_argument("--kite-access-token", required=True)
     ap.add_argument("--persist", action="store_true")
+    ap.add_argument("--kite-rest-root", default=os.environ.get("KITE_REST_ROOT"),
+                    help="REST base URL override, e.g. a local momentum.kite_sim")
+    ap.add_argument("--kite-ws-root", default=os.environ.get("KITE_WS_ROOT"), help="websocket URL override")
+    ap.add_argument("--async", dest="use_async", action="store_true",
+                    help="staged asyncio pipeline (timer-driven minute close, off-loop features)")
     args = ap.parse_args()
 
     cfg = load_cfg(args.config)
@@ -49,7 +62,12 @@ def main():
 
     # ---------- plumbing you actually need ----------
     fcfg = cfg.get("features", {})
-    bars = PolarsBarAggregator(window_minutes=fcfg.get("donch_window", 20))  # rolling window len
+    bcfg = cfg.get("bars", {})
+    bars = MultiTimeframeBars(                 # 1m drives the panel; other specs ride along
+        bcfg.get("specs", ["1m"]),
+        capacity=bcfg.get("capacity", 2048),
+        window=fcfg.get("donch_window", 20),   # rolling window len
+    )
     feats = PolarsFeatureEngine(
         donch_window=fcfg.get("donch_window", 20),
         atr_median_len=fcfg.get("atr_median_len", 100),
@@ -57,6 +75,13 @@ def main():
         pressure_len=fcfg.get("pressure_len", 15),
     )
     ivctx = IVcontextNumba(lookback_minutes=cfg.get("iv", {}).get("lookback_minutes", 60))
+    gcfg = cfg.get("garch", {})
+    garch = OnlineGarchFilter(
+        horizon=gcfg.get("horizon_bars", 15),
+        refit_every=gcfg.get("refit_every_bars", 60),
+        fit_window=gcfg.get("fit_window_bars", 1500),
+        min_fit_bars=gcfg.get("min_fit_bars", 120),
+    )
     sm = SimpleStateMachine(cfg, clock)
 
     # broker feed
@@ -64,14 +89,69 @@ def main():
         api_key=args.kite_api_key,
         access_token=args.kite_access_token,
         instrument_kind=args.instrument_kind,
+        rest_root=args.kite_rest_root,
+        ws_root=args.kite_ws_root,
     )
     feed.connect(symbol=args.symbol)
 
+    # live 30-day variance index -> IVcontext (percentile gate); off = IV gate stays NA
+    icfg = cfg.get("iv", {})
+    vix = None
+    if icfg.get("live_index", False):
+        quotes = KiteOptionQuotes(
+            feed.kite, args.kite_api_key, args.kite_access_token, symbol=args.symbol,
+            n_expiries=icfg.get("n_expiries", 3),
+            strikes_each_side=icfg.get("strikes_each_side", 30),
+            ws_root=args.kite_ws_root,
+        )
+        try:
+            quotes.connect()
+        except Exception as e:
+            # no F&O data on the account / index-only feed: run without the IV gate
+            print(f"[iv] live variance index disabled: {e}")
+            quotes.close()
+        else:
+            vix = LiveVarianceIndex(
+                quotes,
+                r=icfg.get("risk_free_rate", 0.065),
+                tenor_days=icfg.get("tenor_days", 30),
+                interval_s=icfg.get("update_interval_s", 1.0),
+                ivctx=ivctx,
+                stale_after_s=icfg.get("stale_after_s", 30),
+            ).start()
+
     # file outputs
     day = datetime.now().strftime("%Y-%m-%d")
     bars_path = f"runs/{day}/bars.csv"
     state_path = f"runs/{day}/state.csv"
 
+    def persist(r):
+        append_bar_csv(bars_path, r.bar)
+        append_state_csv(state_path, r.now, r.bar, r.feats, r.iv, r.snap,
+                         r.hb_age_s, r.cdn_up_left, r.cdn_dn_left)
+
+    iv_fn = vix.context if vix is not None else ivctx.empty
+    work = MinuteWork(feats, garch, sm, iv_fn)
+
+    # ---------- event-driven mode ----------
+    rcfg = cfg.get("runtime", {})
+    if args.use_async or rcfg.get("mode") == "async":
+        pipe = AsyncMomentumPipeline(
+            work,
+            window_minutes=fcfg.get("donch_window", 20),
+            bars=bars,
+            heartbeat_age=feed.last_heartbeat_age_s,
+            render_fn=render,
+            persist_fn=persist if args.persist else None,
+            close_grace_s=rcfg.get("close_grace_ms", 250) / 1000.0,
+            tick_buffer=rcfg.get("tick_buffer", 100_000),
+        )
+        try:
+            asyncio.run(pipe.run(ticks=feed.subscribe(args.symbol)))
+        except KeyboardInterrupt:
+            pass
+        return
+
     # ---------- main loop ----------
     for tick in feed.subscribe(args.symbol):
 
@@ -81,61 +161,20 @@ def main():
         if not bars.minute_ready():
             continue
 
-        bar, window = bars.finalize_bar()
-
-        # compute features; pull last row (Polars-safe)
-        feat_df = feats.compute(window)
-        # ---- readiness guard for features ----
-        required = ["donch_width", "atr_ratio", "slope", "pressure"]
-
-        if feat_df.height == 0:
-                # no features computed yet; keep accumulating
-                continue
-
-        last_row = feat_df.tail(1)
-            # Check for nulls in the required columns
-        null_mask = last_row.select(
-                [pl.col(c).is_null().alias(c) for c in required]
-            ).to_dicts()[0]
-
-        if any(null_mask.values()):
-                # Optional: lightweight diagnostic every N bars
-            missing = [k for k, v in null_mask.items() if v]
-                # print(f"[warmup] waiting for features: {missing}; bars_in_window={len(window)}")
+        out = bars.finalize_bar()
+        if out is None:
             continue
+        bar, window = out
 
-        last = last_row.to_dicts()[0]
-
-        f = type("F", (), dict(
-                donch_width=float(last["donch_width"]),
-                atr_ratio=float(last["atr_ratio"]),
-                slope=float(last["slope"]),
-                pressure=float(last["pressure"]),
-            ))()
-
-
-        # IV: NA for now (your IVcontext can replace this later)
-        iv = ivctx.empty()
-
-        now = bar.ts_close
-        snap = sm.step(
-            bar=bar,
-            f=f,
-            iv=iv,
-            now=now,
-            heartbeat_age_s=hb_age_s,
-            is_expiry_day=False,
-        )
-        cdn_up_left, cdn_dn_left = sm._cooldown_left(now)
+        # GARCH, features (None while warming up), state machine
+        r = work(bar, window, hb_age_s)
+        if r is None:
+            continue
 
-        render(now, bar, f, iv, snap, hb_age_s, cdn_up_left, cdn_dn_left)
+        render(r.now, r.bar, r.feats, r.iv, r.snap, r.hb_age_s, r.cdn_up_left, r.cdn_dn_left)
 
         if args.persist:
-            append_bar_csv(bars_path, bar)
-            append_state_csv(
-                state_path, now, bar, f, iv, snap,
-                hb_age_s, cdn_up_left, cdn_dn_left
-            )
+            persist(r)
 
 
 if __name__ == "__main__":
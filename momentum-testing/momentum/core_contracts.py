@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Iterator, Optional, Protocol, Tuple
+from typing import Any, Iterator, List, Optional, Protocol, Tuple
 
 # --------- Data containers (real objects, not just annotations) ---------
 
@@ -34,14 +34,30 @@ class Features:
     atr_ratio: float     # atr20 / median(atr20)
     slope: float         # EMA of 1-min returns
     pressure: float      # short-term directional push
+    garch_var: float = float("nan")   # GARCH(1,1) next-bar conditional variance
+    garch_fvar: float = float("nan")  # GARCH variance summed over the next h bars
 
 @dataclass
 class IVcontext:
-    atm_iv: Optional[float]
+    atm_iv: Optional[float]        # ATM IV, or the live variance index vol (percent)
     percentile: Optional[float]
     updated_ts: Optional[datetime]
     quality: str  # "OK" | "STALE" | "NA"
 
+@dataclass(frozen=True)
+class OptionInstrument:
+    token: int
+    expiry: datetime     # tz-aware expiry time (15:30 IST for NIFTY)
+    strike: float
+    is_call: bool
+
+@dataclass
+class OptionQuote:
+    token: int
+    bid: float
+    ask: float
+    ts: datetime
+
 @dataclass
 class StateSnapshot:
     state: str                 # "NEUTRAL" | "COILING" | "ARMED_UP" | ...
@@ -59,6 +75,10 @@ class MarketDataSource(Protocol):
 class OptionChainSource(Protocol):
     def fetch(self, symbol: str) -> dict: ...  # ATM ± strikes, IV, ts, etc.
 
+class OptionQuoteSource(Protocol):
+    def instruments(self) -> List[OptionInstrument]: ...
+    def poll(self) -> List[OptionQuote]: ...  # quotes received since the last poll, never blocks
+
 class BarAggregator(Protocol):
     def push_tick(self, t: Tick) -> None: ...
     def minute_ready(self) -> bool: ...
@@ -3,7 +3,7 @@ import polars as pl
 import numpy as np
 from numba import njit
 
-@njit
+@njit(cache=True, nogil=True)
 def rolling_median_numba(x, win):
     out = np.empty(x.size)
     out[:] = np.nan
@@ -1,9 +1,13 @@
 # momentum/feed_broker_kite.py
 import time
-from datetime import datetime, timezone
+from collections import deque
+from datetime import datetime, time as dtime, timezone
 from typing import Iterator, List, Optional
+from zoneinfo import ZoneInfo
 
-from .core_contracts import Tick
+import numpy as np
+
+from .core_contracts import OptionInstrument, OptionQuote, Tick
 
 class KiteFeed:
     """
@@ -11,21 +15,26 @@ class KiteFeed:
     You pass api_key and access_token (copied daily from Kite console flow).
     It resolves an instrument token for NIFTY index or nearest FUT, opens a websocket,
     and yields Tick(ts, last) for your app loop.
+    rest_root / ws_root point it somewhere other than api.kite.trade / ws.kite.trade
+    (e.g. momentum.kite_sim for load tests).
     """
 
-    def __init__(self, api_key: str, access_token: str, *args, symbol=None, instrument_kind: str = "index", **kwargs):
+    def __init__(self, api_key: str, access_token: str, *args, symbol=None, instrument_kind: str = "index",
+                 rest_root: Optional[str] = None, ws_root: Optional[str] = None, **kwargs):
         # preserve existing parameters and add compatibility for `symbol` and `instrument_kind`
         self.api_key = api_key.strip()
         self.access_token = access_token.strip()
         self.symbol = symbol or kwargs.get("symbol")
         self.instrument_kind = instrument_kind or kwargs.get("instrument_kind")
+        self.rest_root = rest_root
+        self.ws_root = ws_root
 
         # REST client for instrument lookup
         from kiteconnect import KiteTicker, KiteConnect  # lazy import to keep deps optional
         self.KiteTicker = KiteTicker
         self.KiteConnect = KiteConnect
 
-        self.kite = self.KiteConnect(api_key=self.api_key)
+        self.kite = self.KiteConnect(api_key=self.api_key, root=self.rest_root)
         self.kite.set_access_token(self.access_token)
 
         self._ticker = None
@@ -39,7 +48,7 @@ class KiteFeed:
         token = self._resolve_token(symbol, self.instrument_kind)
         self._tokens = [token]
 
-        self._ticker = self.KiteTicker(self.api_key, self.access_token)
+        self._ticker = self.KiteTicker(self.api_key, self.access_token, root=self.ws_root)
 
         def on_ticks(ws, ticks):
             now = datetime.now(timezone.utc)
@@ -98,8 +107,9 @@ class KiteFeed:
         """
         if kind == "index":
             # Try to find the index in NSE instruments
+            # the dump lists indices with segment INDICES (instrument_type EQ)
             for ins in self.kite.instruments("NSE"):
-                if (ins.get("instrument_type") == "INDEX"
+                if ((ins.get("instrument_type") == "INDEX" or ins.get("segment") == "INDICES")
                     and ins.get("tradingsymbol", "").startswith("NIFTY")):
                     return ins["instrument_token"]
             # Fallback to futures if index not available for your account
@@ -116,3 +126,113 @@ class KiteFeed:
         # pick nearest expiry
         futs.sort(key=lambda x: x["expiry"])
         return futs[0]["instrument_token"]
+
+
+class KiteOptionQuotes:
+    """
+    NIFTY option quote stream for LiveVarianceIndex (an OptionQuoteSource).
+    Picks the first `n_expiries` NFO expiries and `strikes_each_side` strikes around
+    the spot at start-up, subscribes them in FULL mode (that's the one with depth),
+    and hands out top-of-book bid/ask. The websocket thread appends to a deque and
+    poll() pops from the other end, so neither side takes a lock.
+    """
+
+    IST_CLOSE = dtime(15, 30)
+
+    def __init__(self, kite, api_key: str, access_token: str, symbol: str = "NIFTY",
+                 spot_symbol: str = "NSE:NIFTY 50", n_expiries: int = 3, strikes_each_side: int = 30,
+                 ws_root: Optional[str] = None):
+        from kiteconnect import KiteTicker  # lazy import to keep deps optional
+        self.KiteTicker = KiteTicker
+        self.kite = kite
+        self.api_key = api_key.strip()
+        self.access_token = access_token.strip()
+        self.symbol = symbol
+        self.spot_symbol = spot_symbol
+        self.n_expiries = n_expiries
+        self.strikes_each_side = strikes_each_side
+        self.ws_root = ws_root
+        self._instruments: List[OptionInstrument] = []
+        self._buf: deque = deque()
+        self._ticker = None
+        self._connected = False
+
+    def instruments(self) -> List[OptionInstrument]:
+        if not self._instruments:
+            self._instruments = self._resolve()
+        return list(self._instruments)
+
+    def _resolve(self) -> List[OptionInstrument]:
+        spot = float(self.kite.ltp([self.spot_symbol])[self.spot_symbol]["last_price"])
+        opts = [ins for ins in self.kite.instruments("NFO")
+                if ins.get("name") == self.symbol and ins.get("instrument_type") in ("CE", "PE")]
+        if not opts:
+            raise RuntimeError(f"no {self.symbol} options in NFO instruments")
+        ist = ZoneInfo("Asia/Kolkata")
+        today = datetime.now(ist).date()
+        expiries = sorted({ins["expiry"] for ins in opts if ins["expiry"] >= today})[: self.n_expiries]
+        out = []
+        for exp in expiries:
+            chain = [ins for ins in opts if ins["expiry"] == exp]
+            strikes = np.unique([float(ins["strike"]) for ins in chain])
+            c = int(np.searchsorted(strikes, spot))
+            keep = set(strikes[max(c - self.strikes_each_side, 0): c + self.strikes_each_side].tolist())
+            exp_ts = datetime.combine(exp, self.IST_CLOSE, tzinfo=ist)
+            out += [OptionInstrument(token=int(ins["instrument_token"]), expiry=exp_ts, strike=float(ins["strike"]),
+                                     is_call=ins["instrument_type"] == "CE")
+                    for ins in chain if float(ins["strike"]) in keep]
+        return out
+
+    def connect(self) -> None:
+        tokens = [i.token for i in self.instruments()]
+        self._ticker = self.KiteTicker(self.api_key, self.access_token, root=self.ws_root)
+
+        def on_ticks(ws, ticks):
+            now = datetime.now(timezone.utc)
+            buf = []
+            for t in ticks or []:
+                depth = t.get("depth") or {}
+                buy, sell = depth.get("buy") or [{}], depth.get("sell") or [{}]
+                buf.append(OptionQuote(token=t["instrument_token"], bid=float(buy[0].get("price") or 0.0),
+                                       ask=float(sell[0].get("price") or 0.0), ts=now))
+            self._buf.extend(buf)
+
+        def on_connect(ws, response):
+            self._connected = True
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_FULL, tokens)
+
+        def on_close(ws, code, reason):
+            self._connected = False
+
+        self._ticker.on_ticks = on_ticks
+        self._ticker.on_connect = on_connect
+        self._ticker.on_error = on_close
+        self._ticker.on_close = on_close
+        self._ticker.connect(threaded=True, disable_ssl_verification=False)
+        for _ in range(50):
+            if self._connected:
+                return
+            time.sleep(0.1)
+        self.close()
+        raise RuntimeError("option KiteTicker failed to connect")
+
+    def close(self) -> None:
+        """Stop the option ticker (and its reconnect loop)."""
+        tk, self._ticker = self._ticker, None
+        if tk is None:
+            return
+        stop_retry = getattr(tk, "stop_retry", None)
+        if stop_retry is not None:
+            stop_retry()
+        try:
+            tk.close()
+        except Exception:
+            pass
+        self._connected = False
+
+    def poll(self) -> List[OptionQuote]:
+        buf, pop = [], self._buf.popleft
+        for _ in range(len(self._buf)):
+            buf.append(pop())
+        return buf
@@ -0,0 +1,156 @@
+# garch_filter.py
+import math
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from quantfin.garch import GarchParams, fit_garch11, garch11_filter  # noqa: F401  (quantfin on sys.path: see app.py)
+
+# Same model as the GARCHVolatility notebook: constant mean + GARCH(1,1) on log returns.
+# The model, filter and MLE fit live in quantfin.garch (fitting runs on returns scaled
+# to unit variance, since 1-min returns are ~1e-4; params come back in raw units).
+
+
+@dataclass(frozen=True)
+class _FitResult:
+    params: GarchParams
+    var_next: float   # filtered next-bar variance at the end of the fitted snapshot
+    n_end: int        # bar count the snapshot ended at
+
+
+class OnlineGarchFilter:
+    """
+    Per-bar GARCH(1,1) variance recursion for the live 1-min loop.
+
+    update() is O(1): one log return, one recursion step, one ring write.
+    Refits run on a daemon thread every `refit_every` bars over the last `fit_window`
+    returns (warm-started from the current params). The thread publishes a single
+    immutable _FitResult; the bar loop picks it up on its next update() with one
+    reference read, replays the few bars that arrived meanwhile, and carries on.
+    Nothing in update() ever waits on the optimizer.
+    """
+
+    def __init__(self, horizon=15, refit_every=60, fit_window=1500, min_fit_bars=120,
+                 params: Optional[GarchParams] = None, background: bool = True):
+        self.horizon = int(horizon)
+        self.refit_every = int(refit_every)
+        self.fit_window = int(fit_window)
+        self.min_fit_bars = int(min_fit_bars)
+        self.background = background
+
+        self._rets = np.full(self.fit_window, np.nan)
+        self._n = 0                      # returns seen so far
+        self._last_close: Optional[float] = None
+
+        self.params: Optional[GarchParams] = params
+        self._var: float = params.long_run_var if params is not None else math.nan
+
+        self._pending: Optional[_FitResult] = None
+        self._fit_thread: Optional[threading.Thread] = None
+        self.fits_done = 0
+        self.last_fit_error: Optional[str] = None
+
+    # ---------- hot path ----------
+    def update(self, close: float) -> dict:
+        """Feed one finalized bar close; returns the current feature dict."""
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self._adopt(pending)
+
+        close = float(close)
+        last = self._last_close
+        self._last_close = close
+        if last is None or last <= 0.0 or close <= 0.0:
+            return self.features()
+
+        r = math.log(close / last)
+        self._rets[self._n % self.fit_window] = r
+        self._n += 1
+
+        p = self.params
+        if p is not None:
+            e = r - p.mu
+            self._var = p.omega + p.alpha * e * e + p.beta * self._var
+
+        if self._n >= self.min_fit_bars and (p is None or self._n % self.refit_every == 0):
+            self._maybe_refit()
+        return self.features()
+
+    def features(self) -> dict:
+        """garch_var: next-bar variance; garch_fvar: summed variance over the next `horizon` bars."""
+        if self.params is None or not math.isfinite(self._var):
+            return {"garch_var": math.nan, "garch_fvar": math.nan}
+        return {"garch_var": self._var, "garch_fvar": self.forecast_sum(self.horizon)}
+
+    def forecast(self, h: int) -> np.ndarray:
+        """Per-bar variance forecasts for steps 1..h."""
+        p = self.params
+        if p is None:
+            return np.full(h, np.nan)
+        vl = p.long_run_var
+        return vl + p.persistence ** np.arange(h) * (self._var - vl)
+
+    def forecast_sum(self, h: int) -> float:
+        """Closed form of forecast(h).sum()."""
+        p = self.params
+        phi = p.persistence
+        vl = p.long_run_var
+        if abs(1.0 - phi) < 1e-12:
+            return h * self._var
+        return h * vl + (self._var - vl) * (1.0 - phi ** h) / (1.0 - phi)
+
+    # ---------- refits ----------
+    def _snapshot(self) -> np.ndarray:
+        n, w = self._n, self.fit_window
+        if n <= w:
+            return self._rets[:n].copy()
+        i = n % w
+        return np.concatenate((self._rets[i:], self._rets[:i]))
+
+    def _maybe_refit(self) -> None:
+        t = self._fit_thread
+        if t is not None and t.is_alive():
+            return  # previous fit still running; try again next schedule
+        snap, n_end, x0 = self._snapshot(), self._n, self.params
+        if not self.background:
+            self._adopt(self._fit(snap, n_end, x0))
+            return
+        self._fit_thread = threading.Thread(target=self._fit_bg, args=(snap, n_end, x0),
+                                            name="garch-refit", daemon=True)
+        self._fit_thread.start()
+
+    def _fit_bg(self, snap, n_end, x0) -> None:
+        res = self._fit(snap, n_end, x0)
+        if res is not None:
+            self._pending = res   # single reference store: the atomic swap
+
+    def _fit(self, snap, n_end, x0) -> Optional[_FitResult]:
+        try:
+            p = fit_garch11(snap, x0)
+        except Exception as e:  # keep running on the old params
+            self.last_fit_error = repr(e)
+            return None
+        path = garch11_filter(snap, p.mu, p.omega, p.alpha, p.beta, float(np.var(snap)))
+        return _FitResult(params=p, var_next=float(path[-1]), n_end=n_end)
+
+    def _adopt(self, res: Optional[_FitResult]) -> None:
+        if res is None:
+            return
+        p = res.params
+        v = res.var_next
+        # replay returns that arrived while the fit was running (usually 0-2 bars)
+        for k in range(res.n_end, self._n):
+            e = self._rets[k % self.fit_window] - p.mu
+            v = p.omega + p.alpha * e * e + p.beta * v
+        self.params = p
+        self._var = v
+        self.fits_done += 1
+
+    def wait_for_refit(self, timeout: Optional[float] = None) -> None:
+        """Block until an in-flight refit finishes (for tests/benchmarks, never the bar loop)."""
+        t = self._fit_thread
+        if t is not None:
+            t.join(timeout)
@@ -19,19 +19,34 @@ def percentile_rank(x, value):
     return 100.0 * n / m
 
 class IVcontextNumba:
-    def __init__(self, lookback_minutes=60, stale_after_s=180):
-        self.ivs = np.full(600, np.nan)  # enough for 60 min if sampled every ~6s
-        self.ts = np.full(600, None)
+    """
+    Rolling IV history for the percentile gate. Samples are kept at most every
+    `sample_every_s` seconds, so a 1 Hz publisher (LiveVarianceIndex) still covers
+    `lookback_minutes` of history.
+    """
+
+    def __init__(self, lookback_minutes=60, stale_after_s=180, sample_every_s=6.0):
+        n = max(int(lookback_minutes * 60 / sample_every_s), 1)
+        self.ivs = np.full(n, np.nan)
+        self.ts = np.full(n, None)
         self.idx = 0
         self.lb = lookback_minutes
         self.stale_after = stale_after_s
+        self.sample_every = sample_every_s
+        self._last_sample = None
 
-    def update(self, atm_iv: float, ts: datetime) -> IVcontext:
-        self.ivs[self.idx % self.ivs.size] = float(atm_iv)
-        self.ts[self.idx % self.ts.size] = ts
-        self.idx += 1
-        latest = self.ivs[~np.isnan(self.ivs)]
-        pct = percentile_rank(latest, latest[-1]) if latest.size else np.nan
-        age = (datetime.now(ts.tzinfo) - ts).total_seconds()
+    def update(self, atm_iv: float, ts: datetime, now: datetime = None) -> IVcontext:
+        if self._last_sample is None or (ts - self._last_sample).total_seconds() >= self.sample_every:
+            self.ivs[self.idx % self.ivs.size] = float(atm_iv)
+            self.ts[self.idx % self.ts.size] = ts
+            self.idx += 1
+            self._last_sample = ts
+        pct = percentile_rank(self.ivs, float(atm_iv)) if self.idx else np.nan
+        now = now or datetime.now(ts.tzinfo)
+        age = (now - ts).total_seconds()
         qual = "OK" if age <= self.stale_after else "STALE"
         return IVcontext(atm_iv=atm_iv, percentile=pct, updated_ts=ts, quality=qual)
+
+    def empty(self) -> IVcontext:
+        """No IV source: the state machine's IV gate lets everything through."""
+        return IVcontext(atm_iv=None, percentile=None, updated_ts=None, quality="NA")
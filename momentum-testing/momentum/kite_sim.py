@@ -0,0 +1,818 @@
+# momentum/kite_sim.py
+"""
+Local stand-in for Zerodha Kite, for load-testing KiteFeed, KiteOptionQuotes and
+greeks/app.py without the live service. One asyncio port serves both sides:
+
+* the KiteTicker websocket: JSON subscribe / unsubscribe / mode messages in, binary
+  tick messages out in Kite's packet layout (ltp 8 bytes, index quote/full 28/32,
+  quote 44, full 184 with five-level depth), 1-byte heartbeats when idle;
+* REST: /instruments[/EXCHANGE] (CSV dump), /quote, /quote/ltp, /quote/ohlc in
+  Kite's JSON envelope, plus /_sim/stats for the load driver.
+
+So KiteConnect(api_key, root="http://127.0.0.1:8765") and
+KiteTicker(api_key, token, root="ws://127.0.0.1:8765") work unchanged (KiteFeed and
+KiteOptionQuotes take rest_root / ws_root for this).
+
+The universe is a NIFTY-like index, a future and weekly option chains. The index
+follows a GBM (or replays a CSV of prices), and options are Black-Scholes on the
+same smile as option_feed_sim. Each connection gets `rate` ticks per second spread
+round-robin over its subscriptions, sent as one message per `batch_ms`. Knobs for
+load testing:
+* bursts: `burst_mult` x the rate for `burst_s` every `burst_every_s` (expiry-day storms);
+* disconnects: the socket is dropped every `disconnect_every_s`;
+* latency: every message is delayed by `latency_ms` plus exponential jitter, in order;
+* slow consumers: messages are dropped (and counted) while the socket's send
+  buffer is over `max_buffer_bytes`. The real service would eventually cut the
+  connection; the drop count is what a load test wants to see.
+
+`time_warp` runs the exchange clock faster than the wall clock, so a 10 s test can
+produce minute bars.
+
+SimTicker is a small stdlib websocket client with KiteTicker's callback interface,
+for drivers that run without kiteconnect installed.
+
+    python -m momentum.kite_sim --port 8765 --rate 5000 --burst-every 30 --burst-mult 10
+    KITE_REST_ROOT=http://127.0.0.1:8765 streamlit run greeks/app.py
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from scipy.special import ndtr
+
+IST = ZoneInfo("Asia/Kolkata")
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+TICK = 0.05
+YEAR_S = 365.0 * 86400.0
+
+# Kite exchange segments (low byte of the instrument token)
+SEG_NSE, SEG_NFO, SEG_INDICES = 1, 2, 9
+MODE_LTP, MODE_QUOTE, MODE_FULL = 0, 1, 2
+MODES = {"ltp": MODE_LTP, "quote": MODE_QUOTE, "full": MODE_FULL}
+NIFTY_TOKEN = 256265                  # (1001 << 8) | SEG_INDICES, same as the real one
+
+
+@dataclass
+class SimConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765                      # 0 = any free port
+    # universe
+    spot: float = 24500.0
+    n_expiries: int = 4
+    strike_step: float = 50.0
+    strikes_each_side: int = 25
+    n_instruments: Optional[int] = None   # overrides strikes_each_side (options only)
+    start: str = "2025-06-11T09:15:00+05:30"
+    r: float = 0.065
+    atm_vol: float = 0.13
+    skew: float = -0.1
+    smile: float = 0.03
+    # ticks
+    mode: str = "gbm"                     # "gbm" | "replay"
+    replay_path: Optional[str] = None     # CSV with a `last` (or `close`) column, looped
+    time_warp: float = 1.0                # exchange seconds per wall second
+    rate: float = 1000.0                  # ticks per second per connection
+    batch_ms: float = 10.0
+    burst_every_s: float = 0.0
+    burst_s: float = 2.0
+    burst_mult: float = 10.0
+    disconnect_every_s: float = 0.0
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    max_buffer_bytes: int = 8 << 20
+    seed: int = 0
+
+
+# ---------- market ----------
+
+def _weekly_code(d: date) -> str:
+    """Kite weekly option code: YY + month (1-9, O, N, D) + DD."""
+    m = "123456789OND"[d.month - 1]
+    return f"{d:%y}{m}{d:%d}"
+
+
+class SimMarket:
+    """Instrument table plus prices at any exchange time, vectorized over rows."""
+
+    def __init__(self, cfg: SimConfig):
+        self.cfg = cfg
+        self.rng = np.random.default_rng(cfg.seed)
+        self.t0 = datetime.fromisoformat(cfg.start)
+        self.spot = cfg.spot
+        self._clock = 0.0             # exchange seconds since t0 the spot was last moved to
+        self._replay = None
+        self._replay_i = 0
+        if cfg.mode == "replay":
+            import pandas as pd
+            df = pd.read_csv(cfg.replay_path)
+            self._replay = df["last" if "last" in df else "close"].to_numpy(np.float64)
+            self.spot = float(self._replay[0])
+        self._lock = threading.Lock()
+        self._build()
+        self.ref = self.prices(np.arange(self.n), self.t0)   # previous close / day open
+        self.high = self.ref.copy()
+        self.low = self.ref.copy()
+        self.volume = np.zeros(self.n, dtype=np.int64)
+
+    def _build(self) -> None:
+        cfg = self.cfg
+        d0 = self.t0.astimezone(IST).date()
+        first = d0 + timedelta(days=(3 - d0.weekday()) % 7)      # Thursday expiries
+        expiries = [first + timedelta(weeks=k) for k in range(cfg.n_expiries)]
+        side = cfg.strikes_each_side
+        if cfg.n_instruments:
+            side = max(1, int(round((cfg.n_instruments / (2 * cfg.n_expiries) - 1) / 2)))
+        atm = round(cfg.spot / cfg.strike_step) * cfg.strike_step
+        strikes = atm + cfg.strike_step * np.arange(-side, side + 1)
+
+        rows = [dict(token=NIFTY_TOKEN, tradingsymbol="NIFTY 50", name="NIFTY 50", expiry=None, strike=0.0,
+                     instrument_type="EQ", segment="INDICES", exchange="NSE", lot_size=0, kind=0, call=False)]
+        fut_exp = expiries[-1]
+        rows.append(dict(token=(2001 << 8) | SEG_NFO, tradingsymbol=f"NIFTY{fut_exp:%y%b}FUT".upper(), name="NIFTY",
+                         expiry=fut_exp, strike=0.0, instrument_type="FUT", segment="NFO-FUT", exchange="NFO",
+                         lot_size=75, kind=1, call=False))
+        et = 10_000
+        for exp in expiries:
+            for k in strikes:
+                for call in (True, False):
+                    typ = "CE" if call else "PE"
+                    rows.append(dict(token=(et << 8) | SEG_NFO, tradingsymbol=f"NIFTY{_weekly_code(exp)}{int(k)}{typ}",
+                                     name="NIFTY", expiry=exp, strike=float(k), instrument_type=typ,
+                                     segment="NFO-OPT", exchange="NFO", lot_size=75, kind=2, call=call))
+                    et += 1
+        self.rows = rows
+        self.n = len(rows)
+        self.token = np.array([r["token"] for r in rows], dtype=np.int64)
+        self.row_of: Dict[int, int] = {int(t): i for i, t in enumerate(self.token)}
+        self.row_of_symbol: Dict[str, int] = {}
+        for i, r in enumerate(rows):
+            self.row_of_symbol[f"{r['exchange']}:{r['tradingsymbol']}"] = i
+        self.row_of_symbol.setdefault("NSE:NIFTY", 0)
+        self.kind = np.array([r["kind"] for r in rows])
+        self.K = np.array([r["strike"] for r in rows])
+        self.call = np.array([r["call"] for r in rows])
+        exp_ts = [datetime.combine(r["expiry"], dtime(15, 30), IST).timestamp()
+                  if r["expiry"] else math.nan for r in rows]
+        self.expiry_ts = np.array(exp_ts)
+
+    def exchange_time(self, elapsed_s: float) -> datetime:
+        return self.t0 + timedelta(seconds=elapsed_s * self.cfg.time_warp)
+
+    def advance(self, now: datetime) -> None:
+        """Move the spot to exchange time `now` (no-op if already there)."""
+        el = (now - self.t0).total_seconds()
+        with self._lock:
+            dt = el - self._clock
+            if dt <= 0:
+                return
+            self._clock = el
+            if self._replay is not None:
+                self._replay_i = (self._replay_i + 1) % self._replay.size
+                self.spot = float(self._replay[self._replay_i])
+            else:
+                sd = self.cfg.atm_vol * math.sqrt(dt / YEAR_S)
+                self.spot *= math.exp(-0.5 * sd * sd + sd * self.rng.standard_normal())
+
+    def vol(self, K, T):
+        z = np.log(K / (self.spot * np.exp(self.cfg.r * T))) / (self.cfg.atm_vol * np.sqrt(np.maximum(T, 1e-6)))
+        return self.cfg.atm_vol * np.maximum(1.0 + self.cfg.skew * z + self.cfg.smile * z * z, 0.5)
+
+    def prices(self, rows: np.ndarray, now: datetime) -> np.ndarray:
+        """Last prices (rounded to the tick) of `rows` at exchange time `now`."""
+        S, r = self.spot, self.cfg.r
+        kind = self.kind[rows]
+        T = np.maximum((self.expiry_ts[rows] - now.timestamp()) / YEAR_S, 1e-6)
+        out = np.full(rows.size, S)
+        fut = kind == 1
+        out[fut] = S * np.exp(r * T[fut])
+        opt = kind == 2
+        if opt.any():
+            K, To, call = self.K[rows][opt], T[opt], self.call[rows][opt]
+            F = S * np.exp(r * To)
+            sd = self.vol(K, To) * np.sqrt(To)
+            d1 = (np.log(F / K) + 0.5 * sd * sd) / sd
+            d2 = d1 - sd
+            df = np.exp(-r * To)
+            c = df * (F * ndtr(d1) - K * ndtr(d2))
+            out[opt] = np.where(call, c, c - df * (F - K))
+        return np.maximum(np.round(out / TICK) * TICK, TICK)
+
+    def touch(self, rows: np.ndarray, px: np.ndarray, qty: np.ndarray) -> None:
+        """Record traded prices for OHLC / volume (ticks and quotes read these back)."""
+        np.maximum.at(self.high, rows, px)
+        np.minimum.at(self.low, rows, px)
+        np.add.at(self.volume, rows, qty)
+
+    def depth(self, px: np.ndarray):
+        """Five-level (bid_px, ask_px, bid_qty, ask_qty, orders), each (n, 5)."""
+        n = px.size
+        lvl = np.arange(5) * TICK
+        hs = np.maximum(np.round(px * 0.001 / TICK) * TICK, TICK)
+        bid = np.maximum((px - hs)[:, None] - lvl, 0.0)
+        ask = (px + hs)[:, None] + lvl
+        qty = self.rng.integers(1, 40, (2, n, 5)) * 75
+        orders = self.rng.integers(1, 20, (n, 5))
+        return bid, ask, qty[0], qty[1], orders
+
+    def instruments_csv(self, exchange: Optional[str] = None) -> str:
+        head = "instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,tick_size,lot_size," \
+               "instrument_type,segment,exchange"
+        lines = [head]
+        for r in self.rows:
+            if exchange and r["exchange"] != exchange:
+                continue
+            exp = r["expiry"].isoformat() if r["expiry"] else ""
+            lines.append(f"{r['token']},{r['token'] >> 8},{r['tradingsymbol']},\"{r['name']}\",0,{exp},"
+                         f"{r['strike']:g},{TICK},{r['lot_size']},{r['instrument_type']},{r['segment']},"
+                         f"{r['exchange']}")
+        return "\n".join(lines) + "\n"
+
+
+# ---------- binary protocol ----------
+
+def _paise(x) -> np.ndarray:
+    return np.round(np.asarray(x) * 100.0).astype(np.int64)
+
+
+def pack_ticks(m: SimMarket, rows: np.ndarray, modes: np.ndarray, now: datetime) -> Tuple[bytes, int]:
+    """
+    One Kite binary message for `rows` in their `modes`: a 2-byte packet count, then
+    per packet a 2-byte length and the packet as big-endian int32 words.
+    Returns (message, packets).
+    """
+    px = m.prices(rows, now)
+    qty = m.rng.integers(1, 20, rows.size) * 75
+    m.touch(rows, px, np.where(m.kind[rows] == 0, 0, qty))
+    ts = int(now.timestamp())
+    ltp = _paise(px)
+    index = m.kind[rows] == 0
+    parts, count = [], 0
+    for mode in (MODE_LTP, MODE_QUOTE, MODE_FULL):
+        for idx_group in (True, False):
+            sel = np.flatnonzero((modes == mode) & (index == idx_group))
+            if not sel.size:
+                continue
+            r = rows[sel]
+            tok = m.token[r]
+            if mode == MODE_LTP:
+                cols = [tok, ltp[sel]]
+            elif idx_group:
+                cols = [tok, ltp[sel], _paise(m.high[r]), _paise(m.low[r]), _paise(m.ref[r]), _paise(m.ref[r]),
+                        _paise(px[sel] - m.ref[r])]
+                if mode == MODE_FULL:
+                    cols.append(np.full(sel.size, ts))
+            else:
+                cols = [tok, ltp[sel], qty[sel], ltp[sel], m.volume[r], np.full(sel.size, 5000), np.full(sel.size, 5000),
+                        _paise(m.ref[r]), _paise(m.high[r]), _paise(m.low[r]), _paise(m.ref[r])]
+                if mode == MODE_FULL:
+                    z = np.zeros(sel.size, dtype=np.int64)
+                    cols += [np.full(sel.size, ts), z, z, z, np.full(sel.size, ts)]
+                    bid, ask, bq, aq, orders = m.depth(px[sel])
+                    for side_px, side_q in ((bid, bq), (ask, aq)):
+                        for k in range(5):
+                            cols += [side_q[:, k], _paise(side_px[:, k]), orders[:, k] << 16]
+            words = np.stack(cols, axis=1).astype(">i4")
+            L = words.shape[1] * 4
+            body = np.empty((sel.size, 2 + L), np.uint8)
+            body[:, :2] = np.frombuffer(struct.pack(">H", L), np.uint8)
+            body[:, 2:] = words.view(np.uint8).reshape(sel.size, L)
+            parts.append(body.tobytes())
+            count += sel.size
+    return struct.pack(">H", count) + b"".join(parts), count
+
+
+def parse_binary(data: bytes) -> List[dict]:
+    """Decode a binary tick message into KiteTicker-style dicts (timestamps tz-aware UTC)."""
+    if len(data) < 2:
+        return []            # heartbeat
+    n = int.from_bytes(data[:2], "big")
+    j = 2
+    out = []
+    for _ in range(n):
+        L = int.from_bytes(data[j:j + 2], "big")
+        w = struct.unpack_from(f">{L // 4}i", data, j + 2)
+        j += 2 + L
+        token = w[0]
+        seg = token & 0xFF
+        div = 1e7 if seg == 3 else 1e4 if seg == 6 else 100.0
+        if L == 8:
+            out.append({"tradable": seg != SEG_INDICES, "mode": "ltp", "instrument_token": token,
+                        "last_price": w[1] / div})
+        elif L in (28, 32):
+            t = {"tradable": False, "mode": "quote" if L == 28 else "full", "instrument_token": token,
+                 "last_price": w[1] / div, "ohlc": {"high": w[2] / div, "low": w[3] / div, "open": w[4] / div,
+                                                    "close": w[5] / div}, "change": w[6] / div}
+            if L == 32:
+                t["exchange_timestamp"] = datetime.fromtimestamp(w[7], timezone.utc)
+            out.append(t)
+        elif L in (44, 184):
+            t = {"tradable": True, "mode": "quote" if L == 44 else "full", "instrument_token": token,
+                 "last_price": w[1] / div, "last_traded_quantity": w[2], "average_traded_price": w[3] / div,
+                 "volume_traded": w[4], "total_buy_quantity": w[5], "total_sell_quantity": w[6],
+                 "ohlc": {"open": w[7] / div, "high": w[8] / div, "low": w[9] / div, "close": w[10] / div}}
+            if L == 184:
+                t["last_trade_time"] = datetime.fromtimestamp(w[11], timezone.utc)
+                t["oi"], t["oi_day_high"], t["oi_day_low"] = w[12], w[13], w[14]
+                t["exchange_timestamp"] = datetime.fromtimestamp(w[15], timezone.utc)
+                lv = [{"quantity": w[16 + 3 * k], "price": w[17 + 3 * k] / div, "orders": w[18 + 3 * k] >> 16}
+                      for k in range(10)]
+                t["depth"] = {"buy": lv[:5], "sell": lv[5:]}
+            out.append(t)
+    return out
+
+
+# ---------- websocket framing ----------
+
+def ws_frame(payload: bytes, opcode: int = 0x2, mask: bool = False) -> bytes:
+    n = len(payload)
+    head = bytearray([0x80 | opcode])
+    mbit = 0x80 if mask else 0
+    if n < 126:
+        head.append(mbit | n)
+    elif n < 1 << 16:
+        head.append(mbit | 126)
+        head += struct.pack(">H", n)
+    else:
+        head.append(mbit | 127)
+        head += struct.pack(">Q", n)
+    if not mask:
+        return bytes(head) + payload
+    key = os.urandom(4)
+    body = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), n)).tobytes()
+    return bytes(head) + key + body
+
+
+def _unmask(key: bytes, payload: bytes) -> bytes:
+    if not payload:
+        return payload
+    return (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(key, np.uint8), len(payload))).tobytes()
+
+
+async def _read_frame(reader: asyncio.StreamReader):
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack(">H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack(">Q", await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(n)
+    return b0 & 0x0F, _unmask(key, payload) if key else payload
+
+
+def _accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+# ---------- server ----------
+
+class _Conn:
+    def __init__(self, writer):
+        self.writer = writer
+        self.modes: Dict[int, int] = {}      # market row -> mode
+        self.rows = np.empty(0, dtype=np.int64)
+        self.row_modes = np.empty(0, dtype=np.int64)
+        self.rr = 0
+        self.last_due = 0.0
+        self.closed = False
+
+    def rebuild(self):
+        self.rows = np.fromiter(self.modes.keys(), dtype=np.int64, count=len(self.modes))
+        self.row_modes = np.fromiter(self.modes.values(), dtype=np.int64, count=len(self.modes))
+        self.rr = 0
+
+
+class KiteSimulator:
+    def __init__(self, cfg: Optional[SimConfig] = None):
+        self.cfg = cfg or SimConfig()
+        self.market = SimMarket(self.cfg)
+        self.stats = {"connections": 0, "disconnects": 0, "generated": 0, "sent": 0, "dropped": 0,
+                      "messages": 0, "bytes": 0, "rest_requests": 0}
+        self.port = self.cfg.port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._origin = 0.0
+
+    # ---------- lifecycle ----------
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._origin = self._loop.time()
+        self._server = await asyncio.start_server(self._handle, self.cfg.host, self.cfg.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def serve_forever(self) -> None:
+        try:
+            asyncio.run(self._serve())
+        except asyncio.CancelledError:
+            pass
+
+    def start(self) -> "KiteSimulator":
+        """Serve on a background thread; returns once the port is bound."""
+        self._thread = threading.Thread(target=self.serve_forever, name="kite-sim", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            for t in asyncio.all_tasks(self._loop):
+                self._loop.call_soon_threadsafe(t.cancel)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    @property
+    def rest_root(self) -> str:
+        return f"http://{self.cfg.host}:{self.port}"
+
+    @property
+    def ws_root(self) -> str:
+        return f"ws://{self.cfg.host}:{self.port}"
+
+    def now(self) -> datetime:
+        return self.market.exchange_time(self._loop.time() - self._origin)
+
+    # ---------- connections ----------
+    async def _handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = head.decode("latin-1").split("\r\n")
+        method, target = lines[0].split(" ")[:2]
+        headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:] if ln)}
+        try:
+            if headers.get("upgrade", "").lower() == "websocket":
+                await self._ws(reader, writer, target, headers)
+            else:
+                self._rest(writer, method, target, headers)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _ws(self, reader, writer, target, headers):
+        q = parse_qs(urlsplit(target).query)
+        if not q.get("api_key") or not q.get("access_token"):
+            writer.write(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {_accept(headers.get('sec-websocket-key', ''))}\r\n\r\n").encode())
+        conn = _Conn(writer)
+        self.stats["connections"] += 1
+        reader_task = asyncio.create_task(self._ws_reader(reader, conn))
+        try:
+            await self._ws_producer(conn)
+        finally:
+            conn.closed = True
+            reader_task.cancel()
+
+    async def _ws_reader(self, reader, conn: _Conn):
+        m = self.market
+        try:
+            while True:
+                op, payload = await _read_frame(reader)
+                if op == 0x8:
+                    conn.writer.write(ws_frame(b"", 0x8))
+                    conn.closed = True
+                    return
+                if op == 0x9:
+                    conn.writer.write(ws_frame(payload, 0xA))
+                    continue
+                if op != 0x1:
+                    continue
+                msg = json.loads(payload)
+                a, v = msg.get("a"), msg.get("v")
+                if a == "subscribe":
+                    for t in v:
+                        if int(t) in m.row_of:
+                            conn.modes.setdefault(m.row_of[int(t)], MODE_QUOTE)   # Kite's default mode
+                elif a == "unsubscribe":
+                    for t in v:
+                        conn.modes.pop(m.row_of.get(int(t), -1), None)
+                elif a == "mode":
+                    mode, toks = MODES[v[0]], v[1]
+                    for t in toks:
+                        row = m.row_of.get(int(t))
+                        if row is not None and row in conn.modes:
+                            conn.modes[row] = mode
+                conn.rebuild()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            conn.closed = True
+
+    def _rate(self, t: float) -> float:
+        c = self.cfg
+        if c.burst_every_s and (t % c.burst_every_s) < c.burst_s:
+            return c.rate * c.burst_mult
+        return c.rate
+
+    async def _ws_producer(self, conn: _Conn):
+        c, loop, st = self.cfg, self._loop, self.stats
+        interval = c.batch_ms / 1e3
+        start = loop.time()
+        next_t, carry, last_msg = start, 0.0, start
+        drop_at = start + c.disconnect_every_s if c.disconnect_every_s else math.inf
+        transport = conn.writer.transport
+        rng = np.random.default_rng(c.seed + st["connections"])
+        while not conn.closed:
+            next_t += interval
+            await asyncio.sleep(max(0.0, next_t - loop.time()))
+            now = loop.time()
+            if now >= drop_at:
+                st["disconnects"] += 1
+                transport.abort()
+                return
+            if conn.rows.size == 0:
+                if now - last_msg >= 1.0:
+                    conn.writer.write(ws_frame(b"\x00"))
+                    last_msg = now
+                continue
+            carry += self._rate(now - self._origin) * interval
+            n = int(carry)
+            if n == 0:
+                continue
+            carry -= n
+            ex_now = self.market.exchange_time(now - self._origin)
+            self.market.advance(ex_now)
+            for a in range(0, n, 60_000):
+                k = min(60_000, n - a)
+                pick = (conn.rr + np.arange(k)) % conn.rows.size
+                conn.rr = int((conn.rr + k) % conn.rows.size)
+                msg, cnt = pack_ticks(self.market, conn.rows[pick], conn.row_modes[pick], ex_now)
+                st["generated"] += cnt
+                if transport.get_write_buffer_size() > c.max_buffer_bytes:
+                    st["dropped"] += cnt
+                    continue
+                frame = ws_frame(msg)
+                st["sent"] += cnt
+                st["messages"] += 1
+                st["bytes"] += len(frame)
+                if c.latency_ms or c.jitter_ms:
+                    delay = (c.latency_ms + (rng.exponential(c.jitter_ms) if c.jitter_ms else 0.0)) / 1e3
+                    conn.last_due = max(conn.last_due, now + delay)
+                    loop.call_at(conn.last_due, self._write_later, conn, frame)
+                else:
+                    conn.writer.write(frame)
+                last_msg = now
+
+    @staticmethod
+    def _write_later(conn: _Conn, frame: bytes) -> None:
+        if not conn.closed and not conn.writer.transport.is_closing():
+            conn.writer.write(frame)
+
+    # ---------- REST ----------
+    def _rest(self, writer, method, target, headers) -> None:
+        self.stats["rest_requests"] += 1
+        u = urlsplit(target)
+        path = u.path.rstrip("/")
+        if path == "/_sim/stats":
+            return self._respond(writer, 200, {**self.stats, "config": asdict(self.cfg)}, raw=True)
+        if not headers.get("authorization", "").startswith("token "):
+            return self._respond(writer, 403, {"status": "error", "message": "Incorrect `api_key` or `access_token`.",
+                                               "error_type": "TokenException"}, raw=True)
+        if path == "/instruments" or path.startswith("/instruments/"):
+            exch = path.split("/")[2] if path.count("/") == 2 else None
+            body = self.market.instruments_csv(exch).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/csv\r\nConnection: close\r\n"
+                         + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            return
+        if path in ("/quote", "/quote/ltp", "/quote/ohlc"):
+            keys = parse_qs(u.query).get("i", [])
+            return self._respond(writer, 200, {"status": "success", "data": self._quotes(keys, path)}, raw=True)
+        return self._respond(writer, 404, {"status": "error", "message": "Route not found",
+                                           "error_type": "GeneralException"}, raw=True)
+
+    def _quotes(self, keys: List[str], path: str) -> dict:
+        m = self.market
+        found = [(k, m.row_of_symbol[k]) for k in keys if k in m.row_of_symbol]
+        if not found:
+            return {}
+        now = self.now()
+        m.advance(now)
+        rows = np.array([r for _, r in found])
+        px = m.prices(rows, now)
+        out = {}
+        if path == "/quote":
+            bid, ask, bq, aq, orders = m.depth(px)
+        for j, (k, r) in enumerate(found):
+            q = {"instrument_token": int(m.token[r]), "last_price": float(px[j])}
+            if path != "/quote/ltp":
+                q["ohlc"] = {"open": float(m.ref[r]), "high": float(max(m.high[r], px[j])),
+                             "low": float(min(m.low[r], px[j])), "close": float(m.ref[r])}
+            if path == "/quote":
+                ts = now.astimezone(IST).strftime("%Y-%m-%d %H:%M:%S")
+                q.update({"timestamp": ts, "last_trade_time": ts, "last_quantity": 75, "average_price": float(px[j]),
+                          "volume": int(m.volume[r]), "buy_quantity": 5000, "sell_quantity": 5000, "oi": 0,
+                          "oi_day_high": 0, "oi_day_low": 0, "net_change": float(px[j] - m.ref[r]),
+                          "depth": {"buy": [{"price": float(bid[j, i]), "quantity": int(bq[j, i]),
+                                             "orders": int(orders[j, i])} for i in range(5)],
+                                    "sell": [{"price": float(ask[j, i]), "quantity": int(aq[j, i]),
+                                              "orders": int(orders[j, i])} for i in range(5)]}})
+            out[k] = q
+        return out
+
+    @staticmethod
+    def _respond(writer, code: int, obj, raw: bool = False) -> None:
+        body = json.dumps(obj).encode()
+        reason = {200: "OK", 403: "Forbidden", 404: "Not Found"}[code]
+        writer.write(f"HTTP/1.1 {code} {reason}\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+
+
+def _serve_in_process(cfg: SimConfig, port_q) -> None:
+    sim = KiteSimulator(cfg)
+    threading.Thread(target=lambda: (sim._ready.wait(10), port_q.put(sim.port)), daemon=True).start()
+    sim.serve_forever()
+
+
+def start_process(cfg: SimConfig):
+    """Run a simulator in its own process (keeps it off the driver's GIL); returns (process, port)."""
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_serve_in_process, args=(cfg, q), daemon=True)
+    p.start()
+    return p, q.get(timeout=30)
+
+
+# ---------- client ----------
+
+class SimTicker:
+    """
+    Stdlib websocket client with KiteTicker's surface (on_connect / on_ticks / on_close
+    callbacks, subscribe, set_mode, MODE_*; reconnects and resubscribes on drop).
+    Ticks come from parse_binary.
+    """
+
+    MODE_LTP, MODE_QUOTE, MODE_FULL = "ltp", "quote", "full"
+
+    def __init__(self, api_key: str, access_token: str, root: str = "ws://127.0.0.1:8765",
+                 reconnect: bool = True, reconnect_max_delay: float = 5.0):
+        self.url = f"{root}?api_key={api_key}&access_token={access_token}"
+        self.reconnect = reconnect
+        self.reconnect_max_delay = reconnect_max_delay
+        self.on_connect = self.on_ticks = self.on_close = self.on_error = self.on_reconnect = None
+        self.reconnects = 0
+        self._subs: Dict[int, str] = {}
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- KiteTicker-style API ----------
+    def connect(self, threaded: bool = True, **_):
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="sim-ticker", daemon=True)
+            self._thread.start()
+        else:
+            self._run()
+
+    def subscribe(self, tokens) -> None:
+        for t in tokens:
+            self._subs.setdefault(int(t), self.MODE_QUOTE)
+        self._send({"a": "subscribe", "v": [int(t) for t in tokens]})
+
+    def unsubscribe(self, tokens) -> None:
+        for t in tokens:
+            self._subs.pop(int(t), None)
+        self._send({"a": "unsubscribe", "v": [int(t) for t in tokens]})
+
+    def set_mode(self, mode: str, tokens) -> None:
+        for t in tokens:
+            self._subs[int(t)] = mode
+        self._send({"a": "mode", "v": [mode, [int(t) for t in tokens]]})
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(5)
+
+    stop = close
+
+    # ---------- internals ----------
+    def _send(self, obj) -> None:
+        if self._sock is None:
+            return
+        with self._send_lock:
+            try:
+                self._sock.sendall(ws_frame(json.dumps(obj).encode(), 0x1, mask=True))
+            except OSError:
+                pass
+
+    def _open(self):
+        u = urlsplit(self.url)
+        sock = socket.create_connection((u.hostname, u.port or 80), timeout=10)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((f"GET {u.path or '/'}?{u.query} HTTP/1.1\r\nHost: {u.netloc}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        f = sock.makefile("rb", buffering=1 << 20)
+        status = f.readline()
+        while f.readline() not in (b"\r\n", b""):
+            pass
+        if b" 101 " not in status:
+            sock.close()
+            raise ConnectionError(status.decode(errors="replace").strip())
+        sock.settimeout(None)
+        return sock, f
+
+    def _run(self) -> None:
+        delay = 0.1
+        first = True
+        while not self._stop.is_set():
+            try:
+                self._sock, f = self._open()
+            except OSError as e:
+                if self.on_error:
+                    self.on_error(self, 0, str(e))
+                if not self.reconnect:
+                    return
+                time.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            delay = 0.1
+            if not first:
+                self.reconnects += 1
+                if self.on_reconnect:
+                    self.on_reconnect(self, self.reconnects)
+                by_mode: Dict[str, list] = {}
+                for t, m in self._subs.items():
+                    by_mode.setdefault(m, []).append(t)
+                if self._subs:
+                    self._send({"a": "subscribe", "v": list(self._subs)})
+                for m, toks in by_mode.items():
+                    self._send({"a": "mode", "v": [m, toks]})
+            first = False
+            if self.on_connect:
+                self.on_connect(self, None)
+            try:
+                self._recv_loop(f)
+            except (OSError, struct.error, ValueError):
+                pass
+            if self.on_close:
+                self.on_close(self, 1006, "connection dropped")
+            if not self.reconnect:
+                return
+
+    def _recv_loop(self, f) -> None:
+        read = f.read
+        while not self._stop.is_set():
+            h = read(2)
+            if len(h) < 2:
+                return
+            n = h[1] & 0x7F
+            if n == 126:
+                n = struct.unpack(">H", read(2))[0]
+            elif n == 127:
+                n = struct.unpack(">Q", read(8))[0]
+            payload = read(n)
+            if len(payload) < n:
+                return
+            op = h[0] & 0x0F
+            if op == 0x2:
+                if n > 1 and self.on_ticks:
+                    self.on_ticks(self, parse_binary(payload))
+            elif op == 0x8:
+                return
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local Kite websocket/REST simulator")
+    for f, v in asdict(SimConfig()).items():
+        kind = type(v) if v is not None else int if f == "n_instruments" else str
+        ap.add_argument("--" + f.replace("_", "-"), type=kind, default=v)
+    cfg = SimConfig(**vars(ap.parse_args()))
+    sim = KiteSimulator(cfg)
+    print(f"kite sim on {sim.cfg.host}:{sim.cfg.port}  rest_root=http://{cfg.host}:{cfg.port}  "
+          f"ws_root=ws://{cfg.host}:{cfg.port}  instruments={sim.market.n}", flush=True)
+    sim.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
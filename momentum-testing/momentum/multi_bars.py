@@ -0,0 +1,312 @@
+# momentum/multi_bars.py
+"""
+Several bar types from one tick stream at once, e.g. 1m/3m/5m/15m time bars plus
+tick-count and volume bars.
+
+* only the open 1m bar and the activity bars are touched per tick, as plain floats.
+* 3m/5m/15m roll up from each closed 1m bar (first/max/min/last/sum) and never see
+  raw ticks again. A bucket closes with the 1m bar that ends it, so there's no wait
+  for the next tick. If a quiet market skips that minute, it closes on the next 1m
+  bar in a later bucket or on close_until (the timer path).
+* buckets are aligned to epoch minutes + anchor_minutes. NSE's 09:15 IST open is
+  3:45 UTC, which is already on a 3/5/15 minute boundary.
+* every bar type has its own BarRing: fixed-size numpy columns written twice
+  (slot i and i + capacity), so the last n bars are always one contiguous slice.
+  frame(n) wraps those slices in a polars DataFrame without copying.
+* on_close(name, fn) subscribes to one bar type. Each update() also returns the names
+  it closed.
+
+    mtf = MultiTimeframeBars(("1m", "5m", "15m", "500t"), capacity=1024)
+    eng5 = PolarsFeatureEngine()
+    mtf.on_close("5m", lambda name, ring: eng5.compute(ring.frame(100)))
+
+Frames alias the ring. A frame stays valid until the ring wraps past it, i.e. for
+`capacity - n` more bars of that type. Size capacity well above the largest window,
+and copy anything a consumer keeps longer. Volume bars need ticks that carry
+traded volume. Kite index ticks don't.
+
+MultiTimeframeBars also implements the BarAggregator protocol on its 1m bars
+(push_tick / minute_ready / finalize_bar), so app.py uses it in place of
+PolarsBarAggregator. ts_close is the bar's end.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+
+from .core_contracts import Tick
+
+_NS_MIN = 60_000_000_000
+
+
+# ---------- ring storage ----------
+
+class BarRing:
+    """Fixed-capacity bar columns (ts_close ns UTC, open, high, low, close, volume, ticks)."""
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, name: str, capacity: int = 2048):
+        self.name = name
+        self.capacity = int(capacity)
+        self.ts = np.zeros(2 * self.capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((5, 2 * self.capacity))      # one contiguous row per field
+        self.ticks = np.zeros(2 * self.capacity, dtype=np.int64)
+        self.count = 0                                       # bars ever appended
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, ts_ns: int, o: float, h: float, l: float, c: float, v: float, n: int) -> None:
+        i = self.count % self.capacity
+        for j in (i, i + self.capacity):
+            self.ts[j] = ts_ns
+            col = self.ohlcv[:, j]
+            col[0], col[1], col[2], col[3], col[4] = o, h, l, c, v
+            self.ticks[j] = n
+        self.count += 1
+
+    def _span(self, n: Optional[int]) -> slice:
+        k = len(self) if n is None else min(int(n), len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        return slice(end - k, end)
+
+    def view(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Last n bars (all if None), oldest first, as numpy views into the ring."""
+        s = self._span(n)
+        out = {"ts_close": self.ts[s]}
+        for k, f in enumerate(self.FIELDS):
+            out[f] = self.ohlcv[k, s]
+        out["ticks"] = self.ticks[s]
+        return out
+
+    def frame(self, n: Optional[int] = None) -> pl.DataFrame:
+        """view(n) as a polars frame sharing the ring's memory (ts_close naive UTC)."""
+        v = self.view(n)
+        cols = [pl.Series("ts_close", v.pop("ts_close")).cast(pl.Datetime("ns"))]
+        cols += [pl.Series(k, a) for k, a in v.items()]
+        return pl.DataFrame(cols)
+
+    def last(self) -> Optional[dict]:
+        if not self.count:
+            return None
+        j = (self.count - 1) % self.capacity
+        return {"ts_close": int(self.ts[j]), **{f: float(self.ohlcv[k, j]) for k, f in enumerate(self.FIELDS)},
+                "ticks": int(self.ticks[j])}
+
+
+# ---------- bar specs ----------
+
+@dataclass(frozen=True)
+class BarSpec:
+    name: str
+    kind: str      # "time" (size = minutes) | "ticks" | "volume"
+    size: float
+
+    @classmethod
+    def parse(cls, s: str) -> "BarSpec":
+        """'5m' -> 5-minute bars, '500t' -> 500-tick bars, '25000v' -> 25k-volume bars."""
+        s = s.strip()
+        unit, qty = s[-1].lower(), s[:-1]
+        if unit == "m" and qty.isdigit() and int(qty) > 0:
+            return cls(s, "time", int(qty))
+        if unit == "t" and qty.isdigit() and int(qty) > 0:
+            return cls(s, "ticks", int(qty))
+        if unit == "v" and float(qty) > 0:
+            return cls(s, "volume", float(qty))
+        raise ValueError(f"bad bar spec {s!r}; use e.g. '5m', '500t' or '25000v'")
+
+
+# ---------- aggregator ----------
+
+class MultiTimeframeBars:
+    """
+    All bar types in `specs`, updated from ticks (update / push_tick) or from closed
+    1m bars (push_bar). "1m" is always included; it drives the rollups.
+    """
+
+    def __init__(self, specs: Iterable[str] = ("1m", "3m", "5m", "15m"), capacity: int = 2048,
+                 window: int = 20, anchor_minutes: int = 0):
+        parsed = [BarSpec.parse(s) for s in specs]
+        if not any(p.kind == "time" and p.size == 1 for p in parsed):
+            parsed.insert(0, BarSpec("1m", "time", 1))
+        self.specs = {p.name: p for p in parsed}
+        self.rings = {p.name: BarRing(p.name, capacity) for p in parsed}
+        self.window = window
+        self.anchor = int(anchor_minutes)
+        self.late = 0
+
+        self._m1 = self.rings[next(p.name for p in parsed if p.kind == "time" and p.size == 1)]
+        self._rollups = [[p.name, int(p.size), None] for p in parsed if p.kind == "time" and p.size > 1]
+        self._activity = [[p.name, p.kind == "volume", p.size, None] for p in parsed if p.kind != "time"]
+        self._listeners: Dict[str, List[Callable]] = defaultdict(list)
+        self._closed: List[str] = []
+        self._naive: Optional[bool] = None
+
+        # open 1m bar
+        self._m: Optional[int] = None            # epoch minute of the open bar
+        self._o = self._h = self._l = self._c = self._v = 0.0
+        self._n = 0
+        self._last_m: Optional[int] = None       # last closed minute
+        self._pending_1m = False
+
+    # ---- events ----
+
+    def on_close(self, name: str, fn: Callable[[str, BarRing], None]) -> None:
+        """Call fn(name, ring) each time a `name` bar closes."""
+        if name not in self.rings:
+            raise KeyError(name)
+        self._listeners[name].append(fn)
+
+    def _emit(self, name: str) -> None:
+        self._closed.append(name)
+        for fn in self._listeners.get(name, ()):
+            fn(name, self.rings[name])
+
+    # ---- tick path ----
+
+    def update(self, ts: datetime, price: float, vol: float = 0.0) -> List[str]:
+        """Fold one tick in; returns the names of the bars it closed."""
+        self._closed = []
+        if self._naive is None:
+            self._naive = ts.tzinfo is None
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        sec = ts.timestamp()
+        ts_ns = int(sec * 1e9)
+
+        for acc in self._activity:
+            a = acc[3]
+            if a is None:
+                a = acc[3] = [price, price, price, price, 0.0, 0]
+            elif price > a[1]:
+                a[1] = price
+            elif price < a[2]:
+                a[2] = price
+            a[3] = price
+            a[4] += vol
+            a[5] += 1
+            if (a[4] if acc[1] else a[5]) >= acc[2]:
+                self.rings[acc[0]].append(ts_ns, a[0], a[1], a[2], a[3], a[4], a[5])
+                acc[3] = None
+                self._emit(acc[0])
+
+        m = int(sec // 60)
+        if m == self._m:
+            if price > self._h:
+                self._h = price
+            elif price < self._l:
+                self._l = price
+            self._c = price
+            self._v += vol
+            self._n += 1
+            return self._closed
+        if (self._m is not None and m < self._m) or (self._last_m is not None and m <= self._last_m):
+            self.late += 1
+            return self._closed
+        if self._m is not None:
+            self._close_minute(self._m, self._o, self._h, self._l, self._c, self._v, self._n)
+        self._m = m
+        self._o = self._h = self._l = self._c = price
+        self._v = vol
+        self._n = 1
+        return self._closed
+
+    def push_tick(self, t: Tick) -> None:
+        if getattr(t, "ts", None) is None:
+            return
+        self.update(t.ts, float(t.last), float(t.volume or 0.0))
+
+    # ---- closed-bar path ----
+
+    def push_bar(self, ts_close: datetime, o: float, h: float, l: float, c: float, v: float = 0.0,
+                 n: int = 0) -> List[str]:
+        """Feed an already-closed 1m bar (replays, another aggregator); don't mix with ticks."""
+        self._closed = []
+        if self._naive is None:
+            self._naive = ts_close.tzinfo is None
+        if ts_close.tzinfo is None:
+            ts_close = ts_close.replace(tzinfo=timezone.utc)
+        m = int(ts_close.timestamp() // 60) - 1
+        if self._last_m is not None and m <= self._last_m:
+            self.late += 1
+            return self._closed
+        self._close_minute(m, o, h, l, c, v, n)
+        return self._closed
+
+    def close_until(self, t: datetime) -> List[str]:
+        """Timer path: close the open 1m bar and any rollup bucket that ended at or before t."""
+        self._closed = []
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        now_m = int(t.timestamp() // 60)      # first minute that hasn't ended yet
+        if self._m is not None and self._m + 1 <= now_m:
+            self._close_minute(self._m, self._o, self._h, self._l, self._c, self._v, self._n)
+            self._m = None
+        for r in self._rollups:
+            a = r[2]
+            if a is not None and (a[0] + 1) * r[1] + self.anchor <= now_m:
+                self._close_rollup(r)
+        return self._closed
+
+    def _close_minute(self, m, o, h, l, c, v, n) -> None:
+        self._m1.append((m + 1) * _NS_MIN, o, h, l, c, v, n)
+        self._last_m = m
+        self._pending_1m = True
+        self._emit(self._m1.name)
+        rel = m - self.anchor
+        for r in self._rollups:
+            k = r[1]
+            bucket = rel // k
+            a = r[2]
+            if a is not None and a[0] != bucket:
+                self._close_rollup(r)          # bucket whose last minute never printed
+                a = None
+            if a is None:
+                r[2] = [bucket, o, h, l, c, v, n]
+            else:
+                if h > a[2]:
+                    a[2] = h
+                if l < a[3]:
+                    a[3] = l
+                a[4] = c
+                a[5] += v
+                a[6] += n
+            if (rel + 1) % k == 0:
+                self._close_rollup(r)
+
+    def _close_rollup(self, r) -> None:
+        name, k, a = r
+        self.rings[name].append(((a[0] + 1) * k + self.anchor) * _NS_MIN, a[1], a[2], a[3], a[4], a[5], a[6])
+        r[2] = None
+        self._emit(name)
+
+    # ---- windows ----
+
+    def frame(self, name: str = "1m", n: Optional[int] = None) -> pl.DataFrame:
+        """Zero-copy polars window of the last n `name` bars (default: `window`)."""
+        return self.rings[name].frame(self.window if n is None else n)
+
+    def view(self, name: str = "1m", n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return self.rings[name].view(self.window if n is None else n)
+
+    # ---- BarAggregator protocol (1m) ----
+
+    def minute_ready(self) -> bool:
+        return self._pending_1m
+
+    def finalize_bar(self) -> Optional[Tuple[dict, pl.DataFrame]]:
+        """(last 1m bar dict, window frame) once per closed minute, else None."""
+        if not self._pending_1m:
+            return None
+        self._pending_1m = False
+        bar = self._m1.last()
+        ts = datetime.fromtimestamp(bar.pop("ts_close") / 1e9, timezone.utc)
+        bar["ts_close"] = ts.replace(tzinfo=None) if self._naive else ts
+        bar.pop("ticks")
+        return bar, self.frame("1m")
@@ -0,0 +1,95 @@
+# momentum/option_feed_sim.py
+"""
+Local stand-in for the Kite option quote stream, for running LiveVarianceIndex
+without a broker. It makes a NIFTY-like chain over several weekly expiries, priced
+with Black-Scholes on a quadratic smile in standardized moneyness. Each poll() moves the spot
+and re-quotes a random `tick_fraction` of the instruments, so the index sees the
+sparse updates a real feed sends. Far OTM strikes whose fair value is below one
+tick are quoted with a zero bid, the way NSE shows them.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy.special import ndtr
+
+from .core_contracts import OptionInstrument, OptionQuote
+
+TICK = 0.05
+
+
+class SimulatedOptionQuotes:
+    def __init__(self, spot: float = 24500.0, expiries_days: Sequence[float] = (3, 10, 17, 24, 31, 38, 66),
+                 strike_step: float = 50.0, strikes_each_side: int = 40, r: float = 0.065,
+                 atm_vol: float = 0.13, skew: float = -0.1, smile: float = 0.03, vol_of_spot: float = 0.13,
+                 tick_fraction: float = 0.2, half_spread: float = 0.002, poll_dt_s: float = 1.0,
+                 now: Optional[datetime] = None, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.spot = float(spot)
+        self.r = r
+        self.atm_vol, self.skew, self.smile = atm_vol, skew, smile
+        self.vol_of_spot = vol_of_spot
+        self.tick_fraction = tick_fraction
+        self.half_spread = half_spread
+        self.poll_dt_s = poll_dt_s
+        self.now = now or datetime.now(timezone.utc)
+
+        atm = round(spot / strike_step) * strike_step
+        strikes = atm + strike_step * np.arange(-strikes_each_side, strikes_each_side + 1)
+        self._instruments: List[OptionInstrument] = []
+        tok = 1000
+        for d in expiries_days:
+            exp = self.now + timedelta(days=d)
+            for k in strikes:
+                for is_call in (True, False):
+                    self._instruments.append(OptionInstrument(token=tok, expiry=exp, strike=float(k), is_call=is_call))
+                    tok += 1
+        self._tok = np.array([i.token for i in self._instruments])
+        self._K = np.array([i.strike for i in self._instruments])
+        self._call = np.array([i.is_call for i in self._instruments])
+        self._exp = [i.expiry for i in self._instruments]
+        self._first = True
+
+    def instruments(self) -> List[OptionInstrument]:
+        return list(self._instruments)
+
+    def vol(self, K, T):
+        """Smile vol at strike K, maturity T (years), quadratic in standardized moneyness."""
+        z = np.log(K / (self.spot * np.exp(self.r * T))) / (self.atm_vol * np.sqrt(np.maximum(T, 1e-6)))
+        return self.atm_vol * np.maximum(1.0 + self.skew * z + self.smile * z * z, 0.5)
+
+    def fair(self, sel: np.ndarray) -> np.ndarray:
+        T = np.array([(self._exp[i] - self.now).total_seconds() / (365.0 * 86400.0) for i in sel])
+        K, call = self._K[sel], self._call[sel]
+        F = self.spot * np.exp(self.r * T)
+        sig = self.vol(K, T)
+        sd = sig * np.sqrt(T)
+        d1 = (np.log(F / K) + 0.5 * sd * sd) / sd
+        d2 = d1 - sd
+        df = np.exp(-self.r * T)
+        c = df * (F * ndtr(d1) - K * ndtr(d2))
+        p = df * (K * ndtr(-d2) - F * ndtr(-d1))
+        return np.where(call, c, p)
+
+    def poll(self) -> List[OptionQuote]:
+        """Advance `poll_dt_s`, move the spot, and quote a random subset (everything on the first call)."""
+        dt = self.poll_dt_s / (365.0 * 86400.0)
+        self.now = self.now + timedelta(seconds=self.poll_dt_s)
+        self.spot *= math.exp(self.vol_of_spot * math.sqrt(dt) * self.rng.standard_normal())
+        n = self._tok.size
+        if self._first:
+            sel = np.arange(n)
+            self._first = False
+        else:
+            sel = np.flatnonzero(self.rng.random(n) < self.tick_fraction)
+        if sel.size == 0:
+            return []
+        fair = self.fair(sel)
+        hs = np.maximum(self.half_spread * fair, TICK)
+        bid = np.floor((fair - hs) / TICK) * TICK
+        ask = np.ceil((fair + hs) / TICK) * TICK
+        bid = np.where(fair < TICK, 0.0, np.maximum(bid, 0.0))
+        ts = self.now
+        return [OptionQuote(token=int(t), bid=float(b), ask=float(a), ts=ts)
+                for t, b, a in zip(self._tok[sel], bid, ask)]
@@ -0,0 +1,360 @@
+# momentum/pipeline_async.py
+"""
+Event-driven runtime for the momentum panel (app.py --async).
+
+    feed thread --ticks--> ingest --bar_q--> minute work (1-thread executor) --render_q--> render
+                              ^                                              '-persist_q-> CSV (to_thread)
+                 timer -------'  (closes the minute at the boundary)
+
+* ingest only folds each tick into a MultiTimeframeBars (open bars as plain floats,
+  O(1) per tick), so it keeps pace with the feed whatever happens at minute close.
+  Pass `bars=` to carry extra timeframes. Their on_close listeners run on the loop,
+  so heavy consumers should hand off the same way minute work does.
+* the timer task closes the minute at boundary + close_grace_s even if no tick arrives.
+  A tick already in the next minute closes it earlier. Ticks for a minute that has
+  already closed are counted as late and dropped.
+* minute work (GARCH update, features, null checks, state machine) runs on a
+  single-thread executor. It is serialized, so garch/sm need no locks. Polars and the
+  nogil numba kernels release the GIL while they run, so the loop keeps ingesting.
+* queues are bounded. A full tick buffer drops its oldest tick and counts it: a
+  stale tick is worth less than a fresh one. render_q does the same. Closed bars are
+  never dropped, because GARCH and the state machine must see every bar. A full bar_q
+  makes ingest wait, and the tick buffer absorbs the overload meanwhile. persist_q
+  applies backpressure to minute work only.
+
+MinuteWork is the per-bar step shared with app.py's synchronous loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import polars as pl
+
+from .core_contracts import Bar, Features, IVcontext, StateSnapshot, Tick
+from .multi_bars import MultiTimeframeBars
+
+_REQUIRED = ["donch_width", "atr_ratio", "slope", "pressure", "tr", "atr20", "hh20", "ll20"]
+_MINUTE = timedelta(minutes=1)
+
+
+def _floor_minute(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+# ---------- per-bar work (shared with the sync loop) ----------
+
+@dataclass
+class MinuteResult:
+    now: datetime
+    bar: Bar
+    feats: Features
+    iv: IVcontext
+    snap: StateSnapshot
+    hb_age_s: float
+    cdn_up_left: int
+    cdn_dn_left: int
+
+
+class MinuteWork:
+    """
+    One finalized bar through GARCH, features and the state machine.
+    Returns None while the features are warming up. iv_fn gives the current
+    IVcontext (vix.context or ivctx.empty).
+    """
+
+    def __init__(self, feats, garch, sm, iv_fn: Callable[[], IVcontext]):
+        self.feats = feats
+        self.garch = garch
+        self.sm = sm
+        self.iv_fn = iv_fn
+
+    def __call__(self, bar: dict, window: pl.DataFrame, hb_age_s: float) -> Optional[MinuteResult]:
+        # O(1) variance recursion on every finalized bar, even during feature warmup
+        g = self.garch.update(bar["close"])
+
+        fd = self.feats.compute(window)
+        if fd.height == 0:
+            return None
+        last = fd.select(_REQUIRED).row(-1, named=True)
+        if any(v is None for v in last.values()):
+            return None
+
+        b = Bar(ts_close=bar["ts_close"], open=bar["open"], high=bar["high"], low=bar["low"],
+                close=bar["close"], volume=bar["volume"], tr=float(last["tr"]), atr20=float(last["atr20"]),
+                hh20=float(last["hh20"]), ll20=float(last["ll20"]))
+        f = Features(float(last["donch_width"]), float(last["atr_ratio"]), float(last["slope"]),
+                     float(last["pressure"]), g["garch_var"], g["garch_fvar"])
+        iv = self.iv_fn()
+        now = b.ts_close
+        snap = self.sm.step(bar=b, f=f, iv=iv, now=now, heartbeat_age_s=hb_age_s, is_expiry_day=False)
+        up, dn = self.sm._cooldown_left(now)
+        return MinuteResult(now, b, f, iv, snap, hb_age_s, up, dn)
+
+
+# ---------- clocks ----------
+
+class WallClock:
+    """Live exchange time (UTC-aware, like KiteFeed's ticks)."""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def real_seconds(self, exch_seconds: float) -> float:
+        return exch_seconds
+
+
+class WarpClock:
+    """Exchange time running `warp` x wall time from `start`, for replays and benchmarks."""
+
+    def __init__(self, start: datetime, warp: float = 60.0):
+        self.start = start
+        self.warp = float(warp)
+        self._t0 = time.monotonic()
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=(time.monotonic() - self._t0) * self.warp)
+
+    def real_seconds(self, exch_seconds: float) -> float:
+        return exch_seconds / self.warp
+
+
+# ---------- pipeline ----------
+
+def _put_latest(q: asyncio.Queue, item) -> bool:
+    """put_nowait, evicting the oldest item when full. False if something was dropped."""
+    dropped = False
+    while True:
+        try:
+            q.put_nowait(item)
+            return not dropped
+        except asyncio.QueueFull:
+            q.get_nowait()
+            q.task_done()
+            dropped = True
+
+
+class AsyncMomentumPipeline:
+    """
+    Staged asyncio runtime around a MinuteWork.
+
+    ticks come from put_tick (thread-safe, e.g. a KiteTicker callback) or from a
+    blocking iterator pumped on a daemon thread (run(ticks=feed.subscribe(sym))).
+    render_fn takes app.py's render arguments; persist_fn(MinuteResult) runs off the
+    loop via asyncio.to_thread.
+    """
+
+    def __init__(self, work: MinuteWork, window_minutes: int = 20, bars: Optional[MultiTimeframeBars] = None,
+                 heartbeat_age: Callable[[], float] = lambda: 0.0,
+                 render_fn: Optional[Callable] = None, persist_fn: Optional[Callable[[MinuteResult], None]] = None,
+                 clock=None, close_grace_s: float = 0.25, tick_buffer: int = 100_000,
+                 bar_queue: int = 8, out_queue: int = 64, latency_samples: int = 1 << 16):
+        self.work = work
+        self.bars = bars or MultiTimeframeBars(("1m",), capacity=max(256, 4 * window_minutes), window=window_minutes)
+        self.heartbeat_age = heartbeat_age
+        self.render_fn = render_fn
+        self.persist_fn = persist_fn
+        self.clock = clock or WallClock()
+        self.close_grace_s = close_grace_s
+        self.bar_queue, self.out_queue = bar_queue, out_queue
+        m1 = self.bars.rings["1m"]
+        if m1.capacity < self.bars.window + bar_queue + 2:   # queued + running + the one being emitted
+            raise ValueError(f"1m ring capacity {m1.capacity} too small for window {self.bars.window} "
+                             f"and bar_queue {bar_queue}")
+
+        self._ticks: deque = deque(maxlen=tick_buffer)
+        self._wake: Optional[asyncio.Event] = None
+        self._wake_pending = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="minute-work")
+        self._stop: Optional[asyncio.Event] = None
+        self._held: list = []
+
+        # stats: ingest latency ring (enqueue -> folded into the bar, ns)
+        size = 1 << max(latency_samples - 1, 1).bit_length()   # power of two for the ring mask
+        self._lat = np.zeros(size, dtype=np.int64)
+        self._lat_ts = np.zeros(size, dtype=np.int64)
+        self._n_lat = 0
+        self.ticks_in = self.ticks_done = self.ticks_dropped = 0
+        self.bars_closed = self.bars_by_timer = self.bar_waits = 0
+        self.minutes_done = self.renders_dropped = 0
+        self.minute_ns: list = []
+        self.persist_ns: list = []
+
+    # ---- feed side (any thread) ----
+
+    def put_tick(self, tick: Tick) -> None:
+        q = self._ticks
+        if len(q) == q.maxlen:
+            self.ticks_dropped += 1
+        q.append((time.perf_counter_ns(), tick))
+        self.ticks_in += 1
+        if not self._wake_pending and self._loop is not None:
+            self._wake_pending = True
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _pump(self, ticks: Iterable[Tick]) -> None:
+        for t in ticks:
+            if self._stop.is_set():
+                break
+            self.put_tick(t)
+
+    # ---- stages ----
+
+    async def _ingest(self) -> None:
+        q, bars, wake = self._ticks, self.bars, self._wake
+        lat, lat_ts, mask = self._lat, self._lat_ts, self._lat.size - 1
+        clock = time.perf_counter_ns
+        while True:
+            await wake.wait()
+            wake.clear()
+            self._wake_pending = False
+            n = 0
+            while q:
+                t_in, tick = q.popleft()
+                if bars.update(tick.ts, float(tick.last), float(tick.volume or 0.0)) and bars.minute_ready():
+                    await self._emit()
+                now = clock()
+                i = self._n_lat & mask
+                lat[i] = now - t_in
+                lat_ts[i] = now
+                self._n_lat += 1
+                n += 1
+                if n & 1023 == 0:
+                    self.ticks_done += n
+                    n = 0
+                    await asyncio.sleep(0)   # let the timer and consumers in during a burst
+            self.ticks_done += n
+
+    async def _timer(self) -> None:
+        clock, grace = self.clock, timedelta(seconds=self.close_grace_s)
+        while True:
+            now = clock.now()
+            due = _floor_minute(now) + _MINUTE + grace
+            await asyncio.sleep(max(0.0, clock.real_seconds((due - now).total_seconds())))
+            self.bars.close_until(clock.now() - grace)
+            if self.bars.minute_ready():
+                self.bars_by_timer += 1
+                await self._emit()
+
+    async def _emit(self) -> None:
+        # the window frame is a zero-copy view of the 1m ring; __init__ checks the ring
+        # is big enough that queued and running windows can't be overwritten
+        bar, window = self.bars.finalize_bar()
+        self.bars_closed += 1
+        item = (bar, window, self.heartbeat_age())
+        if self._bar_q.full():
+            self.bar_waits += 1
+        try:
+            await self._bar_q.put(item)
+        except asyncio.CancelledError:
+            self._held.append(item)    # shutdown while waiting: run() still drains it
+            raise
+
+    async def _compute(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            bar, window, hb = await self._bar_q.get()
+            t0 = time.perf_counter_ns()
+            try:
+                res = await loop.run_in_executor(self._executor, self.work, bar, window, hb)
+            finally:
+                self.minute_ns.append(time.perf_counter_ns() - t0)
+                self._bar_q.task_done()
+            self.minutes_done += 1
+            if res is None:
+                continue
+            if self.render_fn is not None and not _put_latest(self._render_q, res):
+                self.renders_dropped += 1
+            if self.persist_fn is not None:
+                await self._persist_q.put(res)
+
+    async def _render(self) -> None:
+        while True:
+            r = await self._render_q.get()
+            try:
+                self.render_fn(r.now, r.bar, r.feats, r.iv, r.snap, r.hb_age_s, r.cdn_up_left, r.cdn_dn_left)
+            finally:
+                self._render_q.task_done()
+
+    async def _persist(self) -> None:
+        while True:
+            r = await self._persist_q.get()
+            t0 = time.perf_counter_ns()
+            try:
+                await asyncio.to_thread(self.persist_fn, r)
+            finally:
+                self.persist_ns.append(time.perf_counter_ns() - t0)
+                self._persist_q.task_done()
+
+    # ---- lifecycle ----
+
+    async def run(self, ticks: Optional[Iterable[Tick]] = None, duration_s: Optional[float] = None) -> dict:
+        """Run until stop() (or duration_s); then drain the downstream queues and return stats()."""
+        self._loop = asyncio.get_running_loop()
+        self._wake, self._stop = asyncio.Event(), asyncio.Event()
+        self._bar_q = asyncio.Queue(self.bar_queue)
+        self._render_q = asyncio.Queue(self.out_queue)
+        self._persist_q = asyncio.Queue(self.out_queue)
+        if self._ticks:
+            self._wake.set()
+
+        front = [asyncio.create_task(self._ingest()), asyncio.create_task(self._timer())]
+        back = [asyncio.create_task(self._compute())]
+        if self.render_fn is not None:
+            back.append(asyncio.create_task(self._render()))
+        if self.persist_fn is not None:
+            back.append(asyncio.create_task(self._persist()))
+
+        if ticks is not None:
+            threading.Thread(target=self._pump, args=(ticks,), name="tick-pump", daemon=True).start()
+        try:
+            if duration_s is None:
+                await self._stop.wait()
+            else:
+                await asyncio.wait_for(self._stop.wait(), duration_s)
+        except asyncio.TimeoutError:
+            self._stop.set()
+        finally:
+            for t in front:
+                t.cancel()
+            await asyncio.gather(*front, return_exceptions=True)
+            for item in sorted(self._held, key=lambda it: it[0]["ts_close"]):
+                await self._bar_q.put(item)
+            self._held.clear()
+            await self._bar_q.join()
+            await self._render_q.join()
+            await self._persist_q.join()
+            for t in back:
+                t.cancel()
+            await asyncio.gather(*back, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+        return self.stats()
+
+    def stop(self) -> None:
+        """Thread-safe."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def ingest_latency(self) -> tuple[np.ndarray, np.ndarray]:
+        """(latency_ns, completion perf_counter_ns) of the most recent ingested ticks."""
+        n = min(self._n_lat, self._lat.size)
+        if self._n_lat <= self._lat.size:
+            return self._lat[:n].copy(), self._lat_ts[:n].copy()
+        i = self._n_lat & (self._lat.size - 1)
+        return np.roll(self._lat, -i), np.roll(self._lat_ts, -i)
+
+    def stats(self) -> dict:
+        return {
+            "ticks_in": self.ticks_in, "ticks_done": self.ticks_done, "ticks_dropped": self.ticks_dropped,
+            "late_ticks": self.bars.late, "bars_closed": self.bars_closed, "bars_by_timer": self.bars_by_timer,
+            "bar_waits": self.bar_waits, "minutes_done": self.minutes_done,
+            "renders_dropped": self.renders_dropped,
+        }
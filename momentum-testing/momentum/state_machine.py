@@ -1,8 +1,9 @@
-from dataclasses import dataclass
 from collections import deque
 from datetime import datetime, timedelta
 from typing import Deque, Optional, Tuple
 
+from .core_contracts import Bar, Features, IVcontext, StateSnapshot
+
 #State Definitions 
 STATE_NEUTRAL = "NEUTRAL"
 STATE_COILING = "COILING"
@@ -27,37 +28,6 @@ R_ARMED_DN_OK = "ARMED_DOWN_OK"
 R_COILING_OK = "COILING_OK"
 R_IDLE = "IDLE"
 
-@dataclass
-class Bar: 
-    ts_close : datetime 
-    open: float 
-    high: float 
-    low: float 
-    close: float 
-    volume: float 
-    tr: float
-    atr20: float 
-    hh20: float
-    ll20 = float
-
-class Features: 
-    donch_width: float 
-    atr_ratio: float 
-    slope: float 
-    pressure: float 
-
-class IVcontext: 
-    atm_iv: Optional [float]
-    percentile: Optional [float]
-    updated_ts: Optional [float]
-    quality: str
-
-class StateSnapshot: 
-    state: str 
-    reason: str
-    direction: str 
-    cooldown_remaining_min: str
-
 class SimpleStateMachine: 
 
     def __init__(self, cfg: dict, clock) -> None:
@@ -79,7 +49,7 @@ class SimpleStateMachine:
 
         coiling = self._is_coiling (f)
         armed_up, armed_dn = self._is_armed (f, coiling)
-        break_up, break_dn, dist_up_bps, dist_dn_bps = self._is_break(bar, f, coiling)
+        break_up, break_dn, dist_up_bps, dist_dn_bps = self._is_break(bar, f)
 
         iv_ok_up, iv_ok_dn = self._iv_gate(iv)
 
@@ -92,14 +62,14 @@ class SimpleStateMachine:
         if break_up:
             if iv_ok_up: 
                 self._arm_cooldown("UP", now)
-                return self._snap(STATE_FIRE_UP, R_FIRE_UP, "UP", self.cfg["ops"]["cooldown_min"], cdn_left_up)
+                return self._snap(STATE_FIRE_UP, R_FIRE_UP, "UP", self.cfg["ops"]["cooldown_min"])
             else:
                 return self._snap(STATE_WATCH, R_IV_SUPPRESS_UP, "UP", 0)
             
         if break_dn:
             if iv_ok_dn: 
                 self._arm_cooldown("DOWN", now)
-                return self._snap(STATE_FIRE_DOWN, R_FIRE_DOWN, "DOWN", self.cfg["ops"]["cooldown_min"], cdn_left_dn)
+                return self._snap(STATE_FIRE_DOWN, R_FIRE_DOWN, "DOWN", self.cfg["ops"]["cooldown_min"])
             else:
                 return self._snap(STATE_WATCH, R_IV_SUPPRESS_DOWN, "DOWN", 0)
         
@@ -0,0 +1,355 @@
+# momentum/variance_index.py
+"""
+Live 30-day model-free implied variance index (VIX-style) for NIFTY.
+
+Every tracked expiry keeps its chain as arrays over the listed strikes: call and put
+mids, the OTM price Q(K) used by the variance sum (put below K0, call above, the
+average at K0), and the running sum S = sum dK/K^2 * Q(K). A cycle (about 1 Hz)
+drains the quote source, keeps the newest quote per instrument, and re-prices only
+those strikes: S moves by w * (Q_new - Q_old). The forward comes from put-call parity
+at the strike where |C - P| is smallest. That strike is found by walking from the
+previous one, and when K0 moves only the strikes between the old and new K0 switch
+sides. Per slice:
+
+    var = 2/T e^{rT} S - 1/T (F/K0 - 1)^2
+
+The near and next expiries that bracket `tenor_days` are blended in total variance,
+as in the CBOE method. Strike weights use central dK, not the first-put /
+first-call shortcuts of the offline `calculate_variance_strike`.
+
+Work per cycle is bounded by the number of instruments whose quotes changed
+(coalescing caps it at the chain size, whatever the tick rate). Expiries outside
+the near/next pair only store mids. A full
+recompute every `resync_every` cycles clears float drift from the incremental
+sums. Cycle latencies are kept for `stats()`.
+
+The result is published into IVcontextNumba, so IVcontext.percentile is the index's
+rank over the lookback window. The state machine's `_iv_gate` reads it unchanged.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .core_contracts import IVcontext, OptionInstrument, OptionQuoteSource
+from .iv_context import IVcontextNumba
+
+YEAR_S = 365.0 * 86400.0
+
+
+@dataclass(frozen=True)
+class IndexValue:
+    ts: datetime
+    vol: float            # index level, percent
+    near_expiry: datetime
+    next_expiry: datetime
+    near_vol: float       # per-slice model-free vols, percent
+    next_vol: float
+    forward: float        # near-slice parity forward
+
+
+class _Slice:
+    """One expiry's chain and its incremental variance sum."""
+
+    def __init__(self, expiry: datetime, strikes: np.ndarray):
+        K = np.unique(np.asarray(strikes, dtype=np.float64))
+        if K.size < 3:
+            raise ValueError(f"expiry {expiry:%Y-%m-%d} has fewer than 3 strikes")
+        self.expiry = expiry
+        self.K = K
+        dK = np.empty(K.size)
+        dK[1:-1] = (K[2:] - K[:-2]) / 2
+        dK[0], dK[-1] = K[1] - K[0], K[-1] - K[-2]
+        self.w = dK / K ** 2
+        self.cmid = np.full(K.size, np.nan)
+        self.pmid = np.full(K.size, np.nan)
+        self.Q = np.zeros(K.size)
+        self.S = 0.0
+        self.n_valid = 0          # strikes with a usable OTM price
+        self.j0 = -1              # index of K0; -1 until the first forward, or while not in use
+        self.kf = K.size // 2     # parity strike, walked from here
+        self.F = math.nan
+
+    # ---------- quotes ----------
+    def _q(self, i: np.ndarray) -> np.ndarray:
+        c, p = self.cmid[i], self.pmid[i]
+        atm = np.where(np.isnan(c), p, np.where(np.isnan(p), c, 0.5 * (c + p)))
+        q = np.where(i < self.j0, p, np.where(i > self.j0, c, atm))
+        return np.nan_to_num(q, nan=0.0)
+
+    def _requote(self, i: np.ndarray) -> None:
+        q = self._q(i)
+        old = self.Q[i]
+        self.S += float(self.w[i] @ (q - old))
+        self.n_valid += int(np.count_nonzero(q)) - int(np.count_nonzero(old))
+        self.Q[i] = q
+
+    def apply(self, idx: np.ndarray, is_call: np.ndarray, mid: np.ndarray) -> None:
+        """
+        Set mids (NaN = no usable quote) and re-price just those strikes. (idx, is_call)
+        pairs are unique. Slices not in use (j0 < 0) only store mids.
+        """
+        self.cmid[idx[is_call]] = mid[is_call]
+        self.pmid[idx[~is_call]] = mid[~is_call]
+        if self.j0 >= 0:
+            self._requote(np.unique(idx))
+
+    def resync(self) -> float:
+        """Full recompute of Q and S; returns the relative drift of the incremental sum."""
+        before = self.S
+        self.Q = self._q(np.arange(self.K.size))
+        self.S = float(self.w @ self.Q)
+        self.n_valid = int(np.count_nonzero(self.Q))
+        return abs(before - self.S) / self.S if self.S > 0 else 0.0
+
+    # ---------- forward / variance ----------
+    def _gap(self, i: int) -> float:
+        g = abs(self.cmid[i] - self.pmid[i])
+        return g if g == g else math.inf
+
+    def reposition(self, growth: float) -> bool:
+        """Update the parity forward and K0; False if there's no strike with both sides quoted."""
+        k, n = self.kf, self.K.size
+        if self._gap(k) == math.inf:
+            gaps = np.abs(self.cmid - self.pmid)
+            if np.all(np.isnan(gaps)):
+                return False
+            k = int(np.nanargmin(gaps))
+        while k > 0 and self._gap(k - 1) < self._gap(k):
+            k -= 1
+        while k < n - 1 and self._gap(k + 1) < self._gap(k):
+            k += 1
+        self.kf = k
+        self.F = self.K[k] + growth * (self.cmid[k] - self.pmid[k])
+        j0 = int(np.searchsorted(self.K, self.F, side="right")) - 1
+        if j0 < 0:
+            return False
+        if self.j0 < 0:
+            self.j0 = j0
+            self.resync()
+        elif j0 != self.j0:
+            lo, hi = min(j0, self.j0), max(j0, self.j0)
+            self.j0 = j0
+            self._requote(np.arange(lo, hi + 1))
+        return True
+
+    def variance(self, T: float, growth: float) -> float:
+        K0 = self.K[self.j0]
+        return 2.0 / T * growth * self.S - (self.F / K0 - 1.0) ** 2 / T
+
+
+class LiveVarianceIndex:
+    """
+    Streaming index over an OptionQuoteSource (KiteOptionQuotes live,
+    SimulatedOptionQuotes offline). Call step() yourself or start() a 1 Hz
+    daemon thread. Either way the bar loop reads `context(now)`, which is a
+    single reference read of the last published IVcontext.
+    """
+
+    def __init__(self, source: OptionQuoteSource, r: float = 0.065, tenor_days: float = 30.0,
+                 interval_s: float = 1.0, ivctx: Optional[IVcontextNumba] = None, min_days: float = 1.0,
+                 min_strikes: int = 5, stale_after_s: float = 30.0, resync_every: int = 300,
+                 budget_ms: float = 50.0, history: int = 3600):
+        self.source = source
+        self.r = float(r)
+        self.tenor = tenor_days * 86400.0 / YEAR_S
+        self.interval_s = float(interval_s)
+        self.ivctx = ivctx or IVcontextNumba()
+        self.min_T = min_days * 86400.0 / YEAR_S
+        self.min_strikes = int(min_strikes)
+        self.stale_after_s = float(stale_after_s)
+        self.resync_every = int(resync_every)
+        self.budget_ns = budget_ms * 1e6
+
+        self._slices: List[_Slice] = []
+        self._loc: Dict[int, Tuple[_Slice, int, bool]] = {}
+        self._build(source.instruments())
+
+        self.value: Optional[IndexValue] = None
+        self._ctx = self.ivctx.empty()
+        self._last_quote_ts: Optional[datetime] = None
+
+        self._lat = np.zeros(history)
+        self.cycles = 0
+        self.quotes_applied = 0
+        self.max_quotes_cycle = 0
+        self.overruns = 0
+        self.max_drift = 0.0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _build(self, instruments: List[OptionInstrument]) -> None:
+        by_exp: Dict[datetime, List[OptionInstrument]] = {}
+        for ins in instruments:
+            by_exp.setdefault(ins.expiry, []).append(ins)
+        for exp in sorted(by_exp):
+            lst = by_exp[exp]
+            s = _Slice(exp, [i.strike for i in lst])
+            self._slices.append(s)
+            pos = np.searchsorted(s.K, [i.strike for i in lst])
+            for ins, j in zip(lst, pos):
+                self._loc[ins.token] = (s, int(j), ins.is_call)
+
+    # ---------- cycle ----------
+    def step(self, now: Optional[datetime] = None) -> IVcontext:
+        """Drain quotes, update the touched strikes, recompute and publish the index."""
+        now = now or datetime.now(timezone.utc)
+        quotes = self.source.poll()
+        t0 = time.perf_counter_ns()   # the source's own cost isn't ours
+
+        latest = {}
+        for q in quotes:
+            latest[q.token] = q
+        touched: Dict[_Slice, Tuple[list, list, list]] = {}
+        newest = self._last_quote_ts
+        for tok, q in latest.items():
+            loc = self._loc.get(tok)
+            if loc is None:
+                continue
+            s, j, is_call = loc
+            ok = q.bid > 0 and q.ask >= q.bid
+            idx, side, mid = touched.setdefault(s, ([], [], []))
+            idx.append(j)
+            side.append(is_call)
+            mid.append(0.5 * (q.bid + q.ask) if ok else math.nan)
+            if newest is None or q.ts > newest:
+                newest = q.ts
+        self._last_quote_ts = newest
+        for s, (idx, side, mid) in touched.items():
+            s.apply(np.array(idx), np.array(side, dtype=bool), np.array(mid))
+
+        self.cycles += 1
+        if self.cycles % self.resync_every == 0:
+            for s in self._slices:
+                if s.j0 >= 0:
+                    self.max_drift = max(self.max_drift, s.resync())
+
+        self._publish(now)
+
+        n_q = len(latest)
+        self.quotes_applied += n_q
+        self.max_quotes_cycle = max(self.max_quotes_cycle, n_q)
+        dt = time.perf_counter_ns() - t0
+        self._lat[(self.cycles - 1) % self._lat.size] = dt
+        if dt > self.budget_ns:
+            self.overruns += 1
+        return self._ctx
+
+    def _pair(self, now: datetime) -> Optional[Tuple[_Slice, float, _Slice, float]]:
+        """Near/next expiries around the tenor (or the two closest to it when it isn't bracketed)."""
+        live = [(s, (s.expiry - now).total_seconds() / YEAR_S) for s in self._slices]
+        live = [(s, T) for s, T in live if T >= self.min_T]
+        if len(live) < 2:
+            return None
+        k = sum(1 for _, T in live if T <= self.tenor)
+        k = min(max(k, 1), len(live) - 1)
+        (s1, T1), (s2, T2) = live[k - 1], live[k]
+        # slices that rolled out of use stop maintaining sums; they resync on the way back in
+        for s in self._slices:
+            if s is not s1 and s is not s2:
+                s.j0 = -1
+        return s1, T1, s2, T2
+
+    def _slice_var(self, s: _Slice, T: float) -> Optional[float]:
+        growth = math.exp(self.r * T)
+        if not s.reposition(growth) or s.n_valid < self.min_strikes:
+            return None
+        v = s.variance(T, growth)
+        return v if v > 0 else None
+
+    def _publish(self, now: datetime) -> None:
+        pair = self._pair(now)
+        quote_age = math.inf if self._last_quote_ts is None else (now - self._last_quote_ts).total_seconds()
+        if pair is None:
+            self._ctx = self.ivctx.empty()
+            return
+        s1, T1, s2, T2 = pair
+        v1, v2 = self._slice_var(s1, T1), self._slice_var(s2, T2)
+        if v1 is None or v2 is None:
+            self._ctx = self.ivctx.empty()
+            return
+        if quote_age > self.stale_after_s:
+            # keep the last level and rank, but let the gate know it's old
+            c = self._ctx
+            self._ctx = IVcontext(atm_iv=c.atm_iv, percentile=c.percentile, updated_ts=c.updated_ts, quality="STALE")
+            return
+        Tt = self.tenor
+        w1 = (T2 - Tt) / (T2 - T1)
+        var = (T1 * v1 * w1 + T2 * v2 * (1.0 - w1)) / Tt
+        if var <= 0:
+            self._ctx = self.ivctx.empty()
+            return
+        vol = 100.0 * math.sqrt(var)
+        self.value = IndexValue(ts=now, vol=vol, near_expiry=s1.expiry, next_expiry=s2.expiry,
+                                near_vol=100.0 * math.sqrt(v1), next_vol=100.0 * math.sqrt(v2), forward=s1.F)
+        self._ctx = self.ivctx.update(vol, now, now=now)
+
+    def context(self, now: Optional[datetime] = None) -> IVcontext:
+        """Latest IVcontext; STALE if the publisher hasn't produced one for `stale_after_s`."""
+        c = self._ctx
+        if c.updated_ts is None or c.quality != "OK":
+            return c
+        now = now or datetime.now(timezone.utc)
+        if (now - c.updated_ts).total_seconds() > self.stale_after_s:
+            return IVcontext(atm_iv=c.atm_iv, percentile=c.percentile, updated_ts=c.updated_ts, quality="STALE")
+        return c
+
+    def full_recompute(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Index level from scratch on the current quotes (for checking the incremental path)."""
+        now = now or datetime.now(timezone.utc)
+        pair = self._pair(now)
+        if pair is None:
+            return None
+        s1, T1, s2, T2 = pair
+        for s in (s1, s2):
+            if s.j0 >= 0:
+                s.resync()
+        v1, v2 = self._slice_var(s1, T1), self._slice_var(s2, T2)
+        if v1 is None or v2 is None:
+            return None
+        w1 = (T2 - self.tenor) / (T2 - T1)
+        return 100.0 * math.sqrt((T1 * v1 * w1 + T2 * v2 * (1.0 - w1)) / self.tenor)
+
+    # ---------- background loop ----------
+    def start(self) -> "LiveVarianceIndex":
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="variance-index", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                self.step()
+            except Exception as e:  # keep publishing; the context goes STALE on its own if this persists
+                self.last_error = repr(e)
+            self._stop.wait(max(0.0, self.interval_s - (time.perf_counter() - t0)))
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------- cost ----------
+    def stats(self) -> dict:
+        n = min(self.cycles, self._lat.size)
+        lat = self._lat[:n] / 1e3 if n else np.zeros(1)
+        return {
+            "cycles": self.cycles,
+            "p50_us": float(np.percentile(lat, 50)),
+            "p99_us": float(np.percentile(lat, 99)),
+            "max_us": float(lat.max()),
+            "overruns": self.overruns,
+            "quotes_applied": self.quotes_applied,
+            "max_quotes_cycle": self.max_quotes_cycle,
+            "instruments": len(self._loc),
+            "max_resync_drift": self.max_drift,
+        }
@@ -0,0 +1,240 @@
+# quantfin/fhs.py
+"""
+Filtered historical simulation VaR / Expected Shortfall for a weight portfolio.
+
+Each asset gets a GARCH(1,1) (quantfin.garch). Its returns are standardized by their
+conditional vol, and the residual matrix z (days x assets) is what gets resampled.
+Whole rows are drawn, so the cross-sectional dependence of a day is kept. A
+scenario path re-runs every asset's variance recursion from today's conditional
+variance:
+
+    e = sqrt(h) z[row],  R += mu + e,  h = omega + alpha e^2 + beta h
+
+and the portfolio is revalued at each requested horizon as sum w (e^R - 1).
+
+* the path kernel is numba with nogil: scenario chunks run on a thread pool and
+  share z without copies. Each chunk draws its rows from its own SeedSequence child,
+  so results don't depend on the thread count;
+* update() takes one new day of returns: one residual into a ring buffer and one
+  variance step per asset. Refits (warm-started, process pool across assets) run
+  every `refit_every` updates, or on demand.
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from .garch import GarchParams, fit_garch11, garch11_filter
+
+
+# ---------- kernels ----------
+
+@njit(cache=True, nogil=True)
+def _fhs_paths(z, idx, w, mu, omega, alpha, beta, h0, horizons, out):
+    """out[s, k] = portfolio return of scenario s at day horizons[k] (horizons sorted, 1-based)."""
+    n, H = idx.shape
+    N = w.size
+    h = np.empty(N)
+    R = np.empty(N)
+    for s in range(n):
+        for i in range(N):
+            h[i] = h0[i]
+            R[i] = 0.0
+        k = 0
+        for d in range(H):
+            row = idx[s, d]
+            for i in range(N):
+                e = math.sqrt(h[i]) * z[row, i]
+                R[i] += mu[i] + e
+                h[i] = omega[i] + alpha[i] * e * e + beta[i] * h[i]
+            if k < horizons.size and d + 1 == horizons[k]:
+                v = 0.0
+                for i in range(N):
+                    v += w[i] * (math.exp(R[i]) - 1.0)
+                out[s, k] = v
+                k += 1
+
+
+def _fit_one(args):
+    r, x0 = args
+    try:
+        return fit_garch11(r, x0)
+    except (ValueError, FloatingPointError):
+        v = float(np.nanvar(r)) or 1e-8
+        return GarchParams(mu=float(np.nanmean(r)), omega=v, alpha=0.0, beta=0.0)
+
+
+def var_es(pnl: np.ndarray, alpha: float):
+    """(VaR, ES) as positive losses at confidence `alpha` (e.g. 0.99)."""
+    q = np.quantile(pnl, 1.0 - alpha)
+    tail = pnl[pnl <= q]
+    return float(-q), float(-tail.mean()) if tail.size else float(-q)
+
+
+class FHSEngine:
+    """
+    fit() once on a returns history (assets as columns), update() every day, and
+    risk() / simulate() whenever needed.
+    """
+
+    def __init__(self, window: int = 1000, refit_every: int = 20, max_workers: Optional[int] = None):
+        self.window = int(window)
+        self.refit_every = int(refit_every)
+        self.max_workers = max_workers
+        self.assets: List[str] = []
+        self.params: List[GarchParams] = []
+        self._z: Optional[np.ndarray] = None      # ring of standardized residuals (window, N)
+        self._r: Optional[np.ndarray] = None      # raw returns, same ring (for refits)
+        self._n = 0                               # rows written in total
+        self._h: Optional[np.ndarray] = None      # next-day conditional variance per asset
+        self.last_date = None
+        self.updates_since_fit = 0
+        self.fit_seconds = 0.0
+
+    # ---------- calibration ----------
+    @property
+    def n_assets(self) -> int:
+        return len(self.assets)
+
+    @property
+    def n_days(self) -> int:
+        return min(self._n, self.window)
+
+    def _history(self) -> np.ndarray:
+        """Raw returns in time order."""
+        n, W = self._n, self.window
+        if n <= W:
+            return self._r[:n]
+        i = n % W
+        return np.concatenate((self._r[i:], self._r[:i]))
+
+    def _require_fit(self, what: str) -> None:
+        if self._h is None:
+            raise RuntimeError(f"FHSEngine.{what}() called before fit()")
+
+    def fit(self, log_returns: pd.DataFrame) -> "FHSEngine":
+        """
+        Fit every asset on the last `window` days and build the residual matrix. Days
+        with a missing or non-finite return for any asset are dropped first (rows are
+        resampled whole, so every asset needs a value).
+        """
+        log_returns = log_returns.replace([np.inf, -np.inf], np.nan).dropna()
+        if len(log_returns) < 10:
+            raise ValueError(f"need at least 10 complete days of returns to fit, got {len(log_returns)}")
+        r = log_returns.to_numpy(np.float64)[-self.window:]
+        self.assets = list(log_returns.columns)
+        self._r = np.zeros((self.window, r.shape[1]))
+        self._r[:len(r)] = r
+        self._n = len(r)
+        self.last_date = log_returns.index[-1]
+        self._refit(warm=False)
+        return self
+
+    def _refit(self, warm: bool = True) -> None:
+        t0 = time.perf_counter()
+        hist = self._history()
+        x0 = self.params if (warm and self.params) else [None] * hist.shape[1]
+        jobs = [(np.ascontiguousarray(hist[:, i]), x0[i]) for i in range(hist.shape[1])]
+        if self.max_workers == 1:
+            params = [_fit_one(j) for j in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as ex:
+                params = list(ex.map(_fit_one, jobs, chunksize=max(1, len(jobs) // 64)))
+        z = np.empty_like(hist)
+        h = np.empty(hist.shape[1])
+        for i, p in enumerate(params):
+            path = garch11_filter(jobs[i][0], p.mu, p.omega, p.alpha, p.beta, float(np.var(jobs[i][0])))
+            z[:, i] = (jobs[i][0] - p.mu) / np.sqrt(path[:-1])
+            h[i] = path[-1]
+        self.params = params
+        # residuals go back into the ring in time order, starting at row 0
+        self._z = np.zeros((self.window, len(params)))
+        self._z[:len(z)] = z
+        self._r = np.zeros((self.window, len(params)))
+        self._r[:len(hist)] = hist
+        self._n = len(hist)
+        self._h = h
+        self._arrays()
+        self.updates_since_fit = 0
+        self.fit_seconds = time.perf_counter() - t0
+
+    def _arrays(self) -> None:
+        ps = self.params
+        self._mu = np.array([p.mu for p in ps])
+        self._omega = np.array([p.omega for p in ps])
+        self._alpha = np.array([p.alpha for p in ps])
+        self._beta = np.array([p.beta for p in ps])
+
+    def refit(self) -> None:
+        self._refit(warm=True)
+
+    # ---------- daily ----------
+    def update(self, returns_row, date=None) -> None:
+        """One new day of log returns (Series aligned by asset, or array in asset order)."""
+        self._require_fit("update")
+        if isinstance(returns_row, pd.Series):
+            returns_row = returns_row.reindex(self.assets)
+        r = np.asarray(returns_row, dtype=np.float64)
+        r = np.where(np.isfinite(r), r, self._mu)          # a missing print counts as an average day
+        e = r - self._mu
+        j = self._n % self.window
+        self._z[j] = e / np.sqrt(self._h)
+        self._r[j] = r
+        self._n += 1
+        self._h = self._omega + self._alpha * e * e + self._beta * self._h
+        self.last_date = date
+        self.updates_since_fit += 1
+        if self.refit_every and self.updates_since_fit >= self.refit_every:
+            self.refit()
+
+    def current_vol(self) -> pd.Series:
+        """Next-day conditional vol per asset (daily units)."""
+        self._require_fit("current_vol")
+        return pd.Series(np.sqrt(self._h), index=self.assets)
+
+    # ---------- simulation ----------
+    def simulate(self, weights, n_scenarios: int = 100_000, horizons: Sequence[int] = (1, 10),
+                 chunk_size: int = 10_000, max_workers: Optional[int] = None, seed: int = 0) -> Dict[int, np.ndarray]:
+        """Portfolio return per scenario for each horizon (days)."""
+        self._require_fit("simulate")
+        w = np.ascontiguousarray(weights, dtype=np.float64)
+        if w.size != self.n_assets:
+            raise ValueError(f"{w.size} weights for {self.n_assets} assets")
+        hz = np.array(sorted(set(int(h) for h in horizons)), dtype=np.int64)
+        H = int(hz[-1])
+        z = self._z[:self.n_days]
+        out = np.empty((n_scenarios, hz.size))
+        starts = list(range(0, n_scenarios, chunk_size))
+        seeds = np.random.SeedSequence(seed).spawn(len(starts))
+        args = (w, self._mu, self._omega, self._alpha, self._beta, self._h, hz)
+
+        def run(k):
+            a = starts[k]
+            b = min(a + chunk_size, n_scenarios)
+            idx = np.random.default_rng(seeds[k]).integers(0, z.shape[0], size=(b - a, H))
+            _fhs_paths(z, idx, *args, out[a:b])
+
+        if max_workers == 1 or len(starts) == 1:
+            for k in range(len(starts)):
+                run(k)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                list(ex.map(run, range(len(starts))))
+        return {int(h): out[:, i] for i, h in enumerate(hz)}
+
+    def risk(self, weights, value: float = 1.0, alphas: Sequence[float] = (0.99, 0.975),
+             horizons: Sequence[int] = (1, 10), n_scenarios: int = 100_000, **kw) -> pd.DataFrame:
+        """VaR / ES in currency for a portfolio worth `value`; one row per (horizon, alpha)."""
+        sims = self.simulate(weights, n_scenarios, horizons, **kw)
+        rows = []
+        for h, ret in sims.items():
+            pnl = value * ret
+            for a in alphas:
+                v, es = var_es(pnl, a)
+                rows.append({"horizon_days": h, "alpha": a, "VaR": v, "ES": es,
+                             "VaR_pct": v / value, "ES_pct": es / value})
+        return pd.DataFrame(rows)
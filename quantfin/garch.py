@@ -0,0 +1,113 @@
+# quantfin/garch.py
+"""
+GARCH(1,1) with a constant mean, the model the GARCHVolatility notebook fits with
+`arch_model(returns, vol="Garch", p=1, q=1)`. Kept dependency-light (numpy/numba/scipy)
+so it can be refit thousands of times in a rolling study or inside worker processes.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numba import njit
+from scipy.optimize import minimize
+
+
+@dataclass(frozen=True)
+class GarchParams:
+    mu: float
+    omega: float
+    alpha: float
+    beta: float
+
+    @property
+    def persistence(self) -> float:
+        return self.alpha + self.beta
+
+    @property
+    def long_run_var(self) -> float:
+        return self.omega / max(1.0 - self.persistence, 1e-12)
+
+
+@njit(cache=True, nogil=True)
+def garch11_filter(r, mu, omega, alpha, beta, var0):
+    """Conditional variance path; out[i] is the variance for r[i], out[n] the one-step-ahead."""
+    n = r.size
+    out = np.empty(n + 1)
+    v = var0
+    for i in range(n):
+        out[i] = v
+        e = r[i] - mu
+        v = omega + alpha * e * e + beta * v
+    out[n] = v
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _nll(x, r, var0):
+    mu, omega, alpha, beta = x[0], x[1], x[2], x[3]
+    v = var0
+    nll = 0.0
+    for i in range(r.size):
+        e = r[i] - mu
+        nll += 0.5 * (math.log(2.0 * math.pi) + math.log(v) + e * e / v)
+        v = omega + alpha * e * e + beta * v
+        if v < 1e-12:
+            v = 1e-12
+    return nll
+
+
+def fit_garch11(returns, x0: Optional[GarchParams] = None, maxiter: int = 200) -> GarchParams:
+    """
+    Gaussian MLE. Returns are standardized to unit variance for the optimizer and the
+    params mapped back, so daily and intraday returns both behave. `x0` warm-starts.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[np.isfinite(r)]
+    if r.size < 10:
+        raise ValueError("need at least 10 returns to fit GARCH(1,1)")
+    scale = float(r.std()) or 1.0
+    z = r / scale
+
+    if x0 is None:
+        start = np.array([z.mean(), 0.05, 0.05, 0.90])
+    else:
+        start = np.array([x0.mu / scale, x0.omega / scale ** 2, x0.alpha, x0.beta])
+        start[1] = min(max(start[1], 1e-6), 10.0)
+
+    zmax = float(np.abs(z).max())
+    bounds = [(-zmax, zmax), (1e-6, 10.0), (0.0, 1.0), (0.0, 1.0)]
+    cons = ({"type": "ineq", "fun": lambda x: 0.9999 - x[2] - x[3]},)
+    res = minimize(_nll, start, args=(z, 1.0), method="SLSQP", bounds=bounds,
+                   constraints=cons, options={"maxiter": maxiter, "ftol": 1e-9})
+    mu, omega, alpha, beta = (float(v) for v in res.x)
+    return GarchParams(mu=mu * scale, omega=omega * scale ** 2, alpha=alpha, beta=beta)
+
+
+def conditional_variance(returns, p: GarchParams, var0: Optional[float] = None) -> np.ndarray:
+    """In-sample conditional variance (n+1 long; last entry is the next-period forecast)."""
+    r = np.ascontiguousarray(returns, dtype=np.float64)
+    if var0 is None:
+        var0 = float(np.var(r))
+    return garch11_filter(r, p.mu, p.omega, p.alpha, p.beta, var0)
+
+
+def forecast_path(p: GarchParams, var_next, h: int) -> np.ndarray:
+    """
+    Per-step variance forecasts for steps 1..h. `var_next` may be an array of one-step
+    variances (one per origin); the result is then (len(var_next), h).
+    """
+    vl = p.long_run_var
+    decay = p.persistence ** np.arange(h)
+    v = np.asarray(var_next, dtype=np.float64)
+    return vl + (v[..., None] - vl) * decay
+
+
+def forecast_sum(p: GarchParams, var_next, h: int):
+    """Variance summed over the next h steps (closed form of forecast_path(...).sum(-1))."""
+    phi = p.persistence
+    vl = p.long_run_var
+    v = np.asarray(var_next, dtype=np.float64)
+    if abs(1.0 - phi) < 1e-12:
+        return h * v
+    return h * vl + (v - vl) * (1.0 - phi ** h) / (1.0 - phi)
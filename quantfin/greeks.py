@@ -0,0 +1,65 @@
+# quantfin/greeks.py
+"""
+Scalar Black-Scholes price / implied vol / greeks used by the live chain in
+greeks/app.py. They live here so they can be imported (and benchmarked) without
+starting the Streamlit app. For whole chains use the vectorized quantfin.vol_surface.
+"""
+import math
+
+import numpy as np
+from scipy.optimize import brentq
+from scipy.stats import norm
+
+
+def _d1(S, K, r, q, sigma, T):
+    return (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
+
+def _d2(d1, sigma, T):
+    return d1 - sigma * np.sqrt(T)
+
+def bs_price(S, K, r, q, sigma, T, right="C"):
+    if sigma <= 0 or T <= 0 or S <= 0 or K <= 0:
+        return max(0.0, (S - K) if right == "C" else (K - S))
+    d1 = _d1(S, K, r, q, sigma, T)
+    d2 = _d2(d1, sigma, T)
+    if right == "C":
+        return S * math.exp(-q * T) * norm.cdf(d1) - K * math.exp(-r * T) * norm.cdf(d2)
+    else:
+        return K * math.exp(-r * T) * norm.cdf(-d2) - S * math.exp(-q * T) * norm.cdf(-d1)
+
+def implied_vol_from_price(price, S, K, r, q, T, right="C"):
+    # No heroics: clamp to intrinsic first
+    intrinsic = max(0.0, (S - K) if right == "C" else (K - S))
+    if price <= intrinsic + 1e-8:
+        return 0.0
+    # Root find between [1e-6, 5.0] vol
+    def f(s):
+        return bs_price(S, K, r, q, s, T, right) - price
+    try:
+        return brentq(f, 1e-6, 5.0, maxiter=100, xtol=1e-6)
+    except Exception:
+        return np.nan
+
+def bs_greeks(S, K, r, q, sigma, T, right="C"):
+    if sigma <= 0 or T <= 0 or S <= 0 or K <= 0:
+        return np.nan, np.nan, np.nan, np.nan
+    d1 = _d1(S, K, r, q, sigma, T)
+    d2 = _d2(d1, sigma, T)
+    pdf = norm.pdf(d1)
+    if right == "C":
+        delta = math.exp(-q * T) * norm.cdf(d1)
+        theta = (
+            -S * math.exp(-q * T) * pdf * sigma / (2 * math.sqrt(T))
+            - r * K * math.exp(-r * T) * norm.cdf(d2)
+            + q * S * math.exp(-q * T) * norm.cdf(d1)
+        ) / 365.0
+    else:
+        delta = -math.exp(-q * T) * norm.cdf(-d1)
+        theta = (
+            -S * math.exp(-q * T) * pdf * sigma / (2 * math.sqrt(T))
+            + r * K * math.exp(-r * T) * norm.cdf(-d2)
+            - q * S * math.exp(-q * T) * norm.cdf(-d1)
+        ) / 365.0
+    gamma = math.exp(-q * T) * pdf / (S * sigma * math.sqrt(T))
+    vega = S * math.exp(-q * T) * pdf * math.sqrt(T) / 100.0  # per 1% vol
+    return delta, gamma, vega, theta
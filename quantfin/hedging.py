@@ -0,0 +1,229 @@
+# quantfin/hedging.py
+"""
+Discrete delta-hedging P&L over Monte Carlo paths.
+
+An option book (strikes / types / quantities on one expiry) is traded at
+`sigma_price` and delta-hedged every `hedge_every` path steps with Black-Scholes
+deltas at `sigma_hedge`, paying `cost_bps` on every share traded (the initial hedge
+and the unwind at expiry included). The stock position is financed at r and
+earns the dividend yield q. P&L is measured at expiry:
+
+    pnl = book payoff - premium e^{rT}
+          + sum_j H_j (S_{j+1} e^{q dt} - S_j e^{r dt}) e^{r (T - t_{j+1})}
+          - sum_j cost_j e^{r (T - t_j)}
+
+with H_j = -sum qty * delta_j the hedge held over [t_j, t_{j+1}).
+
+Deltas are computed for a whole chunk at once: a (paths x rebalance times) matrix
+per leg, with no loop over time. Gains are one row-wise product with a
+compounding vector. Paths are generated inside each chunk, so memory stays at a few
+chunk-sized arrays, and chunks go to a process pool with independent seeds from
+one SeedSequence (results don't depend on the worker count). Several HedgeSpecs
+(frequency / cost / vol variants) are evaluated on the same paths, so they differ
+only by the hedging rule.
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from scipy.special import ndtr
+
+from .montecarlo import GBMModel, GarchModel
+
+
+@dataclass(frozen=True)
+class OptionLeg:
+    K: float
+    opttype: str = "C"
+    qty: float = -1.0       # negative = short
+
+
+@dataclass(frozen=True)
+class HedgeSpec:
+    sigma_hedge: float                   # vol in the hedge deltas
+    hedge_every: int = 1                 # path steps between rebalances
+    cost_bps: float = 0.0                # proportional cost on traded notional
+    sigma_price: Optional[float] = None  # vol the book was traded at; default sigma_hedge
+
+    @property
+    def price_vol(self) -> float:
+        return self.sigma_hedge if self.sigma_price is None else self.sigma_price
+
+
+@dataclass
+class HedgeResult:
+    spec: HedgeSpec
+    premium: float           # book value at t0 (sum qty * V0; negative when short premium)
+    pnl: np.ndarray          # per path, at expiry
+    cost: np.ndarray         # transaction costs per path, at expiry
+    turnover: np.ndarray     # shares traded per path
+    seconds: float = 0.0
+    extra: Dict = field(default_factory=dict)
+
+    def stats(self) -> dict:
+        p = self.pnl
+        q01, q05, q50, q95, q99 = np.percentile(p, [1, 5, 50, 95, 99])
+        tail = p[p <= q05]
+        scale = abs(self.premium) or 1.0
+        return {
+            "sigma_hedge": self.spec.sigma_hedge, "sigma_price": self.spec.price_vol,
+            "hedge_every": self.spec.hedge_every, "cost_bps": self.spec.cost_bps,
+            "premium": self.premium, "n_paths": int(p.size),
+            "mean": float(p.mean()), "std": float(p.std()),
+            "p01": float(q01), "p05": float(q05), "p50": float(q50), "p95": float(q95), "p99": float(q99),
+            "var95": float(-q05), "es95": float(-tail.mean()) if tail.size else float("nan"),
+            "mean_rel": float(p.mean() / scale), "hedge_error_rel": float(p.std() / scale),
+            "mean_cost": float(self.cost.mean()), "mean_turnover": float(self.turnover.mean()),
+        }
+
+    def histogram(self, bins: int = 100):
+        """(counts, edges) of the P&L distribution."""
+        return np.histogram(self.pnl, bins=bins)
+
+
+# ---------- Black-Scholes over matrices ----------
+
+def bs_book_value(legs: Sequence[OptionLeg], S, tau, r, q, sigma):
+    """Book value sum qty * BS(S, K, tau); S and tau broadcast."""
+    S = np.asarray(S, dtype=np.float64)
+    tau = np.asarray(tau, dtype=np.float64)
+    sq = sigma * np.sqrt(tau)
+    out = 0.0
+    for leg in legs:
+        d1 = (np.log(S / leg.K) + (r - q + 0.5 * sigma ** 2) * tau) / sq
+        d2 = d1 - sq
+        if leg.opttype.upper().startswith("C"):
+            v = S * np.exp(-q * tau) * ndtr(d1) - leg.K * np.exp(-r * tau) * ndtr(d2)
+        else:
+            v = leg.K * np.exp(-r * tau) * ndtr(-d2) - S * np.exp(-q * tau) * ndtr(-d1)
+        out = out + leg.qty * v
+    return out
+
+
+def bs_book_delta(legs: Sequence[OptionLeg], logS: np.ndarray, tau: np.ndarray, r, q, sigma) -> np.ndarray:
+    """
+    Book delta sum qty * dV/dS over a (paths x times) matrix of log spots, with tau
+    one entry per column. log S, the drift term and 1/(sigma sqrt tau) are shared
+    across legs.
+    """
+    inv_sq = 1.0 / (sigma * np.sqrt(tau))
+    drift = (r - q + 0.5 * sigma ** 2) * tau * inv_sq
+    dq = np.exp(-q * tau)
+    x = logS * inv_sq
+    x += drift
+    out = np.zeros_like(logS)
+    d1 = np.empty_like(logS)
+    for leg in legs:
+        np.subtract(x, math.log(leg.K) * inv_sq, out=d1)
+        ndtr(d1, out=d1)
+        if not leg.opttype.upper().startswith("C"):
+            d1 -= 1.0
+        d1 *= leg.qty * dq
+        out += d1
+    return out
+
+
+# ---------- one chunk ----------
+
+def _hedge_chunk(legs, S0, T, r, q, model, n_steps, n_paths, specs, seed) -> List[tuple]:
+    rng = np.random.default_rng(seed)
+    S = model.paths(S0, T, n_steps, n_paths, rng)
+    ST = S[:, -1]
+    payoff = np.zeros(n_paths)
+    for leg in legs:
+        if leg.opttype.upper().startswith("C"):
+            payoff += leg.qty * np.maximum(ST - leg.K, 0.0)
+        else:
+            payoff += leg.qty * np.maximum(leg.K - ST, 0.0)
+
+    deltas = {}
+    out = []
+    for spec in specs:
+        k = spec.hedge_every
+        m = n_steps // k
+        dt = T / m
+        t = np.arange(m) * dt
+        key = (spec.sigma_hedge, k)
+        H = deltas.get(key)
+        if H is None:
+            H = -bs_book_delta(legs, np.log(S[:, :-1:k]), T - t, r, q, spec.sigma_hedge)
+            deltas[key] = H
+        Sr = S[:, ::k]                                   # (n, m + 1) rebalance spots incl. expiry
+        comp = np.exp(r * (T - t - dt))                  # to expiry from t_{j+1}
+        step = Sr[:, 1:] * math.exp(q * dt)
+        step -= Sr[:, :-1] * math.exp(r * dt)
+        step *= H
+        gains = step @ comp
+
+        trades = np.empty((n_paths, m + 1))
+        trades[:, 0] = H[:, 0]
+        np.subtract(H[:, 1:], H[:, :-1], out=trades[:, 1:m])
+        trades[:, m] = -H[:, -1]
+        np.abs(trades, out=trades)
+        turnover = trades.sum(axis=1)
+        if spec.cost_bps:
+            trades *= Sr
+            cost = trades @ (np.exp(r * (T - np.arange(m + 1) * dt)) * spec.cost_bps * 1e-4)
+        else:
+            cost = np.zeros(n_paths)
+
+        premium = float(bs_book_value(legs, S0, T, r, q, spec.price_vol))
+        pnl = payoff - premium * math.exp(r * T) + gains - cost
+        out.append((pnl, cost, turnover))
+    return out
+
+
+def _run_chunk(args):
+    return _hedge_chunk(*args)
+
+
+# ---------- driver ----------
+
+def simulate_hedging(legs: Sequence[OptionLeg], S0: float, T: float, r: float,
+                     model: Union[GBMModel, GarchModel], specs: Union[HedgeSpec, Sequence[HedgeSpec]],
+                     n_paths: int = 100_000, n_steps: int = 390, q: float = 0.0, chunk_size: int = 5_000,
+                     max_workers: Optional[int] = 1, seed: int = 0) -> Union[HedgeResult, List[HedgeResult]]:
+    """
+    Hedge P&L for each spec over the same n_paths paths of `model`. n_steps must be a
+    multiple of every spec's hedge_every. max_workers=1 runs in-process; None uses
+    every core.
+    """
+    single = isinstance(specs, HedgeSpec)
+    specs = [specs] if single else list(specs)
+    legs = tuple(legs)
+    for s in specs:
+        if n_steps % s.hedge_every:
+            raise ValueError(f"n_steps={n_steps} is not a multiple of hedge_every={s.hedge_every}")
+
+    sizes = [chunk_size] * (n_paths // chunk_size)
+    if n_paths % chunk_size:
+        sizes.append(n_paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(legs, S0, T, r, q, model, n_steps, n, specs, s) for n, s in zip(sizes, seeds)]
+
+    t0 = time.perf_counter()
+    if max_workers == 1 or len(jobs) == 1:
+        parts = [_run_chunk(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            parts = list(ex.map(_run_chunk, jobs))
+    seconds = time.perf_counter() - t0
+
+    results = []
+    for i, spec in enumerate(specs):
+        pnl = np.concatenate([p[i][0] for p in parts])
+        cost = np.concatenate([p[i][1] for p in parts])
+        turnover = np.concatenate([p[i][2] for p in parts])
+        premium = float(bs_book_value(legs, S0, T, r, q, spec.price_vol))
+        results.append(HedgeResult(spec, premium, pnl, cost, turnover, seconds,
+                                   extra={"chunks": len(jobs), "chunk_size": chunk_size}))
+    return results[0] if single else results
+
+
+def hedge_table(results: Sequence[HedgeResult]):
+    """One row of stats() per result, as a DataFrame."""
+    import pandas as pd
+    return pd.DataFrame([r.stats() for r in results])
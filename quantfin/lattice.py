@@ -0,0 +1,64 @@
+# quantfin/lattice.py
+"""
+Binomial lattice for American options, from the BinomialTreePricing(American) notebook.
+
+`binomial_tree_slow` is the notebook routine with its up/down factors fixed. The
+notebook had `u = exp(nu*dt) + sig*sqrt(dt)` and then `d = u = exp(nu*dt) - sig*sqrt(dt)`,
+which made u == d. Both factors are now the Jarrow-Rudd ones the q = 0.5 weights
+assume. `binomial_tree` is the same lattice with each time step done as one
+array operation.
+"""
+import numpy as np
+
+
+def binomial_tree_slow(K, T, S0, r, N, sig, opttype="P"):
+    # precomputing constants
+    dt = T / N
+    nu = r - 0.5 * sig ** 2
+    u = np.exp(nu * dt + sig * np.sqrt(dt))
+    d = np.exp(nu * dt - sig * np.sqrt(dt))
+    q = 0.5
+    disc = np.exp(-r * dt)
+
+    # initial asset prices at maturity - time step N
+    S = np.zeros(N + 1)
+    S[0] = S0 * d ** N
+    for j in range(1, N + 1):
+        S[j] = S0 * u ** j * d ** (N - j)
+
+    # initialize option values at maturity
+    C = np.zeros(N + 1)
+    for j in range(0, N + 1):
+        if opttype == "P":
+            C[j] = max(0, K - S[j])
+        else:
+            C[j] = max(0, S[j] - K)
+
+    # step backwards through tree
+    for i in np.arange(N - 1, -1, -1):
+        for j in range(0, i + 1):
+            S = S0 * u ** j * d ** (i - j)
+            C[j] = disc * (q * C[j + 1] + (1 - q) * C[j])
+            if opttype == "P":
+                C[j] = max(C[j], K - S)
+            else:
+                C[j] = max(C[j], S - K)
+
+    return C[0]
+
+
+def binomial_tree(K, T, S0, r, N, sig, opttype="P"):
+    """Same JR lattice as binomial_tree_slow, one vector operation per time step."""
+    dt = T / N
+    nu = r - 0.5 * sig ** 2
+    up, dn = nu * dt + sig * np.sqrt(dt), nu * dt - sig * np.sqrt(dt)
+    disc_q = 0.5 * np.exp(-r * dt)
+    sign = -1.0 if opttype == "P" else 1.0
+
+    j = np.arange(N + 1)
+    C = np.maximum(sign * (S0 * np.exp(j * up + (N - j) * dn) - K), 0.0)
+    for i in range(N - 1, -1, -1):
+        j = j[:i + 1]
+        C = disc_q * (C[1:] + C[:-1])
+        np.maximum(C, sign * (S0 * np.exp(j * up + (i - j) * dn) - K), out=C)
+    return float(C[0])
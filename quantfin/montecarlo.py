@@ -0,0 +1,101 @@
+# quantfin/montecarlo.py
+"""
+Price-path generators.
+
+`generate_gmb_mc` is the MonteCarloSimulator notebook routine. The notebook version
+overwrote its own mu / sig / n_mc arguments and filled a DataFrame row by row; here
+the arguments are used and the paths come from one cumulative product.
+
+`gbm_paths` / `garch_paths` return plain (n_paths, n_steps + 1) arrays, the form the
+hedging simulator consumes. GBM steps are exact lognormal. GARCH steps follow the
+GARCHVolatility notebook's constant-mean GARCH(1,1) on log returns, with params in
+per-step units (i.e. fitted on returns sampled at the path's step).
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from .garch import GarchParams
+
+
+def generate_gmb_mc(actual: pd.DataFrame, n_mc: int, mu: float = 0.1031, sig: float = 0.0407,
+                    seed: Optional[int] = None) -> pd.DataFrame:
+    """Euler GBM paths on `actual`'s index, started at its first Close; columns 1..n_mc as in the notebook."""
+    n_t = len(actual)
+    dt = 2. / (n_t - 1)
+    rng = np.random.default_rng(seed)
+    ds2 = mu * dt + sig * np.sqrt(dt) * rng.standard_normal((n_t - 1, n_mc))
+    growth = np.vstack([np.ones((1, n_mc)), np.cumprod(1.0 + ds2, axis=0)])
+    return pd.DataFrame(actual['Close'].iloc[0] * growth, index=actual.index, columns=list(range(1, n_mc + 1)))
+
+
+# ---------- array paths ----------
+
+def gbm_paths(S0: float, mu: float, sigma: float, T: float, n_steps: int, n_paths: int,
+              rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Exact GBM on n_steps equal steps over T years; (n_paths, n_steps + 1), column 0 is S0."""
+    rng = rng or np.random.default_rng()
+    dt = T / n_steps
+    z = rng.standard_normal((n_paths, n_steps))
+    z *= sigma * math.sqrt(dt)
+    z += (mu - 0.5 * sigma ** 2) * dt
+    out = np.empty((n_paths, n_steps + 1))
+    out[:, 0] = 0.0
+    np.cumsum(z, axis=1, out=out[:, 1:])
+    np.exp(out, out=out)
+    out *= S0
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _garch_log_paths(z, mu, omega, alpha, beta, var0, out):
+    n_paths, n_steps = z.shape
+    for i in range(n_paths):
+        v = var0
+        x = 0.0
+        out[i, 0] = 0.0
+        for j in range(n_steps):
+            e = math.sqrt(v) * z[i, j]
+            x += mu + e
+            out[i, j + 1] = x
+            v = omega + alpha * e * e + beta * v
+
+
+def garch_paths(S0: float, p: GarchParams, n_steps: int, n_paths: int, var0: Optional[float] = None,
+                rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """GARCH(1,1) log-return paths from S0, starting at `var0` (default: long-run variance)."""
+    rng = rng or np.random.default_rng()
+    z = rng.standard_normal((n_paths, n_steps))
+    out = np.empty((n_paths, n_steps + 1))
+    _garch_log_paths(z, p.mu, p.omega, p.alpha, p.beta, p.long_run_var if var0 is None else float(var0), out)
+    np.exp(out, out=out)
+    out *= S0
+    return out
+
+
+# ---------- path models (picklable, for worker processes) ----------
+
+@dataclass(frozen=True)
+class GBMModel:
+    mu: float
+    sigma: float
+
+    def paths(self, S0, T, n_steps, n_paths, rng) -> np.ndarray:
+        return gbm_paths(S0, self.mu, self.sigma, T, n_steps, n_paths, rng)
+
+
+@dataclass(frozen=True)
+class GarchModel:
+    params: GarchParams        # per-step units
+    var0: Optional[float] = None
+
+    def paths(self, S0, T, n_steps, n_paths, rng) -> np.ndarray:
+        return garch_paths(S0, self.params, n_steps, n_paths, self.var0, rng)
+
+    def annual_vol(self, T, n_steps) -> float:
+        """Long-run vol in annual terms for a step of T / n_steps years."""
+        return math.sqrt(self.params.long_run_var * n_steps / T)
@@ -0,0 +1,390 @@
+# quantfin/options_download.py
+"""
+Concurrent, cached, rate-limited options-chain downloader.
+
+Replaces the one-day-at-a-time loop in historicaldata.ipynb: dates and expirations
+are fetched through a bounded thread pool, every request goes through a token-bucket
+rate limit with retry/backoff, each (ticker, quote_date, expiry) chain is cached on
+disk so reruns only fetch what's missing, and finished days stream straight to a
+sink instead of piling up for one big concat.
+
+    python -m quantfin.options_download SPY 2023-01-01 2024-12-31 --out spy_options.csv
+    python -m quantfin.options_download SPY 2023-01-01 2024-12-31 --store-dir data/options
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+import pandas as pd
+
+CHAIN_COLUMNS = ["quote_date", "expiration", "strike", "option_type", "bid", "ask", "underlying_price"]
+
+
+# ---------- data sources ----------
+
+class OptionsSource(Protocol):
+    def underlying_close(self, ticker: str, day: date) -> Optional[float]: ...
+    def expirations(self, ticker: str, day: date) -> List[str]: ...
+    def option_chain(self, ticker: str, day: date, expiry: str) -> pd.DataFrame: ...
+    # option_chain returns calls and puts stacked, with at least strike/bid/ask/option_type
+
+
+class YFinanceSource:
+    """Yahoo via yfinance. Note Yahoo only serves the *current* chain; `day` picks the close."""
+
+    def __init__(self):
+        import yfinance as yf  # lazy import to keep deps optional
+        self._yf = yf
+        self._tickers: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _ticker(self, ticker: str):
+        with self._lock:
+            if ticker not in self._tickers:
+                self._tickers[ticker] = self._yf.Ticker(ticker)
+            return self._tickers[ticker]
+
+    def underlying_close(self, ticker, day):
+        hist = self._ticker(ticker).history(start=day, end=day + timedelta(days=1))
+        if hist.empty:
+            return None
+        return float(hist["Close"].iloc[0])
+
+    def expirations(self, ticker, day):
+        try:
+            return list(self._ticker(ticker).options)
+        except IndexError:
+            return []
+
+    def option_chain(self, ticker, day, expiry):
+        chain = self._ticker(ticker).option_chain(expiry)
+        calls = chain.calls.assign(option_type="C")
+        puts = chain.puts.assign(option_type="P")
+        return pd.concat([calls, puts], ignore_index=True)
+
+
+class LocalDirSource:
+    """
+    File-backed stub for offline runs/tests. Layout:
+        root/<ticker>/underlying.csv                 (date, close)
+        root/<ticker>/<YYYY-MM-DD>/<expiry>.csv      (strike, option_type, bid, ask, ...)
+    """
+
+    def __init__(self, root, latency_s: float = 0.0):
+        self.root = Path(root)
+        self.latency_s = latency_s
+        self._closes: Dict[str, pd.Series] = {}
+        self.calls = 0
+
+    def _sleep(self):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def underlying_close(self, ticker, day):
+        self._sleep()
+        if ticker not in self._closes:
+            df = pd.read_csv(self.root / ticker / "underlying.csv", parse_dates=["date"])
+            self._closes[ticker] = df.set_index("date")["close"]
+        s = self._closes[ticker]
+        ts = pd.Timestamp(day)
+        return float(s.loc[ts]) if ts in s.index else None
+
+    def expirations(self, ticker, day):
+        self._sleep()
+        d = self.root / ticker / pd.Timestamp(day).strftime("%Y-%m-%d")
+        return sorted(p.stem for p in d.glob("*.csv")) if d.is_dir() else []
+
+    def option_chain(self, ticker, day, expiry):
+        self._sleep()
+        return pd.read_csv(self.root / ticker / pd.Timestamp(day).strftime("%Y-%m-%d") / f"{expiry}.csv")
+
+
+# ---------- rate limit + retry ----------
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/s refill, at most `burst` banked."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._t) * self.rate)
+                self._t = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait_s = (n - self._tokens) / self.rate
+            time.sleep(wait_s)
+
+
+def with_retry(fn: Callable, attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0,
+               retry_on=(Exception,)):
+    """Call fn() with exponential backoff + jitter; re-raises after the last attempt."""
+    for i in range(attempts):
+        try:
+            return fn()
+        except retry_on:
+            if i == attempts - 1:
+                raise
+            delay = min(max_delay, base_delay * 2 ** i)
+            time.sleep(delay * (0.5 + random.random()))
+
+
+# ---------- on-disk cache ----------
+
+class ChainCache:
+    """
+    Content-addressed cache: each (ticker, quote_date, expiry) key hashes to an object
+    path (objects/ab/abcdef....parquet). Writes are atomic (tmp file + rename), and
+    empty chains are stored too so known-missing data is not re-requested.
+    Day-level metadata (underlying close, expirations) is cached as small JSON blobs.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def digest(*key) -> str:
+        return hashlib.sha256("|".join(str(k) for k in key).encode()).hexdigest()
+
+    def _path(self, digest: str, ext: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.{ext}"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def get_chain(self, ticker, day, expiry) -> Optional[pd.DataFrame]:
+        p = self._path(self.digest(ticker, day, expiry), "parquet")
+        return pd.read_parquet(p) if p.exists() else None
+
+    def put_chain(self, ticker, day, expiry, df: pd.DataFrame) -> None:
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        self._write(self._path(self.digest(ticker, day, expiry), "parquet"), buf.getvalue())
+
+    def get_meta(self, ticker, day) -> Optional[dict]:
+        p = self._path(self.digest(ticker, day, "__meta__"), "json")
+        return json.loads(p.read_text()) if p.exists() else None
+
+    def put_meta(self, ticker, day, meta: dict) -> None:
+        self._write(self._path(self.digest(ticker, day, "__meta__"), "json"), json.dumps(meta).encode())
+
+
+# ---------- sinks ----------
+
+class ChainSink(Protocol):
+    def write(self, df: pd.DataFrame) -> None: ...
+    def close(self) -> None: ...
+
+
+class CsvSink:
+    """
+    Appends each finished day to one CSV (same layout the old notebook wrote).
+    overwrite=True truncates an existing file first, so a rerun over cached days
+    doesn't append a second copy of them.
+    """
+
+    def __init__(self, path, overwrite: bool = False):
+        self.path = Path(path)
+        if overwrite and self.path.exists():
+            self.path.unlink()
+        self._header = not self.path.exists()
+        self._lock = threading.Lock()
+
+    def write(self, df):
+        with self._lock:
+            df.to_csv(self.path, mode="a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        pass
+
+
+# ---------- downloader ----------
+
+@dataclass
+class DownloadStats:
+    days: int = 0
+    days_written: int = 0
+    chains_fetched: int = 0
+    chains_cached: int = 0
+    failures: List[Tuple[str, str, str]] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+
+class OptionsDownloader:
+    def __init__(self, source: OptionsSource, cache: Optional[ChainCache], sink: ChainSink,
+                 max_workers: int = 8, rate_per_s: float = 5.0, burst: int = 10,
+                 attempts: int = 4, base_delay: float = 0.5, max_pending_days: int = 16):
+        self.source = source
+        self.cache = cache
+        self.sink = sink
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_pending_days = max_pending_days
+        self.stats = DownloadStats()
+
+    def _call(self, fn, *args):
+        def once():
+            self.bucket.acquire()
+            return fn(*args)
+        return with_retry(once, attempts=self.attempts, base_delay=self.base_delay)
+
+    # --- tasks (run on pool threads) ---
+    def _day_meta(self, ticker, day) -> Optional[dict]:
+        key = day.isoformat()
+        if self.cache is not None:
+            meta = self.cache.get_meta(ticker, key)
+            if meta is not None:
+                return meta
+        close = self._call(self.source.underlying_close, ticker, day)
+        meta = {"close": close, "expirations": [] if close is None else
+                list(self._call(self.source.expirations, ticker, day))}
+        if self.cache is not None:
+            self.cache.put_meta(ticker, key, meta)
+        return meta
+
+    def _chain(self, ticker, day, expiry) -> Tuple[pd.DataFrame, bool]:
+        key = day.isoformat()
+        if self.cache is not None:
+            df = self.cache.get_chain(ticker, key, expiry)
+            if df is not None:
+                return df, True
+        df = self._call(self.source.option_chain, ticker, day, expiry)
+        df = df[[c for c in ("strike", "option_type", "bid", "ask") if c in df.columns]].copy()
+        if self.cache is not None:
+            self.cache.put_chain(ticker, key, expiry, df)
+        return df, False
+
+    @staticmethod
+    def _assemble(day, close, parts: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        frames = [df.assign(expiration=pd.Timestamp(exp)) for exp, df in sorted(parts.items()) if len(df)]
+        if not frames:
+            return pd.DataFrame(columns=CHAIN_COLUMNS)
+        out = pd.concat(frames, ignore_index=True)
+        out["quote_date"] = pd.Timestamp(day)
+        out["underlying_price"] = close
+        out = out[(out["bid"] > 0) & (out["ask"] > 0)]
+        return out[CHAIN_COLUMNS]
+
+    # --- orchestration (main thread only; workers never wait on each other) ---
+    def run(self, ticker: str, start, end, progress: Optional[Callable[[str], None]] = print) -> DownloadStats:
+        t0 = time.perf_counter()
+        days = [d.date() for d in pd.bdate_range(start, end)]
+        self.stats = st = DownloadStats(days=len(days))
+        todo = iter(days)
+        inflight: Dict[Future, tuple] = {}
+        pending: Dict[date, dict] = {}   # day -> {"close", "left", "parts", "done"}; insertion = date order
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            def feed_days():
+                while len(pending) < self.max_pending_days:
+                    day = next(todo, None)
+                    if day is None:
+                        return
+                    pending[day] = {"close": None, "left": None, "parts": {}, "done": False}
+                    inflight[ex.submit(self._day_meta, ticker, day)] = ("meta", day, None)
+
+            def finish_day(day):
+                # days complete out of order; hand them to the sink oldest-first, so a
+                # finished day waits (still counted in pending) until earlier ones are done
+                pending[day]["done"] = True
+                while pending:
+                    first = next(iter(pending))
+                    if not pending[first]["done"]:
+                        return
+                    d = pending.pop(first)
+                    if d["parts"]:
+                        frame = self._assemble(first, d["close"], d["parts"])
+                        if len(frame):
+                            self.sink.write(frame)
+                            st.days_written += 1
+                    if progress:
+                        progress(f"  {first}: {len(d['parts'])} expiries")
+
+            feed_days()
+            while inflight:
+                done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    kind, day, expiry = inflight.pop(fut)
+                    try:
+                        res = fut.result()
+                    except Exception as e:
+                        st.failures.append((day.isoformat(), expiry or "", repr(e)))
+                        res = None
+                    d = pending[day]
+                    if kind == "meta":
+                        exps = (res or {}).get("expirations") or []
+                        d["close"], d["left"] = (res or {}).get("close"), len(exps)
+                        for exp in exps:
+                            inflight[ex.submit(self._chain, ticker, day, exp)] = ("chain", day, exp)
+                    else:
+                        d["left"] -= 1
+                        if res is not None:
+                            df, hit = res
+                            d["parts"][expiry] = df
+                            if hit:
+                                st.chains_cached += 1
+                            else:
+                                st.chains_fetched += 1
+                    if d["left"] == 0:
+                        finish_day(day)
+                feed_days()
+
+        self.sink.close()
+        st.elapsed_s = time.perf_counter() - t0
+        return st
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Download option chains concurrently with an on-disk cache")
+    ap.add_argument("ticker")
+    ap.add_argument("start")
+    ap.add_argument("end")
+    out = ap.add_mutually_exclusive_group(required=True)
+    out.add_argument("--out", help="output CSV (rewritten each run, days in date order)")
+    out.add_argument("--store-dir", help="write days into a partitioned OptionsStore instead")
+    ap.add_argument("--cache-dir", default=".cache/options")
+    ap.add_argument("--source-dir", default=None, help="read from a LocalDirSource instead of Yahoo")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=5.0, help="requests per second")
+    args = ap.parse_args()
+
+    source = LocalDirSource(args.source_dir) if args.source_dir else YFinanceSource()
+    if args.store_dir:
+        from .options_store import OptionsStore, ParquetSink
+        sink = ParquetSink(OptionsStore(args.store_dir), args.ticker)
+    else:
+        sink = CsvSink(args.out, overwrite=True)
+    dl = OptionsDownloader(source, ChainCache(args.cache_dir), sink,
+                           max_workers=args.workers, rate_per_s=args.rate)
+    st = dl.run(args.ticker, args.start, args.end)
+    print(f"{st.days_written}/{st.days} days written, {st.chains_fetched} fetched, "
+          f"{st.chains_cached} from cache, {len(st.failures)} failures in {st.elapsed_s:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
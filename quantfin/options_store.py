@@ -0,0 +1,238 @@
+# quantfin/options_store.py
+"""
+Partitioned, indexed options-chain store (replaces the monolithic spy_options_*.csv).
+
+Layout:
+    root/<UNDERLYING>/_index.json
+    root/<UNDERLYING>/quote_date=YYYY-MM-DD/chain.parquet
+
+Each day's file is typed (float64 prices, so results match the CSV path bit for bit;
+dictionary-encoded option_type),
+zstd-compressed and sorted by (expiration, option_type, strike), with one row group
+per expiry so an expiry filter only decodes the row groups it needs. The JSON index maps each quote
+date to its file, row count and expiries, so a per-day lookup is a dict hit plus one
+memory-mapped read instead of a scan over the full history.
+
+    store = OptionsStore("data/options")
+    store.ingest_csv("spy_options_historical_2023-01-01_to_2024-12-31.csv", "SPY")
+    df = store.load("SPY", ("2023-03-01", "2023-03-31"), columns=["strike", "bid", "ask"])
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DateLike = Union[str, pd.Timestamp, "np.datetime64"]
+
+SCHEMA = pa.schema([
+    ("quote_date", pa.timestamp("ns")),
+    ("expiration", pa.timestamp("ns")),
+    ("strike", pa.float64()),
+    ("option_type", pa.dictionary(pa.int8(), pa.string())),
+    ("bid", pa.float64()),
+    ("ask", pa.float64()),
+    ("underlying_price", pa.float64()),
+])
+SORT_KEYS = ["expiration", "option_type", "strike"]
+
+
+def _day(d: DateLike) -> pd.Timestamp:
+    ts = pd.Timestamp(d)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return ts.normalize()
+
+
+def normalize_chain(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce a raw chain frame (CSV/yfinance) to the store's columns and dtypes."""
+    out = pd.DataFrame({
+        "quote_date": pd.to_datetime(df["quote_date"], utc=True).dt.tz_convert(None).dt.normalize(),
+        "expiration": pd.to_datetime(df["expiration"], utc=True).dt.tz_convert(None).dt.normalize(),
+        "strike": df["strike"].astype("float64"),
+        "option_type": df["option_type"].astype(str).str.upper().str[0],
+        "bid": df["bid"].astype("float64"),
+        "ask": df["ask"].astype("float64"),
+        "underlying_price": df["underlying_price"].astype("float64"),
+    })
+    return out
+
+
+class OptionsStore:
+    def __init__(self, root, compression: str = "zstd"):
+        self.root = Path(root)
+        self.compression = compression
+        self._index: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- index ----------
+    def _dir(self, underlying: str) -> Path:
+        return self.root / underlying.upper()
+
+    def index(self, underlying: str) -> Dict[str, dict]:
+        u = underlying.upper()
+        if u not in self._index:
+            p = self._dir(u) / "_index.json"
+            self._index[u] = json.loads(p.read_text()) if p.exists() else {}
+        return self._index[u]
+
+    def save_index(self, underlying: str) -> None:
+        u = underlying.upper()
+        with self._lock:
+            idx = dict(sorted(self.index(u).items()))
+            p = self._dir(u) / "_index.json"
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(idx, indent=0))
+            os.replace(tmp, p)
+
+    def has(self, underlying: str) -> bool:
+        return bool(self.index(underlying))
+
+    def dates(self, underlying: str) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(sorted(self.index(underlying)))
+
+    def expirations(self, underlying: str, quote_date: DateLike) -> List[pd.Timestamp]:
+        entry = self.index(underlying).get(_day(quote_date).strftime("%Y-%m-%d"))
+        return [pd.Timestamp(e) for e in entry["expirations"]] if entry else []
+
+    # ---------- write ----------
+    def write_day(self, underlying: str, chain: pd.DataFrame, save_index: bool = True,
+                  merge: bool = False) -> None:
+        """
+        Write one quote date's chain. `chain` must hold a single quote_date. The stored
+        partition is replaced, or with `merge` the new rows are appended to it.
+        """
+        df = normalize_chain(chain)
+        days = df["quote_date"].unique()
+        if len(days) != 1:
+            raise ValueError(f"write_day expects one quote_date, got {len(days)}")
+        day = pd.Timestamp(days[0]).strftime("%Y-%m-%d")
+        if merge and day in self.index(underlying):
+            df = pd.concat([self.day(underlying, day).astype(df.dtypes.to_dict()), df], ignore_index=True)
+        df = df.sort_values(SORT_KEYS, kind="stable").reset_index(drop=True)
+
+        table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+        rel = f"quote_date={day}/chain.parquet"
+        path = self._dir(underlying) / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".parquet.tmp")
+
+        # one row group per expiry, in the same order as the index's expiry list
+        bounds = np.flatnonzero(np.diff(df["expiration"].to_numpy().astype("int64"))) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(df)]))
+        with pq.ParquetWriter(tmp, SCHEMA, compression=self.compression) as w:
+            for a, b in zip(starts, ends):
+                w.write_table(table.slice(a, b - a))
+        os.replace(tmp, path)
+
+        exps = [pd.Timestamp(e).strftime("%Y-%m-%d") for e in df["expiration"].unique()]
+        with self._lock:
+            self.index(underlying)[day] = {
+                "file": rel, "rows": int(len(df)), "expirations": exps,
+                "strike_min": float(df["strike"].min()) if len(df) else None,
+                "strike_max": float(df["strike"].max()) if len(df) else None,
+                "underlying_price": float(df["underlying_price"].iloc[0]) if len(df) else None,
+            }
+        if save_index:
+            self.save_index(underlying)
+
+    def write(self, underlying: str, chains: pd.DataFrame, merge_days: Iterable[str] = ()) -> List[str]:
+        """
+        Write a multi-day frame, one partition per quote_date; days in `merge_days`
+        (YYYY-MM-DD) are merged into their partition instead of replacing it. Returns
+        the days written.
+        """
+        qd = pd.to_datetime(chains["quote_date"], utc=True).dt.tz_convert(None).dt.normalize()
+        merge_days = set(merge_days)
+        written = []
+        for d, day_df in chains.groupby(qd.to_numpy(), sort=True):
+            day = pd.Timestamp(d).strftime("%Y-%m-%d")
+            self.write_day(underlying, day_df, save_index=False, merge=day in merge_days)
+            written.append(day)
+        self.save_index(underlying)
+        return written
+
+    def ingest_csv(self, csv_path, underlying: str, chunksize: int = 500_000) -> int:
+        """
+        One-off conversion of an existing CSV. Read in chunks so a multi-GB file never
+        sits in memory. The first rows of a quote date replace its stored partition;
+        rows of that date in later chunks (a straddled boundary, or an unsorted file)
+        are merged into it, so the result doesn't depend on the CSV's row order.
+        """
+        seen: set = set()
+        n = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            seen.update(self.write(underlying, chunk, merge_days=seen))
+            n += len(chunk)
+        return n
+
+    # ---------- read ----------
+    def _read(self, underlying: str, entry: dict, columns, expiries) -> pa.Table:
+        pf = pq.ParquetFile(self._dir(underlying) / entry["file"], memory_map=True)
+        cols = list(columns) if columns is not None else None
+        if expiries is None:
+            return pf.read(columns=cols)
+        # row group i holds entry["expirations"][i], so expiry pushdown is a row-group pick
+        want = {_day(e).strftime("%Y-%m-%d") for e in expiries}
+        groups = [i for i, e in enumerate(entry["expirations"]) if e in want]
+        return pf.read_row_groups(groups, columns=cols)
+
+    def day_table(self, underlying: str, quote_date: DateLike, columns: Optional[Sequence[str]] = None,
+                  expiries: Optional[Iterable[DateLike]] = None) -> Optional[pa.Table]:
+        entry = self.index(underlying).get(_day(quote_date).strftime("%Y-%m-%d"))
+        if entry is None:
+            return None
+        return self._read(underlying, entry, columns, expiries)
+
+    def day(self, underlying: str, quote_date: DateLike, columns: Optional[Sequence[str]] = None,
+            expiries: Optional[Iterable[DateLike]] = None) -> pd.DataFrame:
+        """One quote date's chain (empty frame if the date isn't stored)."""
+        t = self.day_table(underlying, quote_date, columns, expiries)
+        if t is None:
+            cols = list(columns) if columns else SCHEMA.names
+            return pd.DataFrame(columns=cols)
+        return t.to_pandas()
+
+    def load(self, underlying: str, date_range: Optional[Tuple[DateLike, DateLike]] = None,
+             expiries: Optional[Iterable[DateLike]] = None, columns: Optional[Sequence[str]] = None,
+             as_arrow: bool = False):
+        """
+        Chains for quote dates in [start, end] (inclusive; None = everything). Dates are
+        pruned through the index; expiries (row groups) and columns are pushed into the
+        memory-mapped parquet reads.
+        """
+        idx = self.index(underlying)
+        keys = sorted(idx)
+        if date_range is not None:
+            lo = _day(date_range[0]).strftime("%Y-%m-%d") if date_range[0] is not None else ""
+            hi = _day(date_range[1]).strftime("%Y-%m-%d") if date_range[1] is not None else "9999"
+            keys = [k for k in keys if lo <= k <= hi]
+        exps = list(expiries) if expiries is not None else None
+        tables = [self._read(underlying, idx[k], columns, exps) for k in keys]
+        if not tables:
+            table = SCHEMA.empty_table() if not columns else SCHEMA.empty_table().select(list(columns))
+        else:
+            # "permissive" widens float32 partitions written by older versions to float64
+            table = pa.concat_tables(tables, promote_options="permissive") if len(tables) > 1 else tables[0]
+        return table if as_arrow else table.to_pandas()
+
+
+class ParquetSink:
+    """Downloader sink (see options_download) writing each finished day into an OptionsStore."""
+
+    def __init__(self, store: OptionsStore, underlying: str):
+        self.store = store
+        self.underlying = underlying
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.store.write_day(self.underlying, df, save_index=False)
+
+    def close(self) -> None:
+        self.store.save_index(self.underlying)
@@ -0,0 +1,36 @@
+# quantfin/portfolio.py
+"""
+Mean-variance portfolio helpers from MPToptimization.ipynb: the annualized
+return / volatility / Sharpe of a weight vector and the SLSQP max-Sharpe weights.
+Risk beyond the annualized vol (VaR / ES) lives in quantfin.fhs.
+"""
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+TRADING_DAYS = 252
+
+
+def get_portfolio_stats(weights, log_returns: pd.DataFrame, risk_free_rate: float = 0.02,
+                        trading_days: int = TRADING_DAYS):
+    """(expected return, volatility, Sharpe), annualized, as in the notebook."""
+    weights = np.asarray(weights, dtype=np.float64)
+    expected_return = np.sum(log_returns.mean() * weights) * trading_days
+    covariance_matrix = log_returns.cov() * trading_days
+    expected_volatility = np.sqrt(np.dot(weights.T, np.dot(covariance_matrix, weights)))
+    sharpe_ratio = (expected_return - risk_free_rate) / expected_volatility
+    return expected_return, expected_volatility, sharpe_ratio
+
+
+def max_sharpe_weights(log_returns: pd.DataFrame, risk_free_rate: float = 0.02) -> np.ndarray:
+    """Long-only, fully invested tangency portfolio (the notebook's SLSQP setup)."""
+    n = log_returns.shape[1]
+    mean = log_returns.mean().to_numpy() * TRADING_DAYS
+    cov = log_returns.cov().to_numpy() * TRADING_DAYS
+
+    def neg_sharpe(w):
+        return -(mean @ w - risk_free_rate) / np.sqrt(w @ cov @ w)
+
+    res = minimize(neg_sharpe, np.full(n, 1.0 / n), method="SLSQP", bounds=[(0, 1)] * n,
+                   constraints=({"type": "eq", "fun": lambda w: np.sum(w) - 1},))
+    return res.x
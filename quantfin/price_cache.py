@@ -0,0 +1,367 @@
+# quantfin/price_cache.py
+"""
+Local daily-bar cache shared by the notebooks and the backtesters.
+
+Layout:
+    root/_index.json             covered date ranges per symbol
+    root/<SYMBOL>.arrow          Arrow IPC file: date, open, high, low, close, adj_close, volume
+
+A request is split against the covered ranges, and only the gaps go to the provider
+(symbols fetched concurrently). The new rows are merged into the symbol's file,
+which is rewritten atomically; daily bars are small, so a rewrite is cheaper than
+managing append segments. Reads memory-map the uncompressed IPC file, so columns
+come out as zero-copy numpy views and a warm request costs milliseconds. Ranges
+that reach today stay open, so the next run picks up the rest of the day. If the
+provider fails (offline), whatever is cached is served and the gap stays open.
+
+adj_close is back-adjusted by the provider, so a split or dividend after a range was
+cached changes every older adj_close. Each gap fetch therefore also asks for the
+nearest cached bar (the overlap bar); if its adj_close / close ratio moved, the
+cached adjustment is stale and the whole symbol is refetched and replaced.
+
+    cache = PriceCache("data/prices")
+    close = cache.close(["AAPL", "MSFT"], "2020-01-01", "2024-12-31")   # dates x symbols
+    hist = cache.history("META", "2022-06-26", "2024-06-26")            # yfinance-style frame
+"""
+import json
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+FIELDS = ["open", "high", "low", "close", "adj_close", "volume"]
+SCHEMA = pa.schema([("date", pa.date32())] + [(f, pa.float64()) for f in FIELDS])
+YF_NAMES = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "adj_close": "Adj Close",
+            "volume": "Volume"}
+EPOCH = "1970-01-01"   # start used for period="max" requests
+ADJ_RTOL = 1e-6        # overlap-bar adj_close / close drift that means a new split or dividend
+
+DateLike = Union[str, pd.Timestamp, np.datetime64, None]
+
+
+def _day(d: DateLike, default=None) -> np.datetime64:
+    if d is None:
+        return default
+    ts = pd.Timestamp(d)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return np.datetime64(ts.normalize().date(), "D")
+
+
+def _today() -> np.datetime64:
+    return np.datetime64(pd.Timestamp.now().date(), "D")
+
+
+# ---------- providers ----------
+
+class PriceProvider(Protocol):
+    def fetch(self, symbol: str, start: np.datetime64, end: np.datetime64) -> pd.DataFrame: ...
+    # [start, end) daily bars, DatetimeIndex of dates, columns FIELDS (missing ones NaN)
+
+
+class YFinanceProvider:
+    def __init__(self):
+        import yfinance as yf  # lazy import to keep deps optional
+        self._yf = yf
+
+    def fetch(self, symbol, start, end):
+        h = self._yf.Ticker(symbol).history(start=str(start), end=str(end), auto_adjust=False, actions=False)
+        if h.empty:
+            return pd.DataFrame(columns=FIELDS)
+        h = h.rename(columns={v: k for k, v in YF_NAMES.items()})
+        h.index = pd.DatetimeIndex(h.index).tz_localize(None).normalize()
+        return h.reindex(columns=FIELDS)
+
+
+class LocalCsvProvider:
+    """
+    File-backed stub for offline runs/tests: root/<SYMBOL>.csv with a `date` column and
+    any of FIELDS (or yfinance's column names). Counts calls; optional fake latency.
+    """
+
+    def __init__(self, root, latency_s: float = 0.0):
+        self.root = Path(root)
+        self.latency_s = latency_s
+        self.calls = 0
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, start, end):
+        with self._lock:
+            self.calls += 1
+            if symbol not in self._frames:
+                df = pd.read_csv(self.root / f"{symbol}.csv", parse_dates=["date"]).set_index("date")
+                df = df.rename(columns={v: k for k, v in YF_NAMES.items()})
+                self._frames[symbol] = df.reindex(columns=FIELDS).sort_index()
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        df = self._frames[symbol]
+        return df.loc[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+
+# ---------- ranges ----------
+
+def _gaps(covered: List[Tuple[np.datetime64, np.datetime64]], start, end) -> List[Tuple[np.datetime64, np.datetime64]]:
+    """Parts of [start, end) not inside any covered [a, b)."""
+    out, cur = [], start
+    for a, b in covered:
+        if b <= cur:
+            continue
+        if a >= end:
+            break
+        if a > cur:
+            out.append((cur, min(a, end)))
+        cur = max(cur, b)
+        if cur >= end:
+            break
+    if cur < end:
+        out.append((cur, end))
+    return out
+
+
+def _merge(ranges) -> List[Tuple[np.datetime64, np.datetime64]]:
+    out = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+# ---------- cache ----------
+
+class PriceCache:
+    def __init__(self, root="data/prices", provider: Optional[PriceProvider] = None, max_workers: int = 8,
+                 offline: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._provider = provider
+        self.max_workers = max_workers
+        self.offline = offline
+        self._index: Optional[Dict[str, list]] = None
+        self._lock = threading.Lock()
+        self._sym_locks: Dict[str, threading.Lock] = {}
+        self._tables: Dict[str, Tuple[float, pa.Table]] = {}   # symbol -> (mtime, mmap table)
+        self.fetches = 0
+
+    _default: Optional["PriceCache"] = None
+
+    @classmethod
+    def default(cls) -> "PriceCache":
+        """Process-wide cache at $QUANTFIN_PRICE_CACHE (default data/prices)."""
+        if cls._default is None:
+            cls._default = cls(os.environ.get("QUANTFIN_PRICE_CACHE", "data/prices"))
+        return cls._default
+
+    @property
+    def provider(self) -> PriceProvider:
+        if self._provider is None:
+            self._provider = YFinanceProvider()
+        return self._provider
+
+    # ---------- index ----------
+    def _load_index(self) -> Dict[str, list]:
+        if self._index is None:
+            p = self.root / "_index.json"
+            raw = json.loads(p.read_text()) if p.exists() else {}
+            self._index = {s: [(np.datetime64(a, "D"), np.datetime64(b, "D")) for a, b in r] for s, r in raw.items()}
+        return self._index
+
+    def _save_index(self) -> None:
+        idx = {s: [[str(a), str(b)] for a, b in r] for s, r in sorted(self._load_index().items())}
+        p = self.root / "_index.json"
+        tmp = p.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(idx, indent=0))
+        os.replace(tmp, p)
+
+    def covered(self, symbol: str) -> List[Tuple[np.datetime64, np.datetime64]]:
+        with self._lock:
+            return list(self._load_index().get(symbol.upper(), []))
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.arrow"
+
+    # ---------- read ----------
+    def _table(self, symbol: str) -> Optional[pa.Table]:
+        p = self._path(symbol)
+        try:
+            mtime = p.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        hit = self._tables.get(symbol)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+        with pa.memory_map(str(p), "r") as src:
+            table = pa.ipc.open_file(src).read_all()
+        self._tables[symbol] = (mtime, table)
+        return table
+
+    def _columns(self, symbol: str, fields: Sequence[str]):
+        t = self._table(symbol.upper())
+        if t is None:
+            return np.array([], dtype="datetime64[D]"), {f: np.array([]) for f in fields}
+        dates = t.column("date").to_numpy().astype("datetime64[D]")
+        return dates, {f: t.column(f).to_numpy() for f in fields}
+
+    # ---------- write ----------
+    def _write(self, symbol: str, new: pd.DataFrame, replace: bool = False) -> None:
+        """Merge `new` into the symbol's file (new rows win), or make it the whole file if `replace`."""
+        nd = new.reindex(columns=FIELDS).astype(np.float64)
+        nd.index = pd.DatetimeIndex(nd.index).normalize()
+        if replace:
+            df = nd
+        else:
+            dates, cols = self._columns(symbol, FIELDS)
+            old = pd.DataFrame(cols, index=pd.DatetimeIndex(dates))
+            df = pd.concat([old, nd]) if len(old) else nd
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        arrays = [pa.array(df.index.to_numpy().astype("datetime64[D]"), pa.date32())]
+        arrays += [pa.array(df[f].to_numpy(), pa.float64()) for f in FIELDS]
+        table = pa.Table.from_arrays(arrays, schema=SCHEMA)
+        p = self._path(symbol)
+        tmp = p.with_suffix(".arrow.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as w:
+            w.write_table(table)
+        os.replace(tmp, p)
+        self._tables.pop(symbol, None)
+
+    def _sym_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._sym_locks.setdefault(symbol, threading.Lock())
+
+    def _overlap_bar(self, dates: np.ndarray, a: np.datetime64, b: np.datetime64) -> Optional[np.datetime64]:
+        """Cached bar nearest to the gap [a, b): the last one before it, else the first one after."""
+        i = np.searchsorted(dates, a)
+        if i > 0:
+            return dates[i - 1]
+        j = np.searchsorted(dates, b)
+        return dates[j] if j < dates.size else None
+
+    def _ensure_one(self, symbol: str, start, end) -> int:
+        """Fetch the uncovered parts of [start, end) for one symbol; returns provider calls made."""
+        with self._sym_lock(symbol):
+            covered = self.covered(symbol)
+            gaps = _gaps(covered, start, end)
+            if not gaps or self.offline:
+                return 0
+            dates, cols = self._columns(symbol, ["close", "adj_close"])
+            ratio = dict(zip(dates, cols["adj_close"] / cols["close"]))
+            frames, done, stale = [], [], False
+            for a, b in gaps:
+                o = self._overlap_bar(dates, a, b)
+                lo, hi = (a, b) if o is None else (min(a, o), max(b, o + 1))
+                try:
+                    f = self.provider.fetch(symbol, lo, hi)
+                except Exception as e:  # offline / provider hiccup: serve what's cached
+                    warnings.warn(f"price fetch failed for {symbol} {a}..{b}: {e!r}; using cached data")
+                    continue
+                hit = f.index == pd.Timestamp(o) if o is not None else []
+                if np.any(hit):
+                    r = float(f["adj_close"][hit].iloc[-1] / f["close"][hit].iloc[-1])
+                    if np.isfinite(r) and np.isfinite(ratio[o]):
+                        stale |= not np.isclose(r, ratio[o], rtol=ADJ_RTOL, atol=0.0)
+                frames.append(f)
+                # don't mark today (or later) as covered: the bar isn't final yet
+                b_cov = min(b, _today())
+                if b_cov > a:
+                    done.append((a, b_cov))
+            if stale:
+                return len(gaps) + self._refetch(symbol, covered, start, end)
+            rows = [f for f in frames if len(f)]
+            if rows:
+                self._write(symbol, pd.concat(rows))
+            with self._lock:
+                idx = self._load_index()
+                idx[symbol] = _merge(idx.get(symbol, []) + done)
+                self._save_index()
+            return len(gaps)
+
+    def _refetch(self, symbol: str, covered, start, end) -> int:
+        """Adjustment changed since the cached rows were fetched: replace the symbol with one fresh span."""
+        lo, hi = min(covered[0][0], start), max(covered[-1][1], end)
+        try:
+            f = self.provider.fetch(symbol, lo, hi)
+        except Exception as e:
+            warnings.warn(f"price refetch failed for {symbol} {lo}..{hi}: {e!r}; "
+                          f"serving the cached (stale-adjusted) data")
+            return 1
+        self._write(symbol, f, replace=True)
+        with self._lock:
+            idx = self._load_index()
+            b_cov = min(hi, _today())
+            idx[symbol] = [(lo, b_cov)] if b_cov > lo else []
+            self._save_index()
+        return 1
+
+    def ensure(self, symbols: Sequence[str], start: DateLike = None, end: DateLike = None) -> int:
+        """Make [start, end) present for every symbol; concurrent across symbols. Returns fetch count."""
+        a = _day(start, np.datetime64(EPOCH, "D"))
+        b = _day(end, _today() + 1)
+        syms = [s.upper() for s in symbols]
+        if len(syms) == 1 or self.max_workers == 1:
+            n = sum(self._ensure_one(s, a, b) for s in syms)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(syms))) as ex:
+                n = sum(ex.map(lambda s: self._ensure_one(s, a, b), syms))
+        self.fetches += n
+        return n
+
+    # ---------- public reads ----------
+    def matrix(self, symbols: Sequence[str], start: DateLike = None, end: DateLike = None, field: str = "adj_close",
+               how: str = "outer") -> pd.DataFrame:
+        """Wide dates x symbols frame of one field over [start, end); `how="inner"` keeps common dates only."""
+        self.ensure(symbols, start, end)
+        a = _day(start, np.datetime64(EPOCH, "D"))
+        b = _day(end, _today() + 1)
+        per = []
+        for s in symbols:
+            d, c = self._columns(s, [field])
+            lo, hi = np.searchsorted(d, a), np.searchsorted(d, b)
+            per.append((d[lo:hi], c[field][lo:hi]))
+        if not per:
+            return pd.DataFrame()
+        if how == "inner":
+            dates = per[0][0]
+            for d, _ in per[1:]:
+                dates = np.intersect1d(dates, d, assume_unique=True)
+        else:
+            dates = np.unique(np.concatenate([d for d, _ in per]))
+        out = np.full((dates.size, len(per)), np.nan)
+        for j, (d, v) in enumerate(per):
+            pos = np.searchsorted(dates, d)
+            ok = (pos < dates.size) & (dates[np.minimum(pos, dates.size - 1)] == d)
+            out[pos[ok], j] = v[ok]
+        return pd.DataFrame(out, index=pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Date"),
+                            columns=list(symbols))
+
+    def close(self, symbols: Union[str, Sequence[str]], start: DateLike = None, end: DateLike = None,
+              adjusted: bool = True, how: str = "outer"):
+        """Closes (dividend/split adjusted by default, like yf.download). A str symbol gives a Series."""
+        one = isinstance(symbols, str)
+        m = self.matrix([symbols] if one else symbols, start, end, "adj_close" if adjusted else "close", how)
+        return m.iloc[:, 0].rename(symbols) if one else m
+
+    def history(self, symbol: str, start: DateLike = None, end: DateLike = None,
+                auto_adjust: bool = False) -> pd.DataFrame:
+        """One symbol's bars with yfinance column names (Open, High, ..., Adj Close, Volume)."""
+        self.ensure([symbol], start, end)
+        a = _day(start, np.datetime64(EPOCH, "D"))
+        b = _day(end, _today() + 1)
+        d, c = self._columns(symbol, FIELDS)
+        lo, hi = np.searchsorted(d, a), np.searchsorted(d, b)
+        df = pd.DataFrame({YF_NAMES[f]: c[f][lo:hi] for f in FIELDS},
+                          index=pd.DatetimeIndex(d[lo:hi].astype("datetime64[ns]"), name="Date"))
+        if auto_adjust:
+            ratio = df["Adj Close"] / df["Close"]
+            for f in ("Open", "High", "Low"):
+                df[f] = df[f] * ratio
+            df["Close"] = df.pop("Adj Close")
+        return df
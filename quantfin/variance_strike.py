@@ -0,0 +1,259 @@
+# quantfin/variance_strike.py
+"""
+VIX-style variance strikes for every (quote_date, expiry) in one pass.
+
+`calculate_variance_strike` below is the per-expiry routine from
+varianceswapstrat.ipynb, kept as the reference. `variance_strikes` computes the
+same number for every group at once: the chain is sorted once by
+(quote_date, expiration, strike), K0 / OTM puts / OTM calls / ATM legs are found
+with masks, and the per-group sums are segmented reductions (bincount/reduceat)
+instead of a pandas groupby loop with sort/copy/diff per expiry.
+
+`TermStructure` holds the result: the raw per-expiry table, a per-date linear
+curve in days (same interpolation/extrapolation as the notebooks' interp1d) and
+a wide table at standard tenors.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DAY_COUNT = 365.25
+STANDARD_TENORS = (7, 14, 30, 60, 90, 180, 365)
+
+
+# ---------- reference (per expiry) ----------
+
+def calculate_variance_strike(chain_for_one_expiry: pd.DataFrame, risk_free_rate: float = 0.05) -> float:
+    """Variance strike (vol, %) for one expiry's chain; 0 when it can't be formed."""
+    if chain_for_one_expiry.empty: return 0
+    T = chain_for_one_expiry['time_to_expiry'].iloc[0]
+    S = chain_for_one_expiry['underlying_price'].iloc[0]
+    if T <= 0 or S <= 0: return 0
+    F = S * np.exp(risk_free_rate * T)
+    below_F = chain_for_one_expiry[chain_for_one_expiry['strike'] <= F]
+    if below_F.empty: return 0
+    K0 = below_F['strike'].max()
+    otm_puts = chain_for_one_expiry[(chain_for_one_expiry['option_type'] == 'P') & (chain_for_one_expiry['strike'] < K0)].sort_values('strike')
+    otm_calls = chain_for_one_expiry[(chain_for_one_expiry['option_type'] == 'C') & (chain_for_one_expiry['strike'] > K0)].sort_values('strike')
+    atm_options = chain_for_one_expiry[chain_for_one_expiry['strike'] == K0]
+    sum_puts, sum_calls = 0, 0
+    if not otm_puts.empty:
+        otm_puts = otm_puts.copy()
+        otm_puts['delta_K'] = otm_puts['strike'].diff().fillna(otm_puts['strike'].iloc[0])
+        sum_puts = ((otm_puts['delta_K'] / otm_puts['strike']**2) * otm_puts['mid_price']).sum()
+    if not otm_calls.empty:
+        otm_calls = otm_calls.copy()
+        otm_calls['delta_K'] = otm_calls['strike'].diff().fillna(0)
+        sum_calls = ((otm_calls['delta_K'] / otm_calls['strike']**2) * otm_calls['mid_price']).sum()
+    atm_price = atm_options['mid_price'].mean() if not atm_options.empty else 0
+    put_max_strike = otm_puts['strike'].max() if not otm_puts.empty else 0
+    call_min_strike = otm_calls['strike'].min() if not otm_calls.empty else K0
+    atm_delta_K = (call_min_strike - put_max_strike) / 2 if put_max_strike > 0 else call_min_strike - K0
+    sum_atm = (atm_delta_K / K0**2) * atm_price if K0 > 0 else 0
+    variance = (2 / T) * np.exp(risk_free_rate * T) * (sum_puts + sum_calls + sum_atm) - (1 / T) * (F / K0 - 1)**2
+    return np.sqrt(variance) * 100 if variance > 0 else 0
+
+
+# ---------- batch engine ----------
+
+def _prepare(chain: pd.DataFrame, day_count: float) -> pd.DataFrame:
+    qd = pd.to_datetime(chain["quote_date"]).to_numpy("datetime64[D]")
+    ex = pd.to_datetime(chain["expiration"]).to_numpy("datetime64[D]")
+    days = (ex - qd).astype(np.int64)
+    mid = (chain["bid"].to_numpy(np.float64) + chain["ask"].to_numpy(np.float64)) / 2.0
+    T = days / day_count
+    keep = (T > 0.001) & (mid > 0)
+    return pd.DataFrame({
+        "qd": qd[keep], "ex": ex[keep], "days": days[keep], "T": T[keep],
+        "K": chain["strike"].to_numpy(np.float64)[keep],
+        "put": (np.asarray(chain["option_type"], dtype=object)[keep] == "P"),
+        "call": (np.asarray(chain["option_type"], dtype=object)[keep] == "C"),
+        "mid": mid[keep],
+        "S": chain["underlying_price"].to_numpy(np.float64)[keep],
+    })
+
+
+def _leg_sum(g, K, mid, mask, first_from_strike: bool, n_groups: int):
+    """Sum of dK/K^2 * mid over the masked rows of each group (rows already sorted by (g, K))."""
+    gi, Ki, mi = g[mask], K[mask], mid[mask]
+    dK = np.empty_like(Ki)
+    if Ki.size:
+        dK[1:] = np.diff(Ki)
+        dK[0] = 0.0
+        starts = np.ones(Ki.size, dtype=bool)
+        starts[1:] = gi[1:] != gi[:-1]
+        dK[starts] = Ki[starts] if first_from_strike else 0.0
+    return np.bincount(gi, weights=dK / Ki ** 2 * mi, minlength=n_groups)
+
+
+def variance_strikes(chain: pd.DataFrame, risk_free_rate: float = 0.05,
+                     day_count: float = DAY_COUNT) -> pd.DataFrame:
+    """
+    One row per (quote_date, expiration): days, T, forward, K0 and the variance
+    strike vol in percent (0 where calculate_variance_strike would return 0).
+    `chain` needs quote_date, expiration, strike, option_type, bid, ask, underlying_price.
+    """
+    d = _prepare(chain, day_count)
+    order = np.lexsort((d["K"].to_numpy(), d["ex"].to_numpy(), d["qd"].to_numpy()))
+    qd, ex = d["qd"].to_numpy()[order], d["ex"].to_numpy()[order]
+    K, mid = d["K"].to_numpy()[order], d["mid"].to_numpy()[order]
+    put, call = d["put"].to_numpy()[order], d["call"].to_numpy()[order]
+
+    n = K.size
+    if n == 0:
+        return pd.DataFrame(columns=["quote_date", "expiration", "days", "T", "forward", "K0", "var_strike_vol"])
+    new = np.ones(n, dtype=bool)
+    new[1:] = (qd[1:] != qd[:-1]) | (ex[1:] != ex[:-1])
+    starts = np.flatnonzero(new)
+    g = np.cumsum(new) - 1
+    G = starts.size
+
+    T_g = d["T"].to_numpy()[order][starts]
+    S_g = d["S"].to_numpy()[order][starts]
+    growth = np.exp(risk_free_rate * T_g)
+    F_g = S_g * growth
+
+    # K0: highest strike at or below the forward (either option type)
+    K0_g = np.maximum.reduceat(np.where(K <= F_g[g], K, -np.inf), starts)
+    ok = np.isfinite(K0_g) & (T_g > 0) & (S_g > 0)
+    K0 = K0_g[g]
+
+    otm_put = put & (K < K0)
+    otm_call = call & (K > K0)
+    atm = K == K0
+
+    sum_puts = _leg_sum(g, K, mid, otm_put, True, G)
+    sum_calls = _leg_sum(g, K, mid, otm_call, False, G)
+
+    n_atm = np.bincount(g[atm], minlength=G)
+    atm_price = np.divide(np.bincount(g[atm], weights=mid[atm], minlength=G), n_atm,
+                          out=np.zeros(G), where=n_atm > 0)
+    put_max = np.maximum.reduceat(np.where(otm_put, K, 0.0), starts)
+    call_min = np.minimum.reduceat(np.where(otm_call, K, np.inf), starts)
+    call_min = np.where(np.isinf(call_min), K0_g, call_min)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        atm_dK = np.where(put_max > 0, (call_min - put_max) / 2, call_min - K0_g)
+        sum_atm = np.where(K0_g > 0, atm_dK / K0_g ** 2 * atm_price, 0.0)
+        variance = (2 / T_g) * growth * (sum_puts + sum_calls + sum_atm) - (1 / T_g) * (F_g / K0_g - 1) ** 2
+        vol = np.where(ok & (variance > 0), np.sqrt(np.where(variance > 0, variance, 0.0)) * 100, 0.0)
+
+    return pd.DataFrame({
+        "quote_date": pd.DatetimeIndex(qd[starts]),
+        "expiration": pd.DatetimeIndex(ex[starts]),
+        "days": (T_g * day_count).astype(np.int64),   # int(T * 365.25), as the notebook does
+        "T": T_g,
+        "forward": F_g,
+        "K0": np.where(ok, K0_g, np.nan),
+        "var_strike_vol": vol,
+    })
+
+
+# ---------- term structure ----------
+
+class LinearCurve:
+    """Piecewise-linear vol curve in days with linear extrapolation (interp1d(..., fill_value='extrapolate'))."""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+
+    def __call__(self, x_new):
+        x_new = np.asarray(x_new, dtype=np.float64)
+        hi = np.clip(np.searchsorted(self.x, x_new), 1, self.x.size - 1)
+        lo = hi - 1
+        x_lo, x_hi = self.x[lo], self.x[hi]
+        y_lo, y_hi = self.y[lo], self.y[hi]
+        slope = (y_hi - y_lo) / (x_hi - x_lo)
+        return slope * (x_new - x_lo) + y_lo
+
+
+class TermStructure:
+    """
+    Precomputed variance-strike term structure for many quote dates.
+
+    `table` is the per-(quote_date, expiration) output of variance_strikes. Curves
+    use only strictly positive strikes, one point per distinct `days` (first expiry
+    wins), and need at least two points, mirroring get_variance_curve_for_date.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        t = table[table["var_strike_vol"] > 0]
+        t = t.drop_duplicates(subset=["quote_date", "days"]).sort_values(["quote_date", "days"], kind="stable")
+        counts = t.groupby("quote_date", sort=True).size()
+        counts = counts[counts >= 2]
+        t = t[t["quote_date"].isin(counts.index)]
+        self.table = table.reset_index(drop=True)
+        self.dates = pd.DatetimeIndex(counts.index)
+        self._days = t["days"].to_numpy(np.float64)
+        self._vol = t["var_strike_vol"].to_numpy(np.float64)
+        ends = np.cumsum(counts.to_numpy())
+        self._bounds = np.column_stack((ends - counts.to_numpy(), ends))
+        self._pos = {d: i for i, d in enumerate(self.dates)}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, date) -> bool:
+        return pd.Timestamp(date) in self._pos
+
+    def curve(self, date) -> Optional[LinearCurve]:
+        """Curve for one quote date, or None if that date has fewer than two valid expiries."""
+        i = self._pos.get(pd.Timestamp(date))
+        if i is None:
+            return None
+        a, b = self._bounds[i]
+        return LinearCurve(self._days[a:b], self._vol[a:b])
+
+    def at_tenors(self, tenors: Sequence[int] = STANDARD_TENORS) -> pd.DataFrame:
+        """Wide table: one row per quote date, one column per tenor (days), vol in percent."""
+        ten = np.asarray(tenors, dtype=np.float64)
+        a, b = self._bounds[:, 0], self._bounds[:, 1]
+        # searchsorted inside each date's segment: offset keys so segments don't overlap
+        seg = np.repeat(np.arange(len(a)), b - a)
+        span = (self._days.max() + ten.max() + 1.0) if self._days.size else 1.0
+        key = seg * span * 4 + self._days
+        q = (np.arange(len(a))[:, None] * span * 4 + ten[None, :])
+        hi = np.clip(np.searchsorted(key, q), a[:, None] + 1, b[:, None] - 1)
+        lo = hi - 1
+        slope = (self._vol[hi] - self._vol[lo]) / (self._days[hi] - self._days[lo])
+        out = slope * (ten[None, :] - self._days[lo]) + self._vol[lo]
+        return pd.DataFrame(out, index=self.dates.rename("quote_date"), columns=[int(t) for t in tenors])
+
+    def arrays(self) -> dict:
+        """The curve data as flat arrays (what from_arrays needs)."""
+        return {"dates": self.dates.to_numpy("datetime64[ns]"), "days": self._days,
+                "vol": self._vol, "bounds": self._bounds}
+
+    @classmethod
+    def from_arrays(cls, dates, days, vol, bounds) -> "TermStructure":
+        """Rebuild curves from arrays(), e.g. memory-mapped in a worker. `table` is not kept."""
+        ts = cls.__new__(cls)
+        ts.table = None
+        ts.dates = pd.DatetimeIndex(dates)
+        ts._days, ts._vol, ts._bounds = days, vol, bounds
+        ts._pos = {d: i for i, d in enumerate(ts.dates)}
+        return ts
+
+    # ---------- persistence ----------
+    def save(self, path) -> None:
+        self.table.to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path) -> "TermStructure":
+        return cls(pd.read_parquet(path))
+
+
+def build_term_structure(chain: pd.DataFrame, risk_free_rate: float = 0.05,
+                         day_count: float = DAY_COUNT) -> TermStructure:
+    return TermStructure(variance_strikes(chain, risk_free_rate, day_count))
+
+
+def term_structure_from_store(store, underlying: str, date_range=None, risk_free_rate: float = 0.05,
+                              day_count: float = DAY_COUNT) -> TermStructure:
+    """Build straight from an OptionsStore, reading only the columns the engine needs."""
+    cols = ["quote_date", "expiration", "strike", "option_type", "bid", "ask", "underlying_price"]
+    return build_term_structure(store.load(underlying, date_range, columns=cols), risk_free_rate, day_count)
@@ -0,0 +1,223 @@
+# quantfin/varswap.py
+"""
+Variance swap ladder backtester (from varianceswapstrat.ipynb), reworked around
+precomputed arrays:
+
+* realized variance over any window is a difference of a prefix sum of squared
+  log returns indexed by trading day, so it is O(1) per swap instead of
+  re-slicing the price history and recomputing returns every day;
+* the variance curve for each backtest day is looked up once from a prebuilt
+  TermStructure (forward-filled like the old `latest_var_curve` cache);
+* open swaps live in parallel numpy arrays and the whole book is marked in one
+  vectorized step.
+
+The roll rule is a StrategyConfig; its defaults are the notebook's rule (Friday
+rolls into 30-day swaps, at most 4 open, notional = base / strike vol) and give the
+same equity curve as the notebook version.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def download_close(symbol: str, start, end) -> pd.Series:
+    """Daily (adjusted) closes through the local price cache; yfinance only for missing ranges."""
+    from .price_cache import PriceCache
+    return PriceCache.default().close(symbol, start, end)
+
+
+def realized_var_index(close: pd.Series):
+    """
+    Trading-day dates and cum[i] = sum of squared log returns up to row i, so the
+    sum over the rows of close.loc[a:b] is cum[last] - cum[first].
+    """
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    px = close.to_numpy(dtype=np.float64)
+    r2 = np.zeros(px.size)
+    if px.size > 1:
+        r = np.log(px[1:] / px[:-1])
+        r2[1:] = np.where(np.isfinite(r), r * r, 0.0)   # dropna() semantics
+    dates = pd.DatetimeIndex(close.index).tz_localize(None).to_numpy("datetime64[D]")
+    return dates, np.cumsum(r2)
+
+
+SIZING_RULES = ("inverse_vol", "inverse_var", "fixed")
+
+
+@dataclass(frozen=True)
+class StrategyConfig:
+    roll_weekday: int = 4            # 0=Mon .. 4=Fri
+    tenor_days: int = 30
+    max_swaps: int = 4               # ladder depth
+    sizing: str = "inverse_vol"      # see SIZING_RULES
+    vol_target: Optional[float] = None   # annualized vol target for new notionals, e.g. 0.10
+    vol_lookback: int = 20           # days of strategy returns used by the vol target
+    max_leverage: float = 3.0        # cap on the vol-target scale
+
+    def weight(self, strike_vol: float) -> float:
+        """Notional per unit of base notional for a new swap struck at `strike_vol` (%)."""
+        if self.sizing == "inverse_vol":
+            return 1 / strike_vol
+        if self.sizing == "inverse_var":
+            return 20.0 / strike_vol ** 2      # same size as inverse_vol at a 20 vol strike
+        if self.sizing == "fixed":
+            return 1 / 20.0
+        raise ValueError(f"unknown sizing rule {self.sizing!r}; expected one of {SIZING_RULES}")
+
+
+class VarSwapBacktester:
+    def __init__(self, start_date, end_date, term_structure, initial_capital, base_notional,
+                 spy_hist: Optional[pd.Series] = None, verbose: bool = True,
+                 config: StrategyConfig = StrategyConfig(),
+                 realized_index: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.start_date = pd.to_datetime(start_date)
+        self.end_date = pd.to_datetime(end_date)
+        self.term_structure = term_structure
+        self.capital = float(initial_capital)
+        self.base_notional = base_notional
+        self.verbose = verbose
+        self.config = config
+        self.dates = pd.bdate_range(self.start_date, self.end_date)
+        if realized_index is None:
+            if spy_hist is None:
+                spy_hist = download_close("SPY", self.start_date - pd.Timedelta(days=60), self.end_date)
+            realized_index = realized_var_index(spy_hist)
+        self.spy_hist = spy_hist
+        self._px_dates, self._cum_r2 = realized_index
+        self._equity = []            # capital after each processed day (vol target input)
+        self.traded_vega_notional = 0.0
+        self.n_rolls = 0
+
+        # the open book, one slot per swap
+        cap = 16
+        self._inception = np.zeros(cap, dtype="datetime64[D]")
+        self._expiry = np.zeros(cap, dtype="datetime64[D]")
+        self._tenor = np.zeros(cap)
+        self._strike_var = np.zeros(cap)
+        self._notional = np.zeros(cap)
+        self._mtm = np.zeros(cap)
+        self._first_px = np.zeros(cap, dtype=np.int64)   # first trading-day row on/after inception
+        self._n = 0
+
+    # ---------- book ----------
+    def _append(self, today, expiry, tenor, strike_vol, notional):
+        if self._n == self._inception.size:
+            for name in ("_inception", "_expiry", "_tenor", "_strike_var", "_notional", "_mtm", "_first_px"):
+                a = getattr(self, name)
+                setattr(self, name, np.concatenate((a, np.zeros_like(a))))
+        i = self._n
+        self._inception[i] = today
+        self._expiry[i] = expiry
+        self._tenor[i] = tenor
+        self._strike_var[i] = (strike_vol / 100.0) ** 2
+        self._notional[i] = notional
+        self._mtm[i] = 0.0
+        self._first_px[i] = np.searchsorted(self._px_dates, today, side="left")
+        self._n += 1
+
+    def _keep(self, mask):
+        n = int(mask.sum())
+        for name in ("_inception", "_expiry", "_tenor", "_strike_var", "_notional", "_mtm", "_first_px"):
+            a = getattr(self, name)
+            a[:n] = a[:self._n][mask]
+        self._n = n
+
+    @property
+    def portfolio(self) -> pd.DataFrame:
+        n = self._n
+        return pd.DataFrame({
+            "inception_date": self._inception[:n], "expiry_date": self._expiry[:n],
+            "tenor_T": self._tenor[:n], "strike_vol": np.sqrt(self._strike_var[:n]) * 100,
+            "notional": self._notional[:n], "current_mtm": self._mtm[:n],
+        })
+
+    # ---------- daily steps ----------
+    def mark_to_market(self, today, curve):
+        n = self._n
+        if n == 0:
+            return
+        last_px = np.searchsorted(self._px_dates, today, side="right") - 1
+        first_px = self._first_px[:n]
+        realized_total = np.where(last_px > first_px, self._cum_r2[last_px] - self._cum_r2[np.minimum(first_px, last_px)], 0.0)
+
+        elapsed = (today - self._inception[:n]).astype(np.int64).astype(np.float64)
+        tenor = self._tenor[:n]
+        ann_realized = np.where(elapsed > 0, realized_total / np.where(elapsed > 0, elapsed, 1.0) * 252, 0.0)
+        remaining = tenor - elapsed
+        live = remaining > 0
+        current_var = ann_realized.copy()
+        if live.any():
+            implied_remaining = (curve(remaining[live]) / 100) ** 2
+            current_var[live] = (elapsed[live] / tenor[live]) * ann_realized[live] + \
+                                (remaining[live] / tenor[live]) * implied_remaining
+
+        mtm = self._notional[:n] * (self._strike_var[:n] - current_var)
+        self.capital += float(np.sum(mtm - self._mtm[:n]))
+        self._mtm[:n] = mtm
+
+    def _vol_target_scale(self) -> float:
+        cfg = self.config
+        if cfg.vol_target is None or len(self._equity) <= cfg.vol_lookback:
+            return 1.0
+        eq = np.asarray(self._equity[-(cfg.vol_lookback + 1):])
+        rets = np.diff(eq) / eq[:-1]
+        realized = float(np.std(rets, ddof=1)) * np.sqrt(252)
+        if not np.isfinite(realized) or realized <= 0:
+            return cfg.max_leverage
+        return min(cfg.max_leverage, cfg.vol_target / realized)
+
+    def execute_rolls(self, today, curve):
+        cfg = self.config
+        if self._n:
+            self._keep(self._expiry[:self._n] > today)
+        if pd.Timestamp(today).weekday() != cfg.roll_weekday:
+            return
+        if self._n >= cfg.max_swaps:
+            drop = int(np.argmin(self._expiry[:self._n]))
+            keep = np.ones(self._n, dtype=bool)
+            keep[drop] = False
+            self._keep(keep)
+        new_strike_vol = float(curve(cfg.tenor_days))
+        if new_strike_vol <= 0:
+            return
+        new_notional = self.base_notional * cfg.weight(new_strike_vol) * self._vol_target_scale()
+        self._append(today, today + np.timedelta64(cfg.tenor_days, "D"), cfg.tenor_days,
+                     new_strike_vol, new_notional)
+        self.n_rolls += 1
+        # vega notional = variance notional * 2 * strike (in vol points)
+        self.traded_vega_notional += new_notional * 2 * new_strike_vol
+        if self.verbose:
+            print(f"  {pd.Timestamp(today).date()}: Rolled. New {cfg.tenor_days}D swap @ "
+                  f"{new_strike_vol:.2f}% Notional ${new_notional:,.0f}")
+
+    def _daily_curves(self):
+        """Curve per backtest day, carrying the last available one forward (None before the first)."""
+        out, last = [], None
+        for d in self.dates:
+            c = self.term_structure.curve(d)
+            if c is not None:
+                last = c
+            out.append(last)
+        return out
+
+    def run_backtest(self) -> pd.DataFrame:
+        days = self.dates.to_numpy("datetime64[D]")
+        curves = self._daily_curves()
+        eq_dates, eq_cap = [], []
+        for today, curve in zip(days, curves):
+            if curve is None:
+                if eq_cap:
+                    eq_dates.append(today)
+                    eq_cap.append(eq_cap[-1])
+                continue
+            self.mark_to_market(today, curve)
+            self.execute_rolls(today, curve)
+            eq_dates.append(today)
+            eq_cap.append(self.capital)
+            self._equity.append(self.capital)
+        if not eq_cap:
+            return pd.DataFrame()
+        return pd.DataFrame({"capital": eq_cap}, index=pd.DatetimeIndex(eq_dates, name="date"))
@@ -0,0 +1,186 @@
+# quantfin/varswap_sweep.py
+"""
+Parallel strategy-variant sweep for the variance swap backtester.
+
+The variance-strike curves and the SPY realized-variance index are built once and
+published as .npy files; every pool worker memory-maps them in its initializer, so
+workers share the same pages and nothing is reloaded or re-pickled per variant.
+Each variant is a StrategyConfig (roll weekday, tenor, ladder depth, sizing rule,
+vol target); the output is one row of Sharpe / drawdown / turnover per variant.
+
+    python -m quantfin.varswap_sweep --store-dir data/options --prices-csv spy.csv \\
+        --start 2023-01-03 --end 2023-12-29 --workers 8 --out sweep.csv
+"""
+import argparse
+import itertools
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .variance_strike import TermStructure
+from .varswap import StrategyConfig, VarSwapBacktester, download_close, realized_var_index
+
+
+# ---------- shared data ----------
+
+class SharedMarketData:
+    """Curve arrays + realized-variance index stored as .npy files and opened with mmap_mode='r'."""
+
+    FILES = ("ts_dates", "ts_days", "ts_vol", "ts_bounds", "px_dates", "cum_r2")
+
+    def __init__(self, directory, owned: bool = False):
+        self.directory = Path(directory)
+        self.owned = owned
+
+    @classmethod
+    def publish(cls, term_structure: TermStructure, close: pd.Series, directory=None) -> "SharedMarketData":
+        owned = directory is None
+        d = Path(tempfile.mkdtemp(prefix="varswap_sweep_")) if owned else Path(directory)
+        d.mkdir(parents=True, exist_ok=True)
+        arr = term_structure.arrays()
+        px_dates, cum_r2 = realized_var_index(close)
+        for name, a in zip(cls.FILES, (arr["dates"], arr["days"], arr["vol"], arr["bounds"], px_dates, cum_r2)):
+            np.save(d / f"{name}.npy", np.ascontiguousarray(a))
+        return cls(d, owned=owned)
+
+    def open(self):
+        """(TermStructure, realized_index) backed by read-only memory maps."""
+        a = {n: np.load(self.directory / f"{n}.npy", mmap_mode="r") for n in self.FILES}
+        ts = TermStructure.from_arrays(a["ts_dates"], a["ts_days"], a["ts_vol"], a["ts_bounds"])
+        return ts, (a["px_dates"], a["cum_r2"])
+
+    def cleanup(self) -> None:
+        if self.owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+# ---------- metrics ----------
+
+def performance_metrics(equity: pd.Series, initial_capital: float) -> dict:
+    if equity.empty:
+        return {"final_capital": np.nan, "total_return": np.nan, "ann_vol": np.nan,
+                "sharpe": np.nan, "max_drawdown": np.nan}
+    rets = equity.pct_change().replace([np.inf, -np.inf], np.nan).dropna()
+    sd = float(rets.std())
+    sharpe = float(rets.mean()) / sd * np.sqrt(252) if sd > 0 else np.nan
+    dd = equity / equity.cummax() - 1.0
+    return {
+        "final_capital": float(equity.iloc[-1]),
+        "total_return": float(equity.iloc[-1] / initial_capital - 1.0),
+        "ann_vol": sd * np.sqrt(252),
+        "sharpe": sharpe,
+        "max_drawdown": float(dd.min()),
+    }
+
+
+# ---------- workers ----------
+
+_CTX = {}
+
+
+def _init_worker(directory, start, end, initial_capital, base_notional):
+    ts, realized_index = SharedMarketData(directory).open()
+    _CTX.update(ts=ts, realized_index=realized_index, start=start, end=end,
+                initial_capital=initial_capital, base_notional=base_notional)
+
+
+def _run_variant(cfg: StrategyConfig) -> dict:
+    c = _CTX
+    t0 = time.perf_counter()
+    bt = VarSwapBacktester(c["start"], c["end"], c["ts"], c["initial_capital"], c["base_notional"],
+                           verbose=False, config=cfg, realized_index=c["realized_index"])
+    eq = bt.run_backtest()
+    equity = eq["capital"] if not eq.empty else pd.Series(dtype=float)
+    years = max(len(equity), 1) / 252
+    row = asdict(cfg)
+    row.update(performance_metrics(equity, c["initial_capital"]))
+    row.update(
+        rolls_per_year=bt.n_rolls / years,
+        turnover=bt.traded_vega_notional / c["initial_capital"] / years,  # vega notional / capital / yr
+        runtime_s=time.perf_counter() - t0,
+    )
+    return row
+
+
+# ---------- driver ----------
+
+def variant_grid(roll_weekday: Sequence[int] = (0, 2, 4), tenor_days: Sequence[int] = (30, 60, 90),
+                 max_swaps: Sequence[int] = (2, 4, 8), sizing: Sequence[str] = ("inverse_vol", "inverse_var", "fixed"),
+                 vol_target: Sequence[Optional[float]] = (None, 0.10)) -> List[StrategyConfig]:
+    return [StrategyConfig(roll_weekday=w, tenor_days=t, max_swaps=m, sizing=s, vol_target=v)
+            for w, t, m, s, v in itertools.product(roll_weekday, tenor_days, max_swaps, sizing, vol_target)]
+
+
+def run_sweep(data: SharedMarketData, configs: Iterable[StrategyConfig], start, end,
+              initial_capital: float = 1_000_000, base_notional: float = 5_000_000,
+              max_workers: Optional[int] = None, chunksize: int = 4) -> pd.DataFrame:
+    """Evaluate every config against the shared data; one row per variant, best Sharpe first."""
+    configs = list(configs)
+    init = (str(data.directory), start, end, initial_capital, base_notional)
+    t0 = time.perf_counter()
+    if max_workers == 1:
+        _init_worker(*init)
+        rows = [_run_variant(c) for c in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=init) as ex:
+            rows = list(ex.map(_run_variant, configs, chunksize=chunksize))
+    table = pd.DataFrame(rows).sort_values("sharpe", ascending=False, na_position="last").reset_index(drop=True)
+    table.attrs["wall_time_s"] = time.perf_counter() - t0
+    return table
+
+
+def csv_price_loader(path) -> Callable:
+    """Offline price loader: CSV with date and close columns."""
+    def load(symbol, start, end):
+        df = pd.read_csv(path, parse_dates=["date"]).set_index("date")
+        return df.loc[pd.Timestamp(start):pd.Timestamp(end), "close"]
+    return load
+
+
+def load_sweep_data(store_dir, start, end, underlying: str = "SPY", risk_free_rate: float = 0.05,
+                    price_loader: Callable = download_close, directory=None) -> SharedMarketData:
+    """Build the term structure from an OptionsStore, fetch closes through `price_loader`, publish both."""
+    from .options_store import OptionsStore
+    from .variance_strike import term_structure_from_store
+    ts = term_structure_from_store(OptionsStore(store_dir), underlying, (start, end), risk_free_rate)
+    close = price_loader(underlying, pd.Timestamp(start) - pd.Timedelta(days=60), end)
+    return SharedMarketData.publish(ts, close, directory)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parallel variance swap strategy sweep")
+    ap.add_argument("--store-dir", required=True)
+    ap.add_argument("--start", required=True)
+    ap.add_argument("--end", required=True)
+    ap.add_argument("--prices-csv", default=None, help="offline closes (date, close); default: yfinance")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+
+    loader = csv_price_loader(args.prices_csv) if args.prices_csv else download_close
+    with load_sweep_data(args.store_dir, args.start, args.end, price_loader=loader) as data:
+        table = run_sweep(data, variant_grid(), args.start, args.end, max_workers=args.workers)
+    cols = ["roll_weekday", "tenor_days", "max_swaps", "sizing", "vol_target",
+            "sharpe", "max_drawdown", "turnover", "total_return"]
+    with pd.option_context("display.width", 200, "display.max_rows", 40):
+        print(table[cols].head(20))
+    print(f"\n{len(table)} variants in {table.attrs['wall_time_s']:.1f}s")
+    if args.out:
+        table.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+# quantfin/vol_surface.py
+"""
+Parametric implied-volatility surface: raw SVI per expiry, SSVI across expiries.
+
+staticpricerandsurface.ipynb pivoted raw IVs into a strike x expiry table and
+dropna()'d it, which kept only the strikes quoted on every expiry. Here every OTM
+quote goes into the fit, in total variance w = iv^2 T against log-forward-moneyness k:
+
+* SVI   w(k) = a + b (rho (k - m) + sqrt((k - m)^2 + sigma^2)), one slice per expiry,
+  projected onto min w >= 0 and wing slopes b (1 + |rho|) <= 2 (Lee's moment bound);
+* SSVI  w(k, T) = theta/2 (1 + rho phi k + sqrt((phi k + rho)^2 + 1 - rho^2)),
+  phi = eta / (theta^gamma (1 + theta)^(1 - gamma)), with theta non-decreasing in T,
+  gamma <= 1/2 and eta (1 + |rho|) <= 2: free of calendar and butterfly arbitrage
+  (Gatheral & Jacquier 2014).
+
+Both fits are Levenberg-Marquardt with analytic Jacobians. All SVI slices are solved
+together as one batch of 5x5 normal equations. SurfaceCalibrator keeps the last
+parameters and starts the next fit from them, so an intraday refit takes a handful of
+iterations.
+
+VolSurface answers bulk (K, T) queries. grid() builds and caches a k x T table that
+answers repeated queries with bilinear interpolation.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+_FIT_RTOL = 1e-4   # fits stop once rmse(w) is below this fraction of ATM total variance
+
+
+# ---------- Black-Scholes (vectorized) ----------
+
+def _is_call(flag) -> np.ndarray:
+    f = np.asarray(flag)
+    if f.dtype == bool:
+        return f
+    return np.char.upper(f.astype(str)).astype("U1") == "C"
+
+
+def _black(F, K, T, sigma, is_call):
+    """Undiscounted Black-76 price."""
+    sd = sigma * np.sqrt(T)
+    d1 = (np.log(F / K) + 0.5 * sd * sd) / sd
+    call = F * ndtr(d1) - K * ndtr(d1 - sd)
+    return np.where(is_call, call, call - (F - K))
+
+
+def bs_price(S, K, T, r, sigma, flag, q=0.0):
+    """Black-Scholes prices for arrays of contracts; flag is 'c'/'p' (any case) or a bool is_call."""
+    S, K, T, sigma = (np.asarray(x, dtype=np.float64) for x in (S, K, T, sigma))
+    F = S * np.exp((r - q) * T)
+    return np.exp(-r * T) * _black(F, K, T, sigma, _is_call(flag))
+
+
+def implied_vol(price, S, K, T, r, flag, q=0.0, tol=1e-10, max_iter=60):
+    """
+    Vectorized implied vol: safeguarded Newton (falls back to bisection when a step
+    leaves the bracket). NaN where the price is outside the no-arbitrage bounds.
+    """
+    price, S, K, T = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (price, S, K, T)))
+    is_call = np.broadcast_to(_is_call(flag), price.shape)
+    F = S * np.exp((r - q) * T)
+    p = price * np.exp(r * T)
+    intrinsic = np.where(is_call, np.maximum(F - K, 0.0), np.maximum(K - F, 0.0))
+    ok = (T > 0) & (K > 0) & (F > 0) & (p > intrinsic) & (p < np.where(is_call, F, K))
+
+    out = np.full(price.shape, np.nan)
+    F, K, T, p, c = F[ok], K[ok], T[ok], p[ok], is_call[ok]
+    lo, hi = np.full(p.shape, 1e-6), np.full(p.shape, 8.0)
+    sig = np.full(p.shape, 0.3)
+    sqT = np.sqrt(T)
+    for _ in range(max_iter):
+        sd = sig * sqT
+        d1 = (np.log(F / K) + 0.5 * sd * sd) / sd
+        diff = np.where(c, F * ndtr(d1) - K * ndtr(d1 - sd), K * ndtr(sd - d1) - F * ndtr(-d1)) - p
+        if np.all(np.abs(diff) <= tol * F):
+            break
+        lo = np.where(diff < 0, sig, lo)
+        hi = np.where(diff > 0, sig, hi)
+        vega = F * np.exp(-0.5 * d1 * d1) / _SQRT_2PI * sqT
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new = sig - diff / vega
+        inside = (new > lo) & (new < hi)
+        sig = np.where(inside, new, 0.5 * (lo + hi))
+    out[ok] = sig
+    return out
+
+
+# ---------- quotes ----------
+
+@dataclass
+class SurfaceQuotes:
+    """OTM quotes in (k, w) space, sorted by (slice, k); slice arrays are sorted by T."""
+    k: np.ndarray           # log(K / F)
+    w: np.ndarray           # total implied variance iv^2 T
+    weight: np.ndarray
+    slice_id: np.ndarray    # row -> slice
+    T: np.ndarray           # per slice
+    forward: np.ndarray     # per slice
+    keys: list              # per slice: expiration (or T when there is none), the warm-start key
+    spot: float
+    risk_free_rate: float
+    dividend_yield: float
+
+    @property
+    def n_slices(self) -> int:
+        return self.T.size
+
+
+def prepare_quotes(chain: pd.DataFrame, risk_free_rate: float = 0.05, dividend_yield: float = 0.0,
+                   day_count: float = 365.0, iv_col: Optional[str] = None,
+                   min_iv: float = 0.01, max_iv: float = 5.0) -> SurfaceQuotes:
+    """
+    One quote date's chain -> OTM quotes (puts below the forward, calls at/above).
+    Uses `time_to_expiry` if present (else expiration - quote_date), `mid_price` if
+    present (else (bid+ask)/2 with bid > 0), and `iv_col` if given (else implied_vol).
+    """
+    if "time_to_expiry" in chain:
+        T = chain["time_to_expiry"].to_numpy(np.float64)
+    else:
+        days = (pd.to_datetime(chain["expiration"]) - pd.to_datetime(chain["quote_date"])).dt.days
+        T = days.to_numpy(np.float64) / day_count
+    if "mid_price" in chain:
+        mid = chain["mid_price"].to_numpy(np.float64)
+        live = np.isfinite(mid) & (mid > 0)
+    else:
+        bid, ask = chain["bid"].to_numpy(np.float64), chain["ask"].to_numpy(np.float64)
+        mid = (bid + ask) / 2.0
+        live = bid > 0
+    S = chain["underlying_price"].to_numpy(np.float64)
+    K = chain["strike"].to_numpy(np.float64)
+    call = _is_call(chain["option_type"].to_numpy())
+    F = S * np.exp((risk_free_rate - dividend_yield) * T)
+    otm = np.where(call, K >= F, K < F)
+    keep = live & otm & (T > 0)
+
+    if iv_col is not None:
+        iv = chain[iv_col].to_numpy(np.float64)[keep]
+    else:
+        iv = implied_vol(mid[keep], S[keep], K[keep], T[keep], risk_free_rate, call[keep], dividend_yield)
+    T, F, K = T[keep], F[keep], K[keep]
+    good = np.isfinite(iv) & (iv > min_iv) & (iv < max_iv)
+    T, F, K, iv = T[good], F[good], K[good], iv[good]
+    if "expiration" in chain:
+        key_all = pd.to_datetime(chain["expiration"]).to_numpy("datetime64[ns]")[keep][good]
+    else:
+        key_all = np.round(T, 8)
+
+    k = np.log(K / F)
+    order = np.lexsort((k, T))
+    T, F, k, iv, key_all = T[order], F[order], k[order], iv[order], key_all[order]
+    new = np.ones(T.size, dtype=bool)
+    new[1:] = T[1:] != T[:-1]
+    starts = np.flatnonzero(new)
+    keys = [pd.Timestamp(x) if isinstance(x, np.datetime64) else float(x) for x in key_all[starts]]
+    return SurfaceQuotes(
+        k=k, w=iv * iv * T, weight=np.ones(k.size), slice_id=np.cumsum(new) - 1,
+        T=T[starts], forward=F[starts], keys=keys,
+        spot=float(S[0]) if S.size else np.nan,
+        risk_free_rate=risk_free_rate, dividend_yield=dividend_yield,
+    )
+
+
+def _pad(q: SurfaceQuotes):
+    """(G, N) views of k, w and sqrt(weight); padding rows have zero weight."""
+    G = q.n_slices
+    counts = np.bincount(q.slice_id, minlength=G)
+    N = int(counts.max()) if G else 0
+    col = np.arange(q.k.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    k, w, sw = np.zeros((G, N)), np.zeros((G, N)), np.zeros((G, N))
+    k[q.slice_id, col] = q.k
+    w[q.slice_id, col] = q.w
+    sw[q.slice_id, col] = np.sqrt(q.weight)
+    return k, w, sw, counts
+
+
+# ---------- Levenberg-Marquardt (batched) ----------
+
+def _lm(resid_jac, x0, lower, upper, project=None, max_iter=100, tol=1e-10, atol=0.0):
+    """
+    Levenberg-Marquardt over a batch of independent least-squares problems.
+    resid_jac(x (G, P)) -> residuals (G, N), Jacobian (G, N, P). Steps are clipped
+    to [lower, upper] and passed through project(x) when given. A problem stops when
+    its relative gain drops below `tol` or its cost is below `atol` (scalar or per problem).
+    Returns (x, cost per problem, iterations).
+    """
+    def feasible(x):
+        x = np.clip(x, lower, upper)
+        return project(x) if project is not None else x
+
+    x = feasible(np.array(x0, dtype=np.float64))
+    G, P = x.shape
+    r, J = resid_jac(x)
+    cost = np.einsum("gn,gn->g", r, r)
+    lam = np.full(G, 1e-3)
+    active = np.ones(G, dtype=bool)
+    it = 0
+    for it in range(1, max_iter + 1):
+        Jt = J.transpose(0, 2, 1)
+        A = Jt @ J
+        g = (Jt @ r[..., None])[..., 0]
+        d = np.diagonal(A, axis1=1, axis2=2)
+        damp = lam[:, None] * (d + 1e-12 * (d.max(axis=1, keepdims=True) + 1.0))
+        M = A + damp[:, :, None] * np.eye(P)
+        step = np.linalg.solve(M, -g[..., None])[..., 0]
+        x_new = np.where(active[:, None], feasible(x + step), x)
+        r_new, J_new = resid_jac(x_new)
+        cost_new = np.einsum("gn,gn->g", r_new, r_new)
+
+        better = active & (cost_new < cost)
+        gain = np.where(better, (cost - cost_new) / np.maximum(cost, 1e-300), 0.0)
+        tiny = np.abs(x_new - x).max(axis=1) <= 1e-12 * (1.0 + np.abs(x).max(axis=1))
+        x[better], r[better], J[better], cost[better] = x_new[better], r_new[better], J_new[better], cost_new[better]
+        lam = np.where(better, np.maximum(lam / 3, 1e-12), lam * 4)
+
+        active &= ~((better & (gain < tol)) | tiny | (lam > 1e12) | (cost <= atol))
+        if not active.any():
+            break
+    return x, cost, it
+
+
+# ---------- SVI ----------
+
+SVI_NAMES = ("a", "b", "rho", "m", "sigma")
+
+
+def svi_total_variance(k, a, b, rho, m, sigma):
+    x = k - m
+    return a + b * (rho * x + np.sqrt(x * x + sigma * sigma))
+
+
+def _svi_resid_jac(p, k, w, sw):
+    a, b, rho, m, sig = (p[:, i:i + 1] for i in range(5))
+    x = k - m
+    s = np.sqrt(x * x + sig * sig)
+    r = sw * (a + b * (rho * x + s) - w)
+    J = np.stack((np.ones_like(x), rho * x + s, b * x, -b * (rho + x / s), b * sig / s), axis=-1)
+    return r, J * sw[..., None]
+
+
+def _svi_project(p):
+    a, b, rho, m, sig = p.T
+    b = np.minimum(b, 2.0 / (1.0 + np.abs(rho)))              # wing slopes <= 2
+    a = np.maximum(a, -b * sig * np.sqrt(1.0 - rho * rho))     # min total variance >= 0
+    return np.column_stack((a, b, rho, m, sig))
+
+
+def _svi_bounds(k, counts):
+    G = counts.size
+    last = k[np.arange(G), np.maximum(counts - 1, 0)]
+    lower = np.column_stack((np.full(G, -1.0), np.full(G, 1e-6), np.full(G, -0.999), k[:, 0] - 1.0, np.full(G, 1e-4)))
+    upper = np.column_stack((np.full(G, 5.0), np.full(G, 2.0), np.full(G, 0.999), last + 1.0, np.full(G, 5.0)))
+    return lower, upper
+
+
+def _atm_w(k, w, counts):
+    """Total variance at k = 0 per slice by linear interpolation of the quotes."""
+    out = np.empty(counts.size)
+    for i, n in enumerate(counts):
+        out[i] = np.interp(0.0, k[i, :n], w[i, :n])
+    return out
+
+
+def svi_initial_guess(k, w, counts):
+    """Cold start from the ATM level and the two wing slopes of each slice."""
+    G = counts.size
+    idx = np.arange(G)
+    w0 = _atm_w(k, w, counts)
+    kl, kr = k[:, 0], k[idx, counts - 1]
+    wl, wr = w[:, 0], w[idx, counts - 1]
+    sl = np.where(kl < -1e-6, (wl - w0) / np.where(kl < -1e-6, kl, -1.0), 0.0)
+    sr = np.where(kr > 1e-6, (wr - w0) / np.where(kr > 1e-6, kr, 1.0), 0.0)
+    b = np.clip((sr - sl) / 2, 1e-3, 1.9)
+    rho = np.clip((sr + sl) / np.maximum(sr - sl, 1e-9), -0.9, 0.9)
+    sig = np.full(G, 0.1)
+    return np.column_stack((w0 - b * sig * np.sqrt(1 - rho * rho), b, rho, np.zeros(G), sig))
+
+
+def fit_svi(q: SurfaceQuotes, x0: Optional[np.ndarray] = None, max_iter: int = 100):
+    """
+    Fit every slice with >= 5 quotes. Returns (params (G, 5) with NaN rows for skipped
+    slices, rmse of w per slice, iterations).
+    """
+    k, w, sw, counts = _pad(q)
+    G = counts.size
+    params = np.full((G, 5), np.nan)
+    rmse = np.full(G, np.nan)
+    ok = counts >= 5
+    if not ok.any():
+        return params, rmse, 0
+    k, w, sw, counts = k[ok], w[ok], sw[ok], counts[ok]
+    start = svi_initial_guess(k, w, counts)
+    if x0 is not None:
+        warm = np.asarray(x0, dtype=np.float64)[ok]
+        start = np.where(np.isfinite(warm).all(axis=1)[:, None], warm, start)
+    lower, upper = _svi_bounds(k, counts)
+    atol = counts * (_FIT_RTOL * _atm_w(k, w, counts)) ** 2
+    x, cost, it = _lm(lambda p: _svi_resid_jac(p, k, w, sw), start, lower, upper, _svi_project, max_iter, atol=atol)
+    params[ok] = x
+    rmse[ok] = np.sqrt(cost / counts)
+    return params, rmse, it
+
+
+# ---------- SSVI ----------
+
+@dataclass(frozen=True)
+class SSVIParams:
+    rho: float
+    eta: float
+    gamma: float
+    T: np.ndarray = field(repr=False)       # knots (years)
+    theta: np.ndarray = field(repr=False)   # ATM total variance at each knot, non-decreasing
+
+    def theta_at(self, T) -> np.ndarray:
+        """theta(T): linear between knots, constant ATM vol outside them."""
+        T = np.asarray(T, dtype=np.float64)
+        inside = np.interp(T, self.T, self.theta)
+        short = self.theta[0] * T / self.T[0]
+        long = self.theta[-1] * T / self.T[-1]
+        return np.where(T < self.T[0], short, np.where(T > self.T[-1], long, inside))
+
+    def phi(self, theta):
+        return self.eta / (theta ** self.gamma * (1.0 + theta) ** (1.0 - self.gamma))
+
+    def total_variance(self, k, T):
+        theta = self.theta_at(T)
+        return ssvi_total_variance(k, theta, self.rho, self.phi(theta))
+
+
+def ssvi_total_variance(k, theta, rho, phi):
+    p = phi * k
+    return 0.5 * theta * (1.0 + rho * p + np.sqrt((p + rho) ** 2 + 1.0 - rho * rho))
+
+
+def _ssvi_resid_jac(x, k, w, sw, sid, G):
+    """x = [rho, eta, gamma, theta_0 .. theta_G-1]; one problem, so shapes carry a leading 1."""
+    rho, eta, gam = x[0, 0], x[0, 1], x[0, 2]
+    theta = x[0, 3:][sid]
+    phi = eta / (theta ** gam * (1.0 + theta) ** (1.0 - gam))
+    p = phi * k
+    z = p + rho
+    R = np.sqrt(z * z + 1.0 - rho * rho)
+    model = 0.5 * theta * (1.0 + rho * p + R)
+    dw_dphi = 0.5 * theta * k * (rho + z / R)
+    dphi_dtheta = phi * (-gam / theta + (gam - 1.0) / (1.0 + theta))
+    J = np.zeros((k.size, 3 + G))
+    J[:, 0] = 0.5 * theta * (p + p / R)
+    J[:, 1] = dw_dphi * phi / eta
+    J[:, 2] = dw_dphi * phi * np.log((1.0 + theta) / theta)
+    J[np.arange(k.size), 3 + sid] = 0.5 * (1.0 + rho * p + R) + dw_dphi * dphi_dtheta
+    return (sw * (model - w))[None, :], (J * sw[:, None])[None]
+
+
+def _ssvi_project(x):
+    x = x.copy()
+    x[:, 1] = np.minimum(x[:, 1], 2.0 / (1.0 + np.abs(x[:, 0])))   # butterfly: eta (1 + |rho|) <= 2
+    x[:, 3:] = np.maximum.accumulate(x[:, 3:], axis=1)              # calendar: theta non-decreasing
+    return x
+
+
+def fit_ssvi(q: SurfaceQuotes, theta0: Optional[np.ndarray] = None, x0: Optional[Tuple[float, float, float]] = None,
+             max_iter: int = 100):
+    """Fit (rho, eta, gamma) and one theta per slice. Returns (SSVIParams, rmse of w, iterations)."""
+    G = q.n_slices
+    if theta0 is None:
+        k, w, _, counts = _pad(q)
+        theta0 = _atm_w(k, w, counts)
+    theta0 = np.maximum.accumulate(np.maximum(np.asarray(theta0, dtype=np.float64), 1e-8))
+    rho, eta, gam = x0 if x0 is not None else (-0.5, 1.0, 0.4)
+    start = np.concatenate(([rho, eta, gam], theta0))[None]
+    lower = np.concatenate(([-0.999, 1e-4, 1e-3], np.full(G, 1e-8)))[None]
+    upper = np.concatenate(([0.999, 2.0, 0.5], np.full(G, 10.0)))[None]
+    sw = np.sqrt(q.weight)
+    atol = q.k.size * (_FIT_RTOL * float(np.mean(theta0))) ** 2
+    x, cost, it = _lm(lambda v: _ssvi_resid_jac(v, q.k, q.w, sw, q.slice_id, G),
+                      start, lower, upper, _ssvi_project, max_iter, atol=atol)
+    x = x[0]
+    params = SSVIParams(rho=float(x[0]), eta=float(x[1]), gamma=float(x[2]), T=q.T.copy(), theta=x[3:].copy())
+    return params, float(np.sqrt(cost[0] / max(q.k.size, 1))), it
+
+
+# ---------- surface ----------
+
+class SurfaceGrid:
+    """Implied vols tabulated on a uniform (k, T) grid; bulk queries by bilinear interpolation (clamped at the edges)."""
+
+    def __init__(self, surface: "VolSurface", k: np.ndarray, T: np.ndarray):
+        self.surface = surface
+        self.k = k
+        self.T = T
+        self.iv_table = surface.iv_k(k[None, :], T[:, None])   # (n_T, n_k)
+        # a one-expiry surface (or a T_range/k_range collapsed to a point) has no cell
+        # to interpolate in; those grids just evaluate the surface directly
+        self.degenerate = T.size < 2 or k.size < 2 or not (T[-1] > T[0] and k[-1] > k[0])
+
+    def iv_k(self, k, T):
+        if self.degenerate:
+            return self.surface.iv_k(k, T)
+        k, T = np.broadcast_arrays(np.asarray(k, dtype=np.float64), np.asarray(T, dtype=np.float64))
+        # uniform axes: cell index is arithmetic, no searchsorted
+        u = np.clip((T - self.T[0]) / (self.T[1] - self.T[0]), 0.0, self.T.size - 1.000001)
+        v = np.clip((k - self.k[0]) / (self.k[1] - self.k[0]), 0.0, self.k.size - 1.000001)
+        i, j = u.astype(np.intp), v.astype(np.intp)
+        u -= i
+        v -= j
+        z = self.iv_table.ravel()
+        n = self.k.size
+        at = i * n + j
+        return ((1 - u) * ((1 - v) * z[at] + v * z[at + 1]) +
+                u * ((1 - v) * z[at + n] + v * z[at + n + 1]))
+
+    def iv(self, K, T):
+        T = np.asarray(T, dtype=np.float64)
+        return self.iv_k(np.log(np.asarray(K, dtype=np.float64) / self.surface.forward(T)), T)
+
+
+class VolSurface:
+    """
+    Calibrated surface for one quote time. Bulk (K, T) queries go through SSVI;
+    `slices` keeps the per-expiry SVI fits (rows in the order of `keys`).
+    """
+
+    def __init__(self, ssvi: SSVIParams, slices: np.ndarray, keys: list, spot: float,
+                 risk_free_rate: float, dividend_yield: float = 0.0, fit_info: Optional[dict] = None):
+        self.ssvi = ssvi
+        self.slices = slices
+        self.keys = keys
+        self.spot = spot
+        self.r = risk_free_rate
+        self.q = dividend_yield
+        self.fit_info = fit_info or {}
+        self._grids: Dict[tuple, SurfaceGrid] = {}
+
+    @property
+    def T(self) -> np.ndarray:
+        return self.ssvi.T
+
+    def forward(self, T):
+        return self.spot * np.exp((self.r - self.q) * np.asarray(T, dtype=np.float64))
+
+    def total_variance(self, k, T):
+        return self.ssvi.total_variance(np.asarray(k, dtype=np.float64), np.asarray(T, dtype=np.float64))
+
+    def iv_k(self, k, T):
+        T = np.asarray(T, dtype=np.float64)
+        return np.sqrt(np.maximum(self.total_variance(k, T), 0.0) / T)
+
+    def iv(self, K, T):
+        """Implied vol for arrays of strikes and maturities (years); broadcasts."""
+        T = np.asarray(T, dtype=np.float64)
+        return self.iv_k(np.log(np.asarray(K, dtype=np.float64) / self.forward(T)), T)
+
+    def price(self, K, T, flag):
+        return bs_price(self.spot, K, T, self.r, self.iv(K, T), flag, self.q)
+
+    def slice_iv(self, i: int, K):
+        """Implied vol from the SVI fit of slice i (at its own expiry)."""
+        T = self.T[i]
+        k = np.log(np.asarray(K, dtype=np.float64) / self.forward(T))
+        return np.sqrt(np.maximum(svi_total_variance(k, *self.slices[i]), 0.0) / T)
+
+    def grid(self, n_k: int = 201, n_T: int = 120, k_range: Tuple[float, float] = (-1.0, 1.0),
+             T_range: Optional[Tuple[float, float]] = None) -> SurfaceGrid:
+        """Tabulated surface, built once per (n_k, n_T, k_range, T_range) and cached."""
+        if T_range is None:
+            T_range = (float(self.T[0]), float(self.T[-1]))
+        key = (n_k, n_T, tuple(k_range), tuple(T_range))
+        g = self._grids.get(key)
+        if g is None:
+            g = self._grids[key] = SurfaceGrid(self, np.linspace(*k_range, n_k), np.linspace(*T_range, n_T))
+        return g
+
+    def variance_strike(self, T, n_k: int = 401, k_width: float = 6.0):
+        """
+        Fair variance-swap strike (vol, %) from the fitted smile: 2/T * integral of
+        OTM forward prices / K^2, on a k grid of +- k_width ATM standard deviations.
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=np.float64))
+        sd = np.sqrt(self.ssvi.theta_at(T))
+        u = np.linspace(-k_width, k_width, n_k)
+        k = u[None, :] * sd[:, None]                                # (n_T, n_k)
+        F = self.forward(T)[:, None]
+        iv = self.iv_k(k, T[:, None])
+        otm = _black(F, F * np.exp(k), T[:, None], iv, k >= 0) / F  # forward price / F
+        var = 2.0 / T * np.trapezoid(otm * np.exp(-k), k, axis=1)
+        return np.sqrt(var) * 100
+
+
+class SurfaceCalibrator:
+    """
+    Fits quotes to a VolSurface, warm-starting each fit from the previous one
+    (SVI slices matched by expiry, SSVI shape parameters carried over).
+    """
+
+    def __init__(self, risk_free_rate: float = 0.05, dividend_yield: float = 0.0,
+                 day_count: float = 365.0, max_iter: int = 100):
+        self.r = risk_free_rate
+        self.q = dividend_yield
+        self.day_count = day_count
+        self.max_iter = max_iter
+        self._svi: Dict[object, np.ndarray] = {}
+        self._ssvi: Optional[Tuple[float, float, float]] = None
+        self.last: Optional[VolSurface] = None
+
+    def reset(self) -> None:
+        self._svi.clear()
+        self._ssvi = None
+
+    def fit(self, chain, iv_col: Optional[str] = None) -> VolSurface:
+        """`chain` is a single quote date's DataFrame (see prepare_quotes) or SurfaceQuotes."""
+        t0 = time.perf_counter()
+        q = chain if isinstance(chain, SurfaceQuotes) else prepare_quotes(
+            chain, self.r, self.q, self.day_count, iv_col)
+        if q.n_slices == 0:
+            raise ValueError("no usable quotes to fit a surface")
+
+        warm = np.array([self._svi.get(key, np.full(5, np.nan)) for key in q.keys])
+        slices, svi_rmse, svi_it = fit_svi(q, warm, self.max_iter)
+        t1 = time.perf_counter()
+
+        # theta starts from the SVI ATM level where the slice fit, else the raw quotes
+        k, w, _, counts = _pad(q)
+        theta0 = _atm_w(k, w, counts)
+        fitted = np.isfinite(slices).all(axis=1)
+        theta0[fitted] = svi_total_variance(0.0, *slices[fitted].T)
+        ssvi, ssvi_rmse, ssvi_it = fit_ssvi(q, theta0, self._ssvi, self.max_iter)
+        t2 = time.perf_counter()
+
+        for key, p, ok in zip(q.keys, slices, fitted):
+            if ok:
+                self._svi[key] = p
+        self._ssvi = (ssvi.rho, ssvi.eta, ssvi.gamma)
+        info = {"quotes": int(q.k.size), "slices": int(q.n_slices),
+                "svi_iters": svi_it, "ssvi_iters": ssvi_it,
+                "svi_rmse_w": svi_rmse, "ssvi_rmse_w": ssvi_rmse,
+                "svi_s": t1 - t0, "ssvi_s": t2 - t1, "total_s": t2 - t0}
+        self.last = VolSurface(ssvi, slices, q.keys, q.spot, q.risk_free_rate, q.dividend_yield, info)
+        return self.last
+
+
+def fit_surface(chain: pd.DataFrame, risk_free_rate: float = 0.05, dividend_yield: float = 0.0,
+                day_count: float = 365.0, iv_col: Optional[str] = None) -> VolSurface:
+    """One-off cold fit."""
+    return SurfaceCalibrator(risk_free_rate, dividend_yield, day_count).fit(chain, iv_col)